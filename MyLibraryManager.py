@@ -1,84 +1,323 @@
 import csv
+import functools
 import os
-from tabulate import tabulate
+from lazy_imports import tabulate
 from helpers import Helpers
-from sorting import Sorting
+from sorting import Sorting, ShelfCache
 from validation import Validation
-from book import Book
+from book import Book, CSV_FIELDS
 from mst_clustering import MSTClustering
+from book_index import BookIndex
+from search_index import SearchIndex
+from table_renderer import BOOK_HEADERS, TableRenderer, book_rows
+from cluster_engine import ClusterEngine
+from similarity_index import SimilarityIndex
+from columnar_library import ColumnarLibrary
+from snapshot import Snapshot
+from journal import ChangeJournal
+from streaming import StreamingStats
+from scheduler import ReadingScheduler
+from reading_cache import ReadingTimeCache
+from what_if import WhatIfPlanner
+from bulk_import import BulkImporter
+from file_lock import FileLock, LibraryConflictError
+from profiling import NULL_SECTION, Profiler, profiler
 
 
-CSV_FIELDS = [
-    "title", "author_first_last", "author_last_first", "isbn", "isbn13",
-    "my_rating", "avg_rating", "publisher", "binding", "num_pages",
-    "year_published", "date_read", "genre", "age_group", "read"
-]
-
 class MyLibraryManager:
-    def __init__(self, csv_file='data/books.csv'):
-        self.library = Helpers.read_csv_as_dict(csv_file)
+    def __init__(self, csv_file='data/books.csv', columnar=False, use_snapshot=True):
         self.csv_file = csv_file
+        self.columnar = columnar  # keep the library in a compact ColumnarLibrary instead of a list of dicts
+        self.use_snapshot = use_snapshot  # load from the binary snapshot next to the CSV when it is current
         self.mst_clustering = MSTClustering() 
+        self.cluster_engine = ClusterEngine()
+        self.similarity_index = SimilarityIndex()
+        self.similarity_version = None  # library_version the similarity index was built for
+        self.index = BookIndex()
+        self.search_index = SearchIndex(csv_file, self.current_disk_signature)  # persisted next to the CSV
+        self.shelf_cache = ShelfCache()
+        self.journal = ChangeJournal(csv_file)
+        self.lock = FileLock(csv_file)  # shared while reading, exclusive while writing the CSV or journal
+        self.scheduler = ReadingScheduler()
+        self.reading_cache = ReadingTimeCache()
+        self.what_if = WhatIfPlanner(self.scheduler)
+        self.library_version = 0  # bumped on every change to self.library
+        self.reloads_avoided = 0  # full CSV parses skipped because the file had not changed
+        self._library = None  # parsed on first use, so the menu and one-shot commands start at once
+        self._validation_issues = None  # checked on first use of validation_issues
+        self.validation_warned = False  # the menu prints validation_warning once, after the first load
+
+    @property
+    def library(self):
+        """
+        The books in memory, loaded from the CSV the first time they are needed
+        """
+        if self._library is None:
+            with profiler.section("load library"):
+                self.reload_library()
+        return self._library
 
-    def view_books(self):
+    @library.setter
+    def library(self, books):
+        self._library = books
+
+    @property
+    def validation_issues(self):
         """
-        Displays all books stored in the CSV file in a formatted table
-        
+        dict: field -> positions of books with an invalid value. The library is only checked when this
+        is first read after a change, so loading does not pay for it
+        """
+        if self._validation_issues is None:
+            self._validation_issues = Validation.validate_library(self.library)
+        return self._validation_issues
+
+    def invalid_books(self):
+        """
+        Lists every invalid value found by validation_issues
+
+        Returns:
+            list: (position, title, field, value) tuples in library order
+        """
+        found = sorted((position, field) for field, positions in self.validation_issues.items()
+                       for position in positions)
+        return [(position, self.library[position]['title'], field, self.library[position][field])
+                for position, field in found]
+
+    def validation_warning(self):
+        """
+        Returns:
+            str: One line summing up validation_issues, or None if every book is valid
+        """
+        issues = self.validation_issues
+        if not issues:
+            return None
+        books = len({position for positions in issues.values() for position in positions})
+        fields = ", ".join(f"{field}: {len(positions)}" for field, positions in issues.items())
+        return (f"Warning: {books} book(s) in {self.csv_file} have invalid values ({fields}). "
+                f"Run 'python cli.py validate' to list them.")
+
+    def reload_library(self):
+        """
+        Parses the whole CSV file into self.library and remembers its on-disk signature
+        Uses the binary snapshot instead of parsing when it matches the CSV, then replays the change journal
+        The CSV and journal are read under the shared lock so a concurrent compaction is never seen half done
+        """
+        parse = ColumnarLibrary.from_csv if self.columnar else Helpers.read_csv_as_dict
+        with self.lock.shared():
+            signature = self.current_disk_signature()
+            if self.use_snapshot:
+                layout = "columnar" if self.columnar else "rows"
+                books = Snapshot.load(self.csv_file, parse, layout)
+            else:
+                books = parse(self.csv_file)
+            self.journal.replay(books)
+        self.set_library(books)
+        self.disk_signature = signature
+
+    def current_disk_signature(self):
+        return Helpers.file_signature(self.csv_file), self.journal.signature()
+
+    def set_library(self, books):
+        """
+        Replaces the in-memory library and rebuilds everything derived from it
+        """
+        if self.columnar and not isinstance(books, ColumnarLibrary):
+            books = ColumnarLibrary.from_rows(books)
+        self.library = books
+        self.index.rebuild(books)
+        self.search_index.rebuild(books)
+        self.library_changed()
+
+    def library_changed(self):
+        """
+        Marks everything cached from self.library (e.g. sorted shelves) as stale
+        """
+        self.library_version += 1
+        self._validation_issues = None
+
+    def needs_refresh(self):
+        """
+        True if refresh_library would read the CSV: nothing is loaded yet, or the CSV or journal
+        changed on disk since we last read or wrote them
+        """
+        return self._library is None or self.current_disk_signature() != self.disk_signature
+
+    def refresh_library(self):
+        """
+        Re-reads the CSV file only if its (or the journal's) mtime or size changed since we last read or wrote it.
+        Otherwise the in-memory library is authoritative and the reload is counted as avoided (reloads_avoided,
+        also listed in the profile summary)
+        If the library has not been loaded yet it is simply loaded now
+        """
+        if not self.needs_refresh():
+            self.reloads_avoided += 1
+            profiler.count("CSV reloads avoided")
+            return
+        self.reload_library()
+
+    def check_unchanged(self):
+        """
+        Optimistic version check, called under the exclusive lock before writing changes that were
+        made to the in-memory library: if another process wrote the CSV or journal since we last read
+        or wrote them, our changes may be based on stale data, so the library is reloaded instead
+
+        Raises:
+            LibraryConflictError: If the library changed on disk
+        """
+        if self._library is None:
+            self.reload_library()  # nothing was read yet, so nothing can be stale
+            return
+        if self.current_disk_signature() != self.disk_signature:
+            self.reload_library()
+            raise LibraryConflictError("The library was changed by another process and has been reloaded. "
+                                       "Please try again.")
+
+    def mark_library_written(self):
+        """
+        Records the CSV signature after one of our own writes so it is not mistaken for an outside change
+        """
+        self.disk_signature = self.current_disk_signature()
+
+    def view_books(self, page=None, page_size=None):
+        """
+        Displays all books stored in the CSV file in a formatted table, streamed row by row
+
         Args:
-            csv_file (str): Path to the CSV file containing book data
+            page (int): Only show this page (starting at 1), None for the whole library
+            page_size (int): Books per page, TableRenderer.PAGE_SIZE by default
         """
         if self.library is None:
             print("Your library is empty. Please try adding a book!")
             return
 
-        headers = ["Title", "Author", "Year Published", "Average Rating", "Your Ratings", "Read", "Date Read"]
-        books_display = [[
-            book.get("title", "N/A"),
-            book.get("author_first_last", "N/A"),
-            book.get("year_published", "N/A"),
-            book.get("avg_rating", "N/A"),
-            book.get("my_rating", "N/A"),
-            book.get("read", "N/A"),
-            book.get("date_read", "N/A")
-        ] for book in self.library]
-
-        print("\nYour Library:")
-        print(tabulate(books_display, headers=headers, tablefmt="pretty"))
+        books = self.library
+        if page is not None or page_size is not None:
+            start, stop, pages = TableRenderer.page_bounds(len(books), page, page_size)
+            books = books[start:stop]  # only the requested slice is formatted
+            print("\nYour Library:")
+            print(f"Page {page or 1} of {pages} (books {start + 1}-{stop} of {len(self.library)})")
+        else:
+            print("\nYour Library:")
+        TableRenderer(BOOK_HEADERS).render(book_rows(books))
         print()
 
+    def page_through(self, show, total, choice=None):
+        """
+        Shows a listing from the menu one page at a time
+        A listing that fits on one page is shown whole. Otherwise every page is followed by a prompt:
+        Enter shows the next page, a number jumps to that page and q goes back to the menu
+
+        Args:
+            show (callable): Prints one page when called as show(page=..., page_size=...), everything when called bare
+            total (int): Number of rows in the longest table show prints
+            choice (str): Menu choice each page is timed under when profiling (see menu_section)
+        """
+        page_size = TableRenderer.PAGE_SIZE
+        pages = TableRenderer.page_bounds(total, 1, page_size)[2]
+        if pages == 1:
+            with self.menu_section(choice):
+                show()
+            return
+        page = 1
+        while True:
+            with self.menu_section(choice):
+                show(page=page, page_size=page_size)
+            answer = input(f"Page {page} of {pages}. Press Enter for the next page, "
+                           f"type a page number, or q to go back: ").strip().lower()
+            if answer == "q" or (answer == "" and page == pages):
+                return
+            if answer == "":
+                page += 1
+            elif answer.isdigit() and 1 <= int(answer) <= pages:
+                page = int(answer)
+            else:
+                print(f"Please enter a page number from 1 to {pages}, or q.")
+
     def write_csv_header(self, writer):
         writer.writerow(CSV_FIELDS)
 
+    def book_to_row(self, book):
+        """
+        Converts a Book object to a row dictionary matching what csv.DictReader gives back for it
+        """
+        return book.to_row()
+
     def write_book_to_csv(self, writer, book):
-        writer.writerow([
-            book.title, book.author_first_last, book.author_last_first, book.isbn, book.isbn13,
-            book.my_rating, book.avg_rating, book.publisher, book.binding, book.num_pages,
-            book.year_published, book.date_read, book.genre, book.age_group, book.read
-        ])
+        row = self.book_to_row(book)
+        writer.writerow([row[field] for field in CSV_FIELDS])
+        return row
 
     def save_book_to_csv(self, book):
         """
         Saves the given Book object to a CSV file
         If the file does not exist, a header row is added
+        The row is appended to the in-memory library instead of re-reading the whole file
         
         Args:
             book (Book): The book object to be saved
             csv_file (str): Path to the CSV file where the book will be stored
         """
-        file_exists = os.path.exists(self.csv_file)
+        self.save_books_to_csv([book])
+
+    def save_books_to_csv(self, books):
+        """
+        Appends any number of Book objects to the CSV file with a single open and write
+
+        Args:
+            books (list): The Book objects to be saved
 
+        Returns:
+            list: The rows appended to the library, empty if the write failed
+        """
         try:
-            with open(self.csv_file, mode='a', newline='') as file:
-                writer = csv.writer(file)
+            with self.lock.exclusive():
+                self.refresh_library()  # pick up outside changes before appending to them
+                file_exists = os.path.exists(self.csv_file)
+
+                with open(self.csv_file, mode='a', newline='') as file:
+                    writer = csv.writer(file)
 
-                if not file_exists:
-                    self.write_csv_header(writer)
+                    if not file_exists:
+                        self.write_csv_header(writer)
 
-                self.write_book_to_csv(writer, book)
+                    rows = [self.write_book_to_csv(writer, book) for book in books]
 
-            self.library = Helpers.read_csv_as_dict(self.csv_file)
+                for row in rows:
+                    self.library.append(row)
+                    self.index.add(row, len(self.library) - 1)
+                    self.search_index.add(row, len(self.library) - 1)
+                self.library_changed()
+                self.mark_library_written()
+            return rows
         except Exception as e:
             print(f"Error saving book to CSV file: {e}")
+            return []
+
+    def add_books(self, rows):
+        """
+        Validates and saves many books at once, without any prompts
+
+        Every row is checked in one pass with Validation.book_errors; the valid ones are appended to
+        the CSV in a single write.
+
+        Args:
+            rows (iterable): Dictionaries of book fields (see Book.from_fields)
+
+        Returns:
+            tuple: (added, rejected) where added is the list of saved rows and rejected a list of
+            (row number, row, errors) for the rows that failed validation, row numbers from 1
+        """
+        books = []
+        rejected = []
+        for number, row in enumerate(rows, start=1):
+            row = Validation.normalize_row(row)
+            errors = Validation.book_errors(row)
+            if errors:
+                rejected.append((number, row, errors))
+            else:
+                books.append(Book.from_fields(row))
+        added = self.save_books_to_csv(books) if books else []
+        return added, rejected
 
     def add_book(self):
         """
@@ -96,13 +335,15 @@ class MyLibraryManager:
         isbn = input("ISBN (leave blank if unknown): ")
 
         while isbn and not Validation.is_valid_isbn(isbn):
-            print("Invalid ISBN. It should be exactly 10 characters long.")
+            print("Invalid ISBN. It should be 10 characters long with a correct check digit.")
             isbn = input("ISBN (leave blank if unknown): ")
+        isbn = Validation.normalize_isbn(isbn)
 
         isbn13 = input("ISBN-13 (leave blank if unknown): ")
         while isbn13 and not Validation.is_valid_isbn13(isbn13):
-            print("Invalid ISBN-13. It should be exactly 13 characters long.")
+            print("Invalid ISBN-13. It should be 13 digits starting with 978 or 979 with a correct check digit.")
             isbn13 = input("ISBN-13 (leave blank if unknown): ")
+        isbn13 = Validation.normalize_isbn(isbn13)
 
         my_rating = input("Your Rating (leave blank if not rated): ") or None
         while my_rating and not Validation.is_valid_rating(my_rating):
@@ -155,10 +396,49 @@ class MyLibraryManager:
                 print("Invalid age group. Please enter 'Children', 'Young Adult', or 'Adult'.")
         age_group = age_group.title()
 
-        book = Book(title, author_first, author_last, isbn, isbn13, my_rating, avg_rating,
-                    publisher, binding, num_pages, year_published, date_read, genre, age_group, read)
+        with self.menu_section("2"):
+            book = Book(title, author_first, author_last, isbn, isbn13, my_rating, avg_rating,
+                        publisher, binding, num_pages, year_published, date_read, genre, age_group, read)
+
+            self.save_book_to_csv(book)
+
+    def import_books(self, path, workers=None, report_file=None):
+        """
+        Bulk-imports a CSV or JSONL file (see BulkImporter)
+
+        Rows are validated in batches (in a process pool when workers > 1), duplicates of books in
+        the library or earlier in the file are skipped, and the library is saved with one atomic
+        rewrite of the CSV file.
 
-        self.save_book_to_csv(book)
+        Args:
+            path (str): The .csv or .jsonl file to import
+            workers (int): Number of processes to validate with, None to validate in this process
+            report_file (str): Where to write the rejected rows as CSV, if given
+
+        Returns:
+            tuple: (added, rejected) where added is the list of new rows and rejected a list of
+            (line number, input row, errors)
+        """
+        importer = BulkImporter(workers=workers)
+        with self.lock.exclusive():
+            self.refresh_library()
+            added, rejected = importer.run(path, self.library, self.index)
+            if report_file is not None:
+                BulkImporter.write_report(report_file, rejected)
+            if not added:
+                return added, rejected
+
+            for row in added:
+                self.library.append(row)
+            self.index.rebuild(self.library)  # one lazy rebuild is cheaper than thousands of sorted inserts
+            self.search_index.rebuild(self.library)
+            self.library_changed()
+            try:
+                self.update_csv_file()
+            except Exception:
+                self.reload_library()  # the write failed, drop the rows we added in memory
+                raise
+        return added, rejected
 
     def delete_library(self):
         """
@@ -172,34 +452,70 @@ class MyLibraryManager:
 
         if confirmation == "delete library":
             try:
-                os.remove(self.csv_file)
+                with self.menu_section("6"), self.lock.exclusive():
+                    os.remove(self.csv_file)
+                    Snapshot.remove(self.csv_file)
+                    self.search_index.remove()
+                    self.journal.clear()
                 print("Your library has been deleted.")
             except Exception as e:
                 print(f"Error deleting library: {e}")
         else:
             print("Cancelled")
 
-        self.library = Helpers.read_csv_as_dict(self.csv_file)
+        self.refresh_library()
 
     def delete_book_from_csv(self, book):
-        updated_books = []
         try:
-            with open(self.csv_file, mode='r', newline='', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                for row in reader:
-                    if row['title'].lower() != book.title.lower():
-                        updated_books.append(row)
-
-            Helpers.rewrite_csv(self.csv_file, updated_books)
-            self.library = Helpers.read_csv_as_dict(self.csv_file)
+            with self.lock.exclusive():
+                self.refresh_library()
+                # Highest position first so the remaining positions stay valid while replaying
+                for position in reversed(self.index.find_title(book.title)):
+                    self.journal.record_delete(position, self.library[position]['title'])
+                    self.reading_cache.invalidate(self.library[position])
+                    self.library.pop(position)
+                self.index.rebuild(self.library)
+                self.search_index.rebuild(self.library)
+                self.library_changed()
+                self.save_journaled_changes()
         except Exception as e:
             print(f"Error deleting book from CSV file: {e}")
 
+    # The lookups read self.library before the index, so a library not loaded yet is loaded and indexed first
+
     def find_book_by_title(self, title):
-        for index, book in enumerate(self.library):
-            if book['title'].lower() == title.lower():
-                return index, book
-        return None, None
+        library = self.library
+        positions = self.index.find_title(title)
+        if not positions:
+            return None, None
+        return positions[0], library[positions[0]]
+
+    def find_books_by_author(self, author):
+        library = self.library
+        return [library[position] for position in self.index.find_author(author)]
+
+    def find_book_by_isbn(self, isbn):
+        library = self.library
+        positions = self.index.find_isbn(isbn) or self.index.find_isbn13(isbn)
+        return library[positions[0]] if positions else None
+
+    def find_books_by_title_prefix(self, prefix):
+        library = self.library
+        return [library[position] for position in self.index.find_title_prefix(prefix)]
+
+    def search_books(self, query, limit=10):
+        """
+        Full-text search over titles, authors, publishers and genres (see SearchIndex)
+
+        Args:
+            query (str): Words to look for; prefixes and small typos also match
+            limit (int): Maximum number of results
+
+        Returns:
+            list: (book, score) pairs, best match first
+        """
+        library = self.library
+        return [(library[position], score) for position, score in self.search_index.search(query, limit)]
 
     def edit_book_details(self, book):
         book_details = [
@@ -239,7 +555,7 @@ class MyLibraryManager:
                     date_read = input("Invalid date. Please use YYYY-MM-DD format: ")
             else:
                 date_read = ""
-            book['read'] = new_read
+            book['read'] = str(new_read)  # keep the in-memory row in the same string form the CSV gives back
             book['date_read'] = date_read
 
         elif choice == "2":
@@ -260,8 +576,25 @@ class MyLibraryManager:
         return "edit"
 
     def update_csv_file(self):
-        Helpers.rewrite_csv(self.csv_file, self.library)
-        self.library = Helpers.read_csv_as_dict(self.csv_file)
+        """
+        Rewrites the whole CSV from the in-memory library and clears the change journal
+
+        Raises:
+            LibraryConflictError: If another process wrote the library since we last read it
+        """
+        with self.lock.exclusive():
+            self.check_unchanged()
+            self.journal.compact(self.library)
+            self.mark_library_written()
+
+    def save_journaled_changes(self):
+        """
+        Called, under the exclusive lock, after changes were logged to the journal. Folds the journal
+        into the CSV once it is too big
+        """
+        self.mark_library_written()
+        if self.journal.needs_compaction():
+            self.update_csv_file()
 
     def edit_book(self):
         edit_title = input("Enter book title you would like to edit: ")
@@ -271,15 +604,158 @@ class MyLibraryManager:
             print(f"Book titled '{edit_title}' not found in the library.\n")
             return
 
+        old_book = dict(book)
         action = self.edit_book_details(book)
+        if action not in ("delete", "edit"):
+            return
+
+        try:
+            with self.menu_section("3"), self.lock.exclusive():
+                self.check_unchanged()  # the user may have taken a while, someone else may have written since
+                if action == "delete":
+                    title = self.delete_book_at(index)
+                else:
+                    self.record_book_edit(index, old_book)
+                self.save_journaled_changes()
+        except LibraryConflictError as e:
+            print(e)
+            return
 
         if action == "delete":
-            self.library.pop(index)
-            print(f"'{book['title']}' has been deleted from your library.")
-        elif action == "edit":
+            print(f"'{title}' has been deleted from your library.")
+        else:
             print(f"Changes to '{book['title']}' have been saved.\n")
 
-        self.update_csv_file()
+    def delete_book_at(self, index):
+        """
+        Removes the book at index from the library and journals the deletion
+
+        Returns:
+            str: The title of the deleted book
+        """
+        book = self.library[index]
+        title = book['title']
+        self.journal.record_delete(index, title)
+        self.reading_cache.invalidate(book)
+        self.library.pop(index)
+        self.index.rebuild(self.library)
+        self.search_index.rebuild(self.library)
+        self.library_changed()
+        return title
+
+    def record_book_edit(self, index, old_book):
+        """
+        Journals the fields of the book at index that differ from old_book (its values before the edit)
+        """
+        book = self.library[index]
+        changes = {field: value for field, value in book.items() if old_book.get(field) != value}
+        if changes:
+            self.journal.record_edit(index, old_book['title'], changes)
+        if ReadingTimeCache.fingerprint(old_book) != ReadingTimeCache.fingerprint(book):
+            self.reading_cache.invalidate(old_book)
+        self.index.update(index, old_book, book)
+        self.search_index.update(index, old_book, book)
+        self.library_changed()
+
+    def edit_book_fields(self, title, changes, expect_unchanged=False):
+        """
+        Edits a book without any prompts
+
+        Args:
+            title (str): Title of the book to edit (the first match is edited)
+            changes (dict): New values for CSV fields, e.g. {'read': 'True', 'date_read': '2024-05-01'}
+            expect_unchanged (bool): Optimistic mode for read-modify-write updates: instead of picking up
+                outside changes first, fail if the library changed on disk since we last read it
+
+        Returns:
+            dict: The edited book row, or None if no book has that title
+
+        Raises:
+            ValueError: If a field is unknown or the edited book would not pass validation
+            LibraryConflictError: In optimistic mode, if another process wrote the library in between
+        """
+        unknown = [field for field in changes if field not in CSV_FIELDS]
+        if unknown:
+            raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+        with self.lock.exclusive():
+            if expect_unchanged:
+                self.check_unchanged()
+            else:
+                self.refresh_library()
+            return self._edit_book_fields(title, changes)
+
+    def _edit_book_fields(self, title, changes):
+        index, book = self.find_book_by_title(title)
+        if book is None:
+            return None
+
+        old_book = dict(book)
+        edited = dict(old_book)
+        edited.update({field: "" if value is None else str(value) for field, value in changes.items()})
+        normalized = Validation.normalize_row(edited)
+        for field in changes:  # fields the user did not touch are saved exactly as they were
+            edited[field] = normalized[field]
+        errors = Validation.book_errors(edited)
+        # Rows already in the library are only held to the rules for the fields being changed
+        errors = [error for error in errors if error not in Validation.book_errors(old_book)]
+        if errors:
+            raise ValueError(" ".join(errors))
+
+        for field, value in edited.items():
+            if old_book.get(field) != value:
+                book[field] = value
+        self.record_book_edit(index, old_book)
+        self.save_journaled_changes()
+        return book
+
+    def delete_book(self, title):
+        """
+        Deletes the first book with the given title without any prompts
+
+        Returns:
+            bool: True if a book was deleted
+        """
+        with self.lock.exclusive():
+            self.refresh_library()
+            index, book = self.find_book_by_title(title)
+            if book is None:
+                return False
+            self.delete_book_at(index)
+            self.save_journaled_changes()
+        return True
+
+    def sort_library(self, sort_fields):
+        """
+        Sorts the library by sort_fields (see Sorting.typed_merge_sort) and saves it to the CSV file
+
+        Raises:
+            ValueError: If sort_fields is empty or names a field that is not a CSV field
+        """
+        if not sort_fields or any(field.lstrip('-') not in CSV_FIELDS for field in sort_fields):
+            raise ValueError(f"Sort fields must be among: {', '.join(CSV_FIELDS)}")
+        with self.lock.exclusive():
+            self.refresh_library()
+            sorted_books = Sorting.typed_merge_sort(self.library, sort_fields)
+            self.set_library(sorted_books)
+            self.update_csv_file()
+
+    def normalize_isbns(self):
+        """
+        Restores ISBN-13s that a spreadsheet saved in scientific notation (9.78163E+12) from the
+        books' ISBN-10s (see Validation.normalize_isbn13) and saves the library if any changed.
+        Only done on request, so loading and saving never change stored values on their own
+
+        Returns:
+            list: (title, old ISBN-13, restored ISBN-13) for every book changed
+        """
+        with self.lock.exclusive():
+            self.refresh_library()
+            changed = Validation.normalize_library(self.library)
+            if changed:
+                self.set_library(self.library)  # re-index the restored ISBNs
+                self.update_csv_file()
+        return [(self.library[position]['title'], old, self.library[position]['isbn13'])
+                for position, old in changed]
 
     def make_sorting_choice(self):
         print("This option allows you to sort and save your CSV file how you want your books sorted")
@@ -287,33 +763,46 @@ class MyLibraryManager:
         print("1: By Author Last Name, First Name + Title")
         print("2: Year Published + Title")
         print("3: Average Rating + Title")
-        sort_choice = input("Please select how you would like to sort: (1, 2, 3): ")
+        print("4: Custom fields (e.g. -avg_rating, year_published, title)")
+        sort_choice = input("Please select how you would like to sort: (1, 2, 3, 4): ")
         if sort_choice == "1":
             sorting_by = ['author_last_first', 'title']
         elif sort_choice == "2":
             sorting_by = ['year_published', 'title']
         elif sort_choice == "3":
             sorting_by = ['avg_rating', 'title']
+        elif sort_choice == "4":
+            print("Available fields: " + ", ".join(CSV_FIELDS))
+            print("Prefix a field with '-' to sort it in descending order")
+            fields = input("Fields to sort by, separated by commas: ")
+            sorting_by = [field.strip() for field in fields.split(",") if field.strip()]
+            if not sorting_by or any(field.lstrip('-') not in CSV_FIELDS for field in sorting_by):
+                sorting_by = "Fail"
+                print("\nInvalid fields. Please try again.")
         else:
             sorting_by = "Fail"
             print("\nInvalid choice. Please try again.")
         return sorting_by
     
-    def get_optimized_time(self, book, pages_per_hour, memo):
+    def get_optimized_time(self, book, pages_per_hour, memo=None):
         """
-        PRECONDITION: book is a dictionary containing book details, pages_per_hour is a float, memo is a dictionary
+        PRECONDITION: book is a dictionary containing book details, pages_per_hour is a float, memo is a dictionary or None
         RETURNS: hours_for_book
         POST1: hours_for_book is the time required to read the book
-        POST2: memo is updated with the calculated time for the book
+        POST2: memo (or the manager's ReadingTimeCache when memo is None) holds the calculated time for the book
 
         Args:
             book (dict): A dictionary containing book details
             pages_per_hour (float): The reading speed in pages per hour
-            memo (dict): A dictionary to store the calculated time for each book
+            memo (dict): A dictionary to store the calculated time for each book. By default the
+                reading cache shared across calls is used
 
         Returns:
             float: The time required to read the book
         """
+        if memo is None:
+            return self.reading_cache.get_hours(book, pages_per_hour)
+
         book_id = (book.get('title'), book.get('author_first_last'))  # Using title and author as a unique identifier
         if book_id in memo:
             return memo[book_id]
@@ -328,7 +817,8 @@ class MyLibraryManager:
         PRECONDITION: books is a list of dictionaries containing book details, pages_per_hour is a float
         RETURNS: total_hours
         POST1: total_hours is the total time required to read all books in the list
-        POST2: memo is updated with the calculated time for each book
+        POST2: the reading cache holds the calculated time for each book, so asking again at the
+        same speed only recomputes books whose num_pages or read status changed
 
         Args:
             books (list): A list of dictionaries containing book details
@@ -338,9 +828,8 @@ class MyLibraryManager:
             float: The total time required to read all books in the list
         """
         total_hours = 0
-        memo = {}
         for book in books:
-            total_hours += self.get_optimized_time(book, pages_per_hour, memo)
+            total_hours += self.get_optimized_time(book, pages_per_hour)
         return total_hours
 
     def estimate_reading_time(self, pages_per_hour):
@@ -352,26 +841,56 @@ class MyLibraryManager:
         Args:
             pages_per_hour (float): The reading speed in pages per hour
         """
-        unread_books = [book for book in self.library if not book.get('read', 'False').lower() == 'true']
+        unread_books = StreamingStats.iter_unread(self.library)
         total_hours = self.get_total_hours(unread_books, pages_per_hour)
         print(f"Estimated time to read all unread books: {total_hours:.2f} hours")
 
+    def estimate_reading_times(self, speeds):
+        """
+        PRECONDITION: speeds is a list of positive floats
+        RETURNS: None
+        POST1: Prints the estimated time to read all unread books at each reading speed
 
-    def augment_greedily(self, books, a_part_solution, hours_available):
-        '''
-        INTENT: Add a book to a_part_solution
+        Args:
+            speeds (list): Reading speeds in pages per hour
+        """
+        totals = self.what_if.total_hours(self.library, speeds)
+        table_data = [[f"{speed:g}", f"{hours:.2f}"] for speed, hours in zip(speeds, totals)]
+        print(tabulate(table_data, headers=["Pages/hour", "Hours for all unread"], tablefmt="pretty"))
 
-        PRECONDITIONS: As for those for schedule_from() below
+    def what_if_plans(self, speeds, budgets, show=True):
+        """
+        Greedy reading plans for every combination of reading speed and hours available,
+        computed together in one pass over the unread books (see WhatIfPlanner)
+
+        Args:
+            speeds (list): Reading speeds in pages per hour
+            budgets (list): Hours available to read
+            show (bool): Print the plans as a table
+
+        Returns:
+            list: One dict per (speed, budget) pair, see WhatIfPlanner.plan
+        """
+        plans = self.what_if.plan(self.library, speeds, budgets)
+        if show:
+            print(tabulate(WhatIfPlanner.table_rows(plans), headers=WhatIfPlanner.TABLE_HEADERS, tablefmt="pretty"))
+        return plans
+
+    def reading_summary(self, pages_per_hour, csv_file=None):
+        """
+        Unread counts, reading time and shelf counts in a single pass
+
+        Args:
+            pages_per_hour (float): The reading speed in pages per hour
+            csv_file (str): Stream this CSV file (e.g. a large export) instead of the loaded library
+
+        Returns:
+            dict: See StreamingStats.reading_summary
+        """
+        if csv_file is not None:
+            return StreamingStats.summarize_csv(csv_file, pages_per_hour)
+        return StreamingStats.reading_summary(self.library, pages_per_hour)
 
-        RETURNS a_part_solution
-        '''
-        # Append first disjoint book (in the given book order)--if it exists
-        for book in range(a_part_solution[-1] + 1 if a_part_solution else 0, len(books)):
-            if books[book]['hours'] <= hours_available:
-                a_part_solution.append(book)
-                hours_available -= books[book]['hours']
-                break
-        return a_part_solution, hours_available  # unchanged if nothing to append
 
     def schedule_from(self, books, hours_available):
         '''
@@ -384,22 +903,16 @@ class MyLibraryManager:
         RETURNS book_schedule
         POSTCONDITION: MeetsIORelationship(books, book_schedule)
         '''
-        book_schedule = []  # solutions begin with an empty list
-
-        # Augment book_schedule as many times as possible; save old_ for comparison
-        old_books, book_schedule, hours_available = \
-            book_schedule.copy(), *self.augment_greedily(books, book_schedule, hours_available)
-        while book_schedule != old_books:  # augmentation occurred; do again
-            old_books, book_schedule, hours_available = \
-                book_schedule.copy(), *self.augment_greedily(books, book_schedule, hours_available)
-
-        return [books[i] for i in book_schedule]
+        # One pass: a book skipped because it did not fit can never fit later, hours only go down
+        hours = [book['hours'] for book in books]
+        return [books[i] for i in ReadingScheduler.greedy_pass(hours, hours_available)]
 
     def maximize_books_by_value(self):
         """
         PRECONDITION: pages_per_hour is a float, hours_available is a float
         RETURNS: None
         POST1: Prints the list of books that can be read within the given time frame based on value per hour
+        POST2: Prints the total value achieved next to the optimum (or its upper bound for greedy mode)
 
         Args:
             pages_per_hour (float): The reading speed in pages per hour
@@ -407,29 +920,82 @@ class MyLibraryManager:
         """
         pages_per_hour = float(input("Enter your reading speed (pages per hour): "))
         hours_available = float(input("Enter the number of hours you have available to read: "))
-        unread_books = [book for book in self.library if not book.get('read', 'False').lower() == 'true']
-
-        # Calculate reading time and value per hour for each book
-        for book in unread_books:
-            book['hours'] = int(book['num_pages']) / pages_per_hour
-            book['value_per_hour'] = float(book['avg_rating']) / book['hours']
-
-        # Sort books by value per hour in descending order
-        unread_books.sort(key=lambda x: x['value_per_hour'], reverse=True)
-
-        books_to_read = self.schedule_from(unread_books, hours_available)
+        mode = input("Scheduling mode - greedy, exact or bnb (press Enter for greedy): ").strip().lower() or "greedy"
+        while mode not in ReadingScheduler.MODES:
+            mode = input("Invalid mode. Please enter greedy, exact or bnb: ").strip().lower()
+        with self.menu_section("8"):
+            result = self.plan_reading(pages_per_hour, hours_available, mode)
 
         # Prepare data for tabulate
         table_data = [
-            [book['title'], book['author_first_last'], book['avg_rating'], book['num_pages'], f"{book['hours']:.2f}"]
-            for book in books_to_read
+            [book['title'], book['author_first_last'], book['avg_rating'], book['num_pages'], f"{hours:.2f}"]
+            for book, hours in zip(result['books'], result['hours'])
         ]
         headers = ["Title", "Author", "Rating", "Pages", "Hours"]
 
         print("\n")
         print("Suggested order of books to read in the available time (based on value per hour):")
         print(tabulate(table_data, headers=headers, tablefmt="pretty"))
-     
+        print(f"Total value (sum of average ratings): {result['value']:.2f} in {result['hours_used']:.2f} hours")
+        if result['optimum']:
+            print(f"Optimum: {result['optimum']:.2f} ({result['value'] / result['optimum']:.1%} of optimum)")
+        elif result['upper_bound']:
+            print(f"Upper bound on the optimum: {result['upper_bound']:.2f} "
+                  f"(at least {result['value'] / result['upper_bound']:.1%} of optimum)")
+
+    def plan_reading(self, pages_per_hour, hours_available, mode="greedy"):
+        """
+        Schedules unread books for the hours available without any prompts
+
+        Returns:
+            dict: See ReadingScheduler.schedule
+        """
+        unread_books = list(StreamingStats.iter_unread(self.library))
+        hours_for = lambda book: self.reading_cache.get_hours(book, pages_per_hour)
+        return self.scheduler.schedule(unread_books, pages_per_hour, hours_available, mode, hours_for)
+
+    def cluster_books(self, num_clusters, method=None, workers=None):
+        """
+        Clusters the whole library without any prompts
+
+        Args:
+            num_clusters (int): The desired number of clusters, capped at the number of books
+            method (str): "linkage" or "prim", defaults to the engine's method
+            workers (int): Cluster each genre in a pool of this many processes when > 1
+
+        Returns:
+            list: List of clusters, each cluster is a list of book rows
+        """
+        books = self.library
+        num_clusters = min(num_clusters, len(books))
+        clusters = self.cluster_engine.apply_greedy(books, num_clusters, method, workers)
+        return [[books[book_index] for book_index in cluster] for cluster in clusters]
+
+    def similar_books(self, titles, k=5):
+        """
+        Finds the k books most similar to each title (same metric as the clustering, see SimilarityIndex)
+
+        Args:
+            titles (list): Titles of the books to query, the first match of each is used
+            k (int): Number of similar books per title
+
+        Returns:
+            dict: title -> list of (book, similarity) pairs, most similar first, or None if the
+            title is not in the library
+        """
+        if self.similarity_version != self.library_version:
+            self.similarity_index.rebuild(self.library)
+            self.similarity_version = self.library_version
+        results = {}
+        for title in titles:
+            position, book = self.find_book_by_title(title)
+            if book is None:
+                results[title] = None
+                continue
+            results[title] = [(self.library[other], similarity) for other, similarity
+                              in self.similarity_index.similar_to(book, k, exclude=position)]
+        return results
+
     def cluster_books_by_similarity(self):
         """
         Cluster books by similarity using MST and a greedy approach.
@@ -448,62 +1014,74 @@ class MyLibraryManager:
         print(f"Number of clusters: {num_clusters}")
         print(f"Number of books: {len(books)}")
 
-        clusters = self.mst_clustering.apply_greedy(books, num_clusters)
+        with self.menu_section("9"):
+            clusters = self.cluster_books(num_clusters)
 
         for idx, cluster in enumerate(clusters):
             print(f"\nCluster {idx + 1}:")
-            for book_index in cluster:
-                book = books[book_index]
+            for book in cluster:
                 print(f" - {book['title']} by {book['author_first_last']} (Rating: {book['avg_rating']}, Genre: {book['genre']})")
 
 
+    MENU_OPTIONS = {
+        "1": "View Books",
+        "2": "Add a Book",
+        "3": "Edit Book",
+        "4": "Sort Books",
+        "5": "Print Sorted Bookshelves",
+        "6": "Delete Library",
+        "7": "Estimate Total Reading Time for Unread Books",
+        "8": "Calculate the maximum high value books I can read within a certain time",
+        "9": "Cluster Books by Similarity",
+        "10": "Exit",
+    }
+
     def menu(self):
         while True:
             print("\n--- Library Manager ---")
-            print("1. View Books")
-            print("2. Add a Book")
-            print("3. Edit Book")
-            print("4. Sort Books")
-            print("5. Print Sorted Bookshelves")
-            print("6. Delete Library")
-            print("7. Estimate Total Reading Time for Unread Books")
-            print("8. Calculate the maximum high value books I can read within a certain time")
-            print("9. Cluster Books by Similarity")
-            print("10. Exit")
+            for option, label in self.MENU_OPTIONS.items():
+                print(f"{option}. {label}")
             print("-----------------------\n")
             choice = input("Select an option (1/2/3/4/5/6/7/8/9/10): ").strip()
 
+            # Operations time their own work with menu_section once their prompts are answered
             if choice == "1":
-                self.view_books()
+                self.page_through(self.view_books, len(self.library), choice)
 
             elif choice == "2":
                 self.add_book()
-                self.library = Helpers.read_csv_as_dict(self.csv_file)
+                self.refresh_library()
 
             elif choice == "3":
                 self.edit_book()
-                self.library = Helpers.read_csv_as_dict(self.csv_file)
+                self.refresh_library()
 
             elif choice == "4":
                 sorting_by = self.make_sorting_choice()
                 while sorting_by == "Fail":
                     sorting_by = self.make_sorting_choice()
 
-                books = Helpers.read_csv_as_dict(self.csv_file)
-                sorted_books = Sorting.merge_sort(books, sorting_by)
-                Helpers.rewrite_csv(self.csv_file, sorted_books)
-                self.library = Helpers.read_csv_as_dict(self.csv_file)
+                with self.menu_section(choice):
+                    self.sort_library(sorting_by)
 
             elif choice == "5":
-                Sorting.print_sorted_bookshelves(self.library)
+                with self.menu_section(choice):
+                    buckets = self.shelf_cache.get(self.library, self.library_version)
+                self.page_through(functools.partial(Sorting.print_sorted_bookshelves, self.library, buckets),
+                                  max(map(len, buckets.values()), default=0), choice)
 
             elif choice == "6":
                 self.delete_library()
-                self.library = Helpers.read_csv_as_dict(self.csv_file)
+                self.refresh_library()
 
             elif choice == "7":
-                pages_per_hour = float(input("Enter your average reading speed (pages per hour): "))
-                self.estimate_reading_time(pages_per_hour)
+                answer = input("Enter your average reading speed (pages per hour, or several separated by commas): ")
+                speeds = [float(speed) for speed in answer.split(",") if speed.strip()]
+                with self.menu_section(choice):
+                    if len(speeds) == 1:
+                        self.estimate_reading_time(speeds[0])
+                    else:
+                        self.estimate_reading_times(speeds)
 
             elif choice == "8":
                 self.maximize_books_by_value()
@@ -512,13 +1090,42 @@ class MyLibraryManager:
                 self.cluster_books_by_similarity()
 
             elif choice == "10":
+                with self.menu_section(choice):
+                    self.search_index.save()
                 print("Goodbye!")
                 break
 
             else:
                 print("Invalid choice. Please try again.")
 
+            self.warn_once_about_invalid_books()
+
+    def menu_section(self, choice):
+        """
+        Profiler section timing the work of a menu choice (see profiling.py). Opened only once the
+        choice's prompts are answered, so the time spent typing is not counted
+
+        Args:
+            choice (str): Key of MENU_OPTIONS, None for work that is not timed
+        """
+        if choice is None:
+            return NULL_SECTION
+        return profiler.section(f"menu: {self.MENU_OPTIONS[choice]}")
+
+    def warn_once_about_invalid_books(self):
+        """
+        Prints validation_warning after the first menu operation that loaded the library, so the check
+        runs once the user already has their first answer rather than before the menu appears
+        """
+        if self.validation_warned or self._library is None:
+            return
+        self.validation_warned = True
+        warning = self.validation_warning()
+        if warning:
+            print(warning)
+
 def main():
+    Profiler.from_environment()
     m = MyLibraryManager()
     m.menu()
 
@@ -0,0 +1,44 @@
+"""
+Scaling benchmark for DisjointSet
+
+Runs n random unions followed by a find on every element for growing n and prints the time
+per operation. With path halving and union by size the per-operation cost should stay
+roughly flat as n grows (near-linear total time).
+
+    python benchmarks/bench_disjoint_set.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from disjoint_set import DisjointSet
+
+
+def time_operations(n, seed=0):
+    rng = random.Random(seed)
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(n)]
+    # A long chain is the worst case for the old recursive find
+    chain = [(i, i + 1) for i in range(n - 1)]
+
+    start = time.perf_counter()
+    components = DisjointSet(n)
+    components.union_many(chain)
+    components.union_many(pairs)
+    components.find_many(range(n))
+    return time.perf_counter() - start
+
+
+def main():
+    sizes = [10_000, 100_000, 1_000_000]
+    print(f"{'n':>10} {'seconds':>10} {'ns/op':>10}")
+    for n in sizes:
+        seconds = time_operations(n)
+        operations = 3 * n
+        print(f"{n:>10} {seconds:>10.3f} {seconds / operations * 1e9:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
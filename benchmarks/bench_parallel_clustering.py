@@ -0,0 +1,72 @@
+"""
+Cross-check and benchmark for genre-parallel clustering (ClusterEngine with workers > 1)
+
+Checks that the per-genre process pool gives exactly the MST and clusters of the serial engines
+on libraries with coarse ratings (many ties), then times both engines serially and with growing
+worker counts. The largest genre bounds the speed-up: with G equal genres and at least G cores
+the per-genre work drops G-fold, but encoding the books, the cross-genre edges and the final
+Kruskal pass stay serial.
+
+    python benchmarks/bench_parallel_clustering.py [--workers 2 4 8]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from cluster_engine import ClusterEngine
+
+
+def make_library(n, genres, rng):
+    return [{'title': f"Book {i}", 'genre': f"Genre {rng.randrange(genres)}",
+             'avg_rating': f"{rng.randint(0, 50) / 10:.2f}"} for i in range(n)]
+
+
+def cross_check(engine, rng, workers):
+    checked = 0
+    for n, genres in [(2, 2), (40, 3), (300, 5), (3000, 16)]:
+        library = make_library(n, genres, rng)
+        for method in ("linkage", "prim"):
+            serial = engine.build_mst(library, method)
+            if engine.build_mst(library, method, workers) != serial:
+                raise AssertionError(f"n={n} method={method}: the parallel MST differs")
+            for k in (1, 4, n):
+                expected = engine.clusters_from_mst(serial, n, k)
+                if engine.apply_greedy(library, k, method, workers) != expected:
+                    raise AssertionError(f"n={n} method={method} k={k}: the parallel clusters differ")
+                checked += 1
+    return checked
+
+
+def timed(engine, library, method, workers):
+    start = time.perf_counter()
+    engine.apply_greedy(library, 10, method, workers)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, nargs="+", default=[2, 4, os.cpu_count() or 1])
+    parser.add_argument("--genres", type=int, default=16)
+    args = parser.parse_args()
+    worker_counts = sorted({workers for workers in args.workers if workers > 1})
+
+    rng = random.Random(0)
+    engine = ClusterEngine()
+    print(f"{cross_check(engine, rng, max(worker_counts or [2]))} parallel clusterings match the serial engines")
+    print(f"{os.cpu_count()} CPU cores, {args.genres} genres")
+    print(f"{'method':>8} {'n':>9} {'serial s':>9}" + "".join(f" {f'{workers} workers':>10}" for workers in worker_counts))
+    for method, sizes in [("prim", [4_000, 16_000]), ("linkage", [100_000, 1_000_000])]:
+        for n in sizes:
+            library = make_library(n, args.genres, rng)
+            row = f"{method:>8} {n:>9} {timed(engine, library, method, None):>9.3f}"
+            for workers in worker_counts:
+                row += f" {timed(engine, library, method, workers):>10.3f}"
+            print(row)
+
+
+if __name__ == "__main__":
+    main()
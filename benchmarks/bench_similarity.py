@@ -0,0 +1,67 @@
+"""
+Cross-check and benchmark for SimilarityIndex
+
+Builds synthetic libraries with few genres and coarse ratings (so there are many ties), checks
+every top-k answer of SimilarityIndex.similar_to against SimilarityIndex.brute_force, which scores
+all books with MSTClustering.calculate_similarity, and then times batch queries for growing n.
+
+    python benchmarks/bench_similarity.py
+"""
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from similarity_index import SimilarityIndex
+
+
+def make_library(n, genres, rng):
+    return [{'title': f"Book {i}", 'genre': f"Genre {rng.randrange(genres)}",
+             'avg_rating': f"{rng.randint(0, 50) / 10:.2f}" if rng.random() > 0.01 else ""}
+            for i in range(n)]
+
+
+def cross_check(rng):
+    checked = 0
+    for n, genres in [(1, 1), (5, 3), (50, 2), (300, 4), (2000, 12)]:
+        library = make_library(n, genres, rng)
+        index = SimilarityIndex(library)
+        for position in range(min(n, 300)):
+            if index.rating(library[position]) is None:
+                continue
+            for k in (1, 3, 10, n):
+                expected = index.brute_force(library[position], k, exclude=position)
+                actual = index.similar_to(library[position], k, exclude=position)
+                if actual != expected:
+                    raise AssertionError(f"n={n} position={position} k={k}: {actual[:5]} != {expected[:5]}")
+                checked += 1
+    return checked
+
+
+def main():
+    rng = random.Random(0)
+    print(f"{cross_check(rng)} queries match the brute-force scores")
+    print(f"{'n':>10} {'build s':>10} {'us/query':>10} {'brute us/query':>15}")
+    for n in [10_000, 100_000, 1_000_000]:
+        library = make_library(n, 40, rng)
+        start = time.perf_counter()
+        index = SimilarityIndex(library)
+        build = time.perf_counter() - start
+
+        positions = [rng.randrange(n) for _ in range(2000)]
+        positions = [position for position in positions if index.rating(library[position]) is not None]
+        start = time.perf_counter()
+        index.similar_to_many(positions, 10)
+        per_query = (time.perf_counter() - start) / len(positions)
+
+        start = time.perf_counter()
+        for position in positions[:5]:
+            index.brute_force(library[position], 10, exclude=position)
+        brute = (time.perf_counter() - start) / 5
+        print(f"{n:>10} {build:>10.3f} {per_query * 1e6:>10.1f} {brute * 1e6:>15.0f}")
+
+
+if __name__ == "__main__":
+    main()
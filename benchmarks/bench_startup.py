@@ -0,0 +1,146 @@
+"""
+Cold-start benchmark for the menu and the CLI, with an import-time report
+
+    python benchmarks/bench_startup.py [--runs 20] [--target-ms 50] [--top 15] [--load-rows 200000]
+
+Measures, as the median of --runs fresh processes:
+
+    interpreter      python -c pass, the floor nothing can go below
+    menu prompt      python MyLibraryManager.py until "Select an option" is printed
+    cli search       python cli.py search ... on a copy of data/books.csv, start to exit
+
+then the first access to the library on a synthetic library of --load-rows books (best of
+--load-runs, 0 rows to skip):
+
+    parse CSV        MyLibraryManager(use_snapshot=False), the rows parsed from the CSV
+    rows snapshot    the default layout loaded from its snapshot (Snapshot.pack_rows)
+    columnar         MyLibraryManager(columnar=True) loaded from its snapshot
+
+and lists the modules that take longest to import (python -X importtime). Exits with status 1
+if the menu prompt takes longer than --target-ms.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def time_process(command, until=None, stdin_text=None):
+    env = dict(os.environ, PYTHONUNBUFFERED="1")
+    start = time.perf_counter()
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                               stderr=subprocess.DEVNULL)
+    if until is None:
+        process.communicate(stdin_text)
+        return time.perf_counter() - start
+    seen = b""
+    while until not in seen:
+        chunk = process.stdout.read1(4096)
+        if not chunk:
+            raise RuntimeError(f"{' '.join(command)} exited before printing {until!r}")
+        seen += chunk
+    elapsed = time.perf_counter() - start
+    process.communicate(stdin_text)
+    return elapsed
+
+
+def median_ms(runs, *args, **kwargs):
+    time_process(*args, **kwargs)  # warm the file system cache and the .pyc files
+    return statistics.median(time_process(*args, **kwargs) for _ in range(runs)) * 1000
+
+
+def load_times(rows, runs):
+    """
+    Returns:
+        list: (label, best seconds, snapshot bytes) for each way of loading a library of rows books
+    """
+    from MyLibraryManager import MyLibraryManager
+    from snapshot import Snapshot
+    from synthetic_library import write_library
+
+    directory = tempfile.mkdtemp(prefix="library-load-")
+    try:
+        csv_file = os.path.join(directory, "books.csv")
+        write_library(csv_file, rows, seed=1)
+        results = []
+        for label, options in [("parse CSV", {"use_snapshot": False}), ("rows snapshot", {}),
+                               ("columnar", {"columnar": True})]:
+            Snapshot.remove(csv_file)
+            MyLibraryManager(csv_file, **options).library  # writes the snapshot when one is used
+            best = None
+            for _ in range(runs):
+                start = time.perf_counter()
+                MyLibraryManager(csv_file, **options).library
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            path = Snapshot.path_for(csv_file)
+            results.append((label, best, os.path.getsize(path) if options.get("use_snapshot", True) else None))
+        return results
+    finally:
+        shutil.rmtree(directory)
+
+
+def import_report(top):
+    """
+    Returns:
+        list: (cumulative microseconds, self microseconds, module) for the slowest imports
+    """
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import MyLibraryManager, cli"],
+                            cwd=ROOT, capture_output=True, text=True)
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        own, cumulative, module = line[len("import time:"):].split("|")
+        rows.append((int(cumulative), int(own), module.rstrip()))
+    return sorted(rows, reverse=True)[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=20)
+    parser.add_argument("--target-ms", type=float, default=50.0)
+    parser.add_argument("--top", type=int, default=15, help="number of imports to list")
+    parser.add_argument("--load-rows", type=int, default=200_000,
+                        help="size of the synthetic library the load times are measured on (0 to skip)")
+    parser.add_argument("--load-runs", type=int, default=3)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="library-startup-")
+    try:
+        csv_file = os.path.join(directory, "books.csv")
+        shutil.copy(os.path.join(ROOT, "data", "books.csv"), csv_file)
+        interpreter = median_ms(args.runs, [sys.executable, "-c", "pass"])
+        prompt = median_ms(args.runs, [sys.executable, "MyLibraryManager.py"], until=b"Select an option",
+                           stdin_text=b"10\n")
+        search = median_ms(args.runs, [sys.executable, "cli.py", "--csv", csv_file, "search", "crows"])
+    finally:
+        shutil.rmtree(directory)
+
+    print(f"{'interpreter':<14} {interpreter:>8.1f} ms")
+    print(f"{'menu prompt':<14} {prompt:>8.1f} ms   (target {args.target_ms:.0f} ms)")
+    print(f"{'cli search':<14} {search:>8.1f} ms")
+    if args.load_rows:
+        print(f"\nLoading {args.load_rows} books:")
+        for label, seconds, size in load_times(args.load_rows, args.load_runs):
+            snapshot = f"   (snapshot {size / (1 << 20):.1f} MB)" if size is not None else ""
+            print(f"{label:<14} {seconds * 1000:>8.1f} ms{snapshot}")
+    print(f"\nSlowest imports (python -X importtime):")
+    print(f"{'cumulative ms':>14} {'self ms':>8}  module")
+    for cumulative, own, module in import_report(args.top):
+        print(f"{cumulative / 1000:>14.1f} {own / 1000:>8.1f}  {module}")
+
+    if prompt > args.target_ms:
+        print(f"\nMenu prompt took {prompt:.1f} ms, over the {args.target_ms:.0f} ms target")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Load generator for library_server.py, reporting latency percentiles
+
+    python benchmarks/loadgen.py [--url 127.0.0.1:8765] [--connections 16] [--requests 20000]
+    python benchmarks/loadgen.py --spawn data/books.csv --repeat 500
+
+With --spawn the server is started on a temporary copy of the given CSV (--repeat copies its
+rows N times, with distinct titles, to make a larger library) and stopped afterwards.
+Every connection is kept alive and sends requests back to back, picked from a mix of
+title searches, prefix searches, shelves, reading plans and summaries; --write-ratio turns
+that share of them into edits (POST /books/edit) that go through the server's writer queue.
+"""
+import argparse
+import asyncio
+import csv
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from urllib.parse import quote
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from helpers import Helpers
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def make_library(source, repeat, directory):
+    rows = Helpers.read_csv_as_dict(source)
+    csv_file = os.path.join(directory, "books.csv")
+    with open(csv_file, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=rows[0].keys())
+        writer.writeheader()
+        for copy in range(repeat):
+            for row in rows:
+                writer.writerow(dict(row, title=row["title"] if copy == 0 else f"{row['title']} ({copy})"))
+    return csv_file, [row["title"] for row in rows]
+
+
+def request_mix(titles, write_ratio, rng):
+    """
+    Returns a function giving the next (method, target, body) to send
+    """
+    gets = [
+        lambda: f"/books?title={quote(rng.choice(titles))}",
+        lambda: f"/books?prefix={quote(rng.choice(titles)[:3])}&limit=20",
+        lambda: "/shelves",
+        lambda: f"/plan?speed={rng.choice([20, 30, 40, 60])}&hours={rng.choice([5, 10, 20])}",
+        lambda: f"/summary?speed={rng.choice([20, 40])}",
+    ]
+
+    def next_request():
+        if rng.random() < write_ratio:
+            body = {"title": rng.choice(titles), "changes": {"my_rating": str(rng.randint(1, 5))}}
+            return "POST", "/books/edit", json.dumps(body).encode()
+        return "GET", rng.choice(gets)(), b""
+    return next_request
+
+
+async def client(host, port, count, next_request, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for _ in range(count):
+            method, target, body = next_request()
+            start = time.perf_counter()
+            writer.write(f"{method} {target} HTTP/1.1\r\nHost: {host}\r\nContent-Length: {len(body)}\r\n\r\n"
+                         .encode("latin-1") + body)
+            await writer.drain()
+            status_line = await reader.readline()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                name, _, value = line.decode("latin-1").partition(":")
+                if name.lower() == "content-length":
+                    length = int(value)
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+            if b" 200 " not in status_line:
+                errors.append(status_line.decode("latin-1").strip())
+    finally:
+        writer.close()
+
+
+def start_server(csv_file):
+    server = subprocess.Popen([sys.executable, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..",
+                                                            "library_server.py"), "--csv", csv_file, "--port", "0"],
+                              stdout=subprocess.PIPE, text=True)
+    banner = server.stdout.readline()  # "Serving N books on http://host:port"
+    if not banner:
+        raise RuntimeError("library_server.py did not start")
+    host, port = banner.rsplit("//", 1)[1].strip().rsplit(":", 1)
+    return server, host, int(port), banner.strip()
+
+
+async def run(host, port, connections, requests, next_request):
+    latencies = []
+    errors = []
+    per_connection = max(1, requests // connections)
+    start = time.perf_counter()
+    await asyncio.gather(*(client(host, port, per_connection, next_request, latencies, errors)
+                           for _ in range(connections)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="127.0.0.1:8765", help="host:port of a running server")
+    parser.add_argument("--spawn", metavar="CSV", help="start a server on a copy of this CSV instead")
+    parser.add_argument("--repeat", type=int, default=1, help="with --spawn, copy the rows this many times")
+    parser.add_argument("--connections", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--write-ratio", type=float, default=0.0, help="share of requests that are edits")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    server = directory = None
+    titles = [row["title"] for row in Helpers.read_csv_as_dict(args.spawn or "data/books.csv")]
+    try:
+        if args.spawn:
+            directory = tempfile.mkdtemp(prefix="library-loadgen-")
+            csv_file, titles = make_library(args.spawn, args.repeat, directory)
+            server, host, port, banner = start_server(csv_file)
+            print(banner)
+        else:
+            host, port = args.url.rsplit(":", 1)
+            port = int(port)
+
+        next_request = request_mix(titles, args.write_ratio, rng)
+        asyncio.run(run(host, port, args.connections, min(args.requests, 200), next_request))  # warm up
+        latencies, errors, elapsed = asyncio.run(run(host, port, args.connections, args.requests, next_request))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+        if directory is not None:
+            shutil.rmtree(directory)
+
+    latencies.sort()
+    print(f"{len(latencies)} requests over {args.connections} connections in {elapsed:.2f}s "
+          f"({len(latencies) / elapsed:.0f} req/s), {len(errors)} errors")
+    print(f"p50 {percentile(latencies, 0.50) * 1000:.3f} ms   p90 {percentile(latencies, 0.90) * 1000:.3f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:.3f} ms   max {latencies[-1] * 1000:.3f} ms")
+    if errors:
+        print(f"first error: {errors[0]}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
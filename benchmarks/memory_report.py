@@ -0,0 +1,51 @@
+"""
+Compares the memory used by the three library layouts
+
+    python benchmarks/memory_report.py [csv_file] [--repeat N]
+
+--repeat copies the rows N times into a temporary CSV first, so the small sample
+library can stand in for a large catalog.
+"""
+import argparse
+import csv
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from columnar_library import ColumnarLibrary
+from helpers import Helpers
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv_file", nargs="?", default="data/books.csv")
+    parser.add_argument("--repeat", type=int, default=1)
+    args = parser.parse_args()
+
+    csv_file = args.csv_file
+    if args.repeat > 1:
+        rows = Helpers.read_csv_as_dict(csv_file)
+        handle, csv_file = tempfile.mkstemp(suffix=".csv")
+        with os.fdopen(handle, "w", newline="", encoding="utf-8") as file:
+            writer = csv.DictWriter(file, fieldnames=rows[0].keys())
+            writer.writeheader()
+            for _ in range(args.repeat):
+                writer.writerows(rows)
+
+    try:
+        report = ColumnarLibrary.memory_report(csv_file)
+    finally:
+        if csv_file != args.csv_file:
+            os.remove(csv_file)
+
+    rows = report.pop("rows")
+    print(f"{rows} books")
+    print(f"{'layout':<14} {'total KB':>10} {'bytes/book':>11}")
+    for layout, used in report.items():
+        print(f"{layout:<14} {used / 1024:>10.1f} {used / max(rows, 1):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
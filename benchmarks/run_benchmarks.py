@@ -0,0 +1,178 @@
+"""
+Times every menu operation on synthetic libraries of growing size
+
+    python benchmarks/run_benchmarks.py [--sizes 1000 10000 100000] [--output results.json]
+    python benchmarks/run_benchmarks.py --baseline results.json [--tolerance 0.5]
+
+For each size a library is generated with synthetic_library.py (same seed, same library) and
+these operations are timed, best of --repeat runs:
+
+    load             MyLibraryManager parsing the CSV (no snapshot)
+    load_snapshot    MyLibraryManager loading from the binary snapshot
+    view             view_books rendering the whole table
+    sort             Sorting.merge_sort by author and title
+    typed_sort       Sorting.typed_merge_sort (menu option 4)
+    shelves          Sorting.bucket_sort_books (menu option 5)
+    reading_estimate estimate_reading_time with a cold reading-time cache (menu option 7)
+    schedule         plan_reading in greedy mode with a cold cache (menu option 8)
+    cluster          cluster_books into 5 clusters (menu option 9)
+
+and, up to --quadratic-limit rows, the quadratic originals they replaced: bubble_sort_books,
+construct_edge_list and MSTClustering.apply_greedy.
+
+A 1M-book run (--sizes 1000000) takes about ten minutes and 2 GB of memory, so it is not a
+default size; benchmarks/baseline.json has an entry for it.
+
+Results are written as JSON. With --baseline, each timing is compared with the same size and
+operation in a saved results file (sizes that were not run are skipped); any that got slower
+than the baseline by more than --tolerance (and by more than --min-delta seconds) is reported
+and the exit status is 1.
+"""
+import argparse
+import contextlib
+import gc
+import io
+import json
+import os
+import platform
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from mst_clustering import MSTClustering
+from MyLibraryManager import MyLibraryManager
+from sorting import Sorting
+from synthetic_library import write_library
+
+QUADRATIC = {"bubble_sort", "edge_list", "mst_clustering"}
+
+
+def operations(csv_file):
+    """
+    Returns:
+        list: (name, setup, run) where setup() returns the argument run is timed with
+    """
+    loaded = {}
+
+    def cold_cache():
+        if "manager" not in loaded:
+            loaded["manager"] = MyLibraryManager(csv_file, use_snapshot=False)
+            loaded["manager"].library  # the library is read on first use
+        manager = loaded["manager"]
+        manager.reading_cache.clear()
+        return manager
+
+    def write_snapshot():
+        MyLibraryManager(csv_file).library  # not returned, so only the timed load holds a library
+
+    books = lambda: list(cold_cache().library)
+    return [
+        ("load", lambda: None, lambda _: MyLibraryManager(csv_file, use_snapshot=False).library),
+        ("load_snapshot", write_snapshot, lambda _: MyLibraryManager(csv_file).library),
+        ("view", cold_cache, lambda m: quiet_call(m.view_books)),
+        ("sort", books, lambda b: Sorting.merge_sort(b, ["author_last_first", "title"])),
+        ("typed_sort", books, lambda b: Sorting.typed_merge_sort(b, ["author_last_first", "title"])),
+        ("shelves", books, Sorting.bucket_sort_books),
+        ("reading_estimate", cold_cache, lambda m: quiet_call(m.estimate_reading_time, 40)),
+        ("schedule", cold_cache, lambda m: m.plan_reading(40, 200)),
+        ("cluster", cold_cache, lambda m: m.cluster_books(5)),
+        ("bubble_sort", books, lambda b: Sorting.bubble_sort_books(b, "author_last_first", "title")),
+        ("edge_list", books, MSTClustering().construct_edge_list),
+        ("mst_clustering", books, lambda b: MSTClustering().apply_greedy(b, 5)),
+    ]
+
+
+def quiet_call(function, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return function(*args)
+
+
+def time_size(rows, seed, repeat, quadratic_limit, only=None):
+    directory = tempfile.mkdtemp(prefix="library-bench-")
+    try:
+        csv_file = os.path.join(directory, "books.csv")
+        write_library(csv_file, rows, seed)
+        timings = {}
+        for name, setup, run in operations(csv_file):
+            if only and name not in only:
+                continue
+            if name in QUADRATIC and rows > quadratic_limit:
+                continue
+            best = None
+            for _ in range(repeat):
+                gc.collect()  # managers hold reference cycles; free the last run's library before the next
+                argument = setup()
+                start = time.perf_counter()
+                run(argument)
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+            print(f"{rows:>9} {name:<17} {best:>10.4f} s", flush=True)
+        return timings
+    finally:
+        shutil.rmtree(directory)
+
+
+def compare(results, baseline, tolerance, min_delta):
+    """
+    Returns:
+        list: (size, operation, baseline seconds, current seconds) for every regression
+    """
+    regressions = []
+    for size, timings in results["results"].items():
+        for name, seconds in timings.items():
+            before = baseline.get("results", {}).get(size, {}).get(name)
+            if before is None:
+                continue
+            if seconds > before * (1 + tolerance) and seconds - before > min_delta:
+                regressions.append((size, name, before, seconds))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10_000, 100_000])
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per operation, the best is kept")
+    parser.add_argument("--only", nargs="+", metavar="OPERATION", help="time only these operations")
+    parser.add_argument("--quadratic-limit", type=int, default=2000,
+                        help="largest library to run the quadratic originals on (default: 2000)")
+    parser.add_argument("--output", default="bench_results.json", help="where to write the results")
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.5,
+                        help="allowed slowdown as a fraction of the baseline (default: 0.5)")
+    parser.add_argument("--min-delta", type=float, default=0.005,
+                        help="ignore slowdowns smaller than this many seconds (default: 0.005)")
+    args = parser.parse_args()
+
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": {},
+    }
+    for rows in args.sizes:
+        results["results"][str(rows)] = time_size(rows, args.seed, args.repeat, args.quadratic_limit, args.only)
+
+    with open(args.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as file:
+            baseline = json.load(file)
+        regressions = compare(results, baseline, args.tolerance, args.min_delta)
+        for size, name, before, seconds in regressions:
+            print(f"REGRESSION {name} at {size} rows: {before:.4f} s -> {seconds:.4f} s "
+                  f"({seconds / before:.1f}x the baseline)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Multi-process stress test for the shared library file
+
+    python benchmarks/stress_concurrency.py [--workers 8] [--ops 200] [--seed 1]
+
+Copies data/books.csv to a temporary directory and lets several processes hammer it at once:
+appending books, incrementing a shared counter book with optimistic read-modify-write
+updates (retrying on LibraryConflictError), deleting their own books, sorting the whole
+library and forcing journal compactions. Afterwards the library is loaded fresh and checked:
+
+- the CSV parses and every row has every column
+- every book that was added and not deleted is there exactly once (no lost appends)
+- the counter equals the number of increments (no lost updates)
+- the journal replayed cleanly (no entry had to be skipped)
+
+Exits with status 1 if any check fails.
+"""
+import argparse
+import contextlib
+import csv
+import io
+import multiprocessing
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from book import CSV_FIELDS
+from file_lock import LibraryConflictError
+from MyLibraryManager import MyLibraryManager
+
+COUNTER_TITLE = "Stress Counter"
+MAX_RETRIES = 1000
+
+
+def new_book(title):
+    return {"title": title, "author_first": "Stress", "author_last": "Test", "binding": "ebook",
+            "num_pages": "100", "year_published": "2024", "age_group": "Adult", "read": "False"}
+
+
+def increment_counter(manager):
+    retries = 0
+    while True:
+        manager.refresh_library()
+        _, book = manager.find_book_by_title(COUNTER_TITLE)
+        value = int(book["num_pages"])
+        try:
+            manager.edit_book_fields(COUNTER_TITLE, {"num_pages": value + 1}, expect_unchanged=True)
+            return retries
+        except LibraryConflictError:
+            retries += 1
+            if retries > MAX_RETRIES:
+                raise RuntimeError(f"counter update still conflicting after {MAX_RETRIES} retries")
+
+
+def worker(csv_file, worker_id, ops, seed, results):
+    counts = {"added": [], "deleted": [], "increments": 0, "retries": 0, "sorts": 0, "compactions": 0, "error": None}
+    try:
+        run_operations(csv_file, worker_id, ops, seed, counts)
+    except Exception as e:  # reported as a failed check instead of hanging the parent
+        counts["error"] = f"{type(e).__name__}: {e}"
+    results.put((worker_id, counts))
+
+
+def run_operations(csv_file, worker_id, ops, seed, counts):
+    rng = random.Random(seed * 1000 + worker_id)
+    with contextlib.redirect_stdout(io.StringIO()):  # the manager reports progress with print()
+        manager = MyLibraryManager(csv_file)
+    manager.journal.threshold = 4096  # compact often so rewrites race with appends and edits
+
+    for op in range(ops):
+        action = rng.random()
+        if action < 0.4:
+            title = f"Stress {worker_id}-{op}"
+            added, rejected = manager.add_books([new_book(title)])
+            if added:
+                counts["added"].append(title)
+        elif action < 0.8:
+            counts["retries"] += increment_counter(manager)
+            counts["increments"] += 1
+        elif action < 0.9 and counts["added"]:
+            title = counts["added"][rng.randrange(len(counts["added"]))]
+            if title not in counts["deleted"] and manager.delete_book(title):
+                counts["deleted"].append(title)
+        elif action < 0.95:
+            manager.sort_library(["-title"] if rng.random() < 0.5 else ["title"])
+            counts["sorts"] += 1
+        else:
+            with manager.lock.exclusive():
+                manager.refresh_library()
+                manager.update_csv_file()
+            counts["compactions"] += 1
+
+
+def check(csv_file, results):
+    problems = [f"worker {worker_id} failed: {counts['error']}" for worker_id, counts in results if counts["error"]]
+    with open(csv_file, newline="", encoding="utf-8") as file:
+        reader = csv.reader(file)
+        header = next(reader)
+        if header != CSV_FIELDS:
+            problems.append(f"unexpected header {header}")
+        for line, row in enumerate(reader, start=2):
+            if len(row) != len(CSV_FIELDS):
+                problems.append(f"line {line} has {len(row)} columns")
+
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        manager = MyLibraryManager(csv_file, use_snapshot=False)
+    if "Skipping" in output.getvalue():
+        problems.append("journal replay skipped entries:\n" + output.getvalue())
+
+    titles = [book["title"] for book in manager.library]
+    expected = set()
+    increments = 0
+    for _, counts in results:
+        expected.update(set(counts["added"]) - set(counts["deleted"]))
+        increments += counts["increments"]
+    present = [title for title in titles if title.startswith("Stress ") and title != COUNTER_TITLE]
+    if sorted(present) != sorted(expected):
+        missing = expected - set(present)
+        extra = [title for title in present if title not in expected or present.count(title) > 1]
+        problems.append(f"{len(missing)} added books missing, {len(extra)} unexpected or duplicated")
+
+    _, counter = manager.find_book_by_title(COUNTER_TITLE)
+    if counter is None or int(counter["num_pages"]) != 1 + increments:
+        problems.append(f"counter is {counter and counter['num_pages']}, expected {1 + increments}")
+    return problems, len(manager.library), increments
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--csv", default="data/books.csv", help="library to start from")
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200, help="operations per worker")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix="library-stress-")
+    csv_file = os.path.join(directory, "books.csv")
+    shutil.copyfile(args.csv, csv_file)
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            MyLibraryManager(csv_file).add_books([dict(new_book(COUNTER_TITLE), num_pages="1")])
+
+        queue = multiprocessing.Queue()
+        processes = [multiprocessing.Process(target=worker, args=(csv_file, worker_id, args.ops, args.seed, queue))
+                     for worker_id in range(args.workers)]
+        start = time.perf_counter()
+        for process in processes:
+            process.start()
+        results = [queue.get(timeout=600) for _ in processes]
+        for process in processes:
+            process.join()
+        elapsed = time.perf_counter() - start
+
+        problems, books, increments = check(csv_file, results)
+        operations = args.workers * args.ops
+        retries = sum(counts["retries"] for _, counts in results)
+        print(f"{args.workers} workers x {args.ops} operations in {elapsed:.2f}s ({operations / elapsed:.0f} ops/s)")
+        print(f"{sum(len(counts['added']) for _, counts in results)} added, "
+              f"{sum(len(counts['deleted']) for _, counts in results)} deleted, "
+              f"{increments} increments ({retries} optimistic retries), "
+              f"{sum(counts['sorts'] for _, counts in results)} sorts, "
+              f"{sum(counts['compactions'] for _, counts in results)} compactions, {books} books at the end")
+        if problems:
+            print("FAILED")
+            for problem in problems:
+                print(f" - {problem}")
+            sys.exit(1)
+        print("OK: no lost or corrupted writes")
+    finally:
+        shutil.rmtree(directory)
+
+
+if __name__ == "__main__":
+    main()
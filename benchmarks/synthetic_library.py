@@ -0,0 +1,141 @@
+"""
+Seeded generator of realistic synthetic libraries
+
+    python benchmarks/synthetic_library.py out.csv --rows 100000 [--seed 1]
+
+Genres, authors and publishers follow Zipf-like distributions (a few bestselling authors and
+big genres, a long tail of rare ones), ratings cluster around 3.9, page counts are log-normal
+and about 40% of the books are read. ISBNs have valid check digits, so every row passes the
+library's validation. The same seed and row count always give the same file.
+"""
+import argparse
+import csv
+import itertools
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from book import CSV_FIELDS
+from validation import Validation
+
+GENRES = [
+    "Fiction", "Fantasy", "Mystery", "Romance", "Science Fiction", "Historical Fiction", "Thriller",
+    "Nonfiction", "Biography", "Horror", "Young Adult", "Classics", "Poetry", "Self Help", "History",
+    "Memoir", "Graphic Novel", "Science", "Philosophy", "Travel",
+]
+BINDINGS = ["Paperback", "Hardcover", "ebook"]
+AGE_GROUPS = ["Adult", "Young Adult", "Children"]
+AGE_GROUP_WEIGHTS = [0.7, 0.2, 0.1]
+FIRST_NAMES = [
+    "Ada", "Leigh", "Eric", "Kate", "Victoria", "Rebecca", "James", "Toni", "Haruki", "Jane", "Mary",
+    "Octavia", "Ursula", "Neil", "Sally", "Colson", "Zadie", "Kazuo", "Chimamanda", "Madeline",
+    "Tana", "George", "Agatha", "Frank", "Isabel", "Donna", "Ocean", "Celeste", "Jesmyn", "Brandon",
+]
+LAST_NAMES = [
+    "Smith", "Bardugo", "Carle", "Chopin", "Schwab", "Ross", "Baldwin", "Morrison", "Murakami",
+    "Austen", "Shelley", "Butler", "Le Guin", "Gaiman", "Rooney", "Whitehead", "Smith", "Ishiguro",
+    "Adichie", "Miller", "French", "Eliot", "Christie", "Herbert", "Allende", "Tartt", "Vuong", "Ng",
+    "Ward", "Sanderson", "Okafor", "Lindqvist", "Moreau", "Tanaka", "Kowalski", "Haddad", "Novak",
+]
+TITLE_WORDS = [
+    "Night", "House", "River", "Crows", "Shadow", "Garden", "Winter", "Secret", "Song", "Stars",
+    "Bone", "Silver", "Ash", "Glass", "Storm", "Kingdom", "Light", "Sea", "Fire", "Memory", "Wolf",
+    "Summer", "City", "Iron", "Daughter", "Queen", "Thief", "Library", "Map", "Clock", "Forest",
+    "Mountain", "Letters", "Hunger", "Caterpillar", "Awakening", "Circus", "Mirror", "Orchard", "Tide",
+]
+TITLE_FORMS = ["The {0} of {1}", "{0} and {1}", "The {0}", "A {0} of {1}", "{0} in the {1}", "The Last {0}"]
+PUBLISHER_WORDS = ["Penguin", "Harper", "Henry Holt", "Orbit", "Tor", "Vintage", "Scholastic", "Knopf",
+                   "Bloomsbury", "Del Rey", "Ace", "Anchor", "Picador", "Faber", "Macmillan", "Simon"]
+
+
+def zipf_weights(count, exponent=1.0):
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+def isbn10(rng):
+    digits = [rng.randrange(10) for _ in range(9)]
+    check = -sum((10 - i) * digit for i, digit in enumerate(digits)) % 11
+    return "".join(map(str, digits)) + ("X" if check == 10 else str(check))
+
+
+def generate_rows(rows, seed=1):
+    """
+    Yields rows books as dictionaries of CSV strings (the same columns as data/books.csv)
+
+    Args:
+        rows (int): Number of books
+        seed (int): Random seed
+
+    Yields:
+        dict: One book
+    """
+    rng = random.Random(seed)
+    author_count = max(10, rows // 20)  # about 20 books per author on average, heavily skewed
+    authors = [(rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)) for _ in range(author_count)]
+    publishers = [f"{word} {suffix}" for word in PUBLISHER_WORDS for suffix in ("Books", "Press", "Publishing")]
+    rng.shuffle(publishers)
+    genre_weights = zipf_weights(len(GENRES))
+    author_weights = zipf_weights(author_count)
+    publisher_weights = zipf_weights(len(publishers))
+    # A favourite genre per author keeps genre and author correlated, as in real libraries
+    author_genres = rng.choices(range(len(GENRES)), cum_weights=genre_weights, k=author_count)
+
+    seen_titles = {}
+    for author_index in rng.choices(range(author_count), cum_weights=author_weights, k=rows):
+        first, last = authors[author_index]
+        genre = GENRES[author_genres[author_index] if rng.random() < 0.8
+                       else rng.choices(range(len(GENRES)), cum_weights=genre_weights)[0]]
+        title = rng.choice(TITLE_FORMS).format(rng.choice(TITLE_WORDS), rng.choice(TITLE_WORDS))
+        copies = seen_titles.get(title, 0)
+        seen_titles[title] = copies + 1
+        if copies:
+            title = f"{title} ({last}, #{copies + 1})"
+
+        read = rng.random() < 0.4
+        year = min(2024, max(1800, int(2024 - rng.expovariate(1 / 25))))
+        isbn = isbn10(rng) if rng.random() < 0.85 else ""
+        yield {
+            "title": title,
+            "author_first_last": f"{first} {last}",
+            "author_last_first": f"{last}, {first}",
+            "isbn": isbn,
+            "isbn13": Validation.isbn10_to_isbn13(isbn) if isbn else "",
+            "my_rating": str(rng.randint(1, 5)) if read and rng.random() < 0.8 else "",
+            "avg_rating": f"{min(5.0, max(1.0, rng.gauss(3.9, 0.35))):.2f}",
+            "publisher": publishers[rng.choices(range(len(publishers)), cum_weights=publisher_weights)[0]],
+            "binding": rng.choice(BINDINGS),
+            "num_pages": str(max(16, int(math.exp(rng.gauss(5.7, 0.45))))),
+            "year_published": str(year),
+            "date_read": f"{rng.randint(max(year, 2000), 2024)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                         if read else "",
+            "genre": genre,
+            "age_group": rng.choices(AGE_GROUPS, AGE_GROUP_WEIGHTS)[0],
+            "read": str(read),
+        }
+
+
+def write_library(csv_file, rows, seed=1):
+    """
+    Writes a synthetic library of rows books to csv_file
+    """
+    with open(csv_file, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        writer.writerows(generate_rows(rows, seed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv_file")
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    write_library(args.csv_file, args.rows, args.seed)
+    print(f"Wrote {args.rows} books to {args.csv_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+import math
+
+CSV_FIELDS = [
+    "title", "author_first_last", "author_last_first", "isbn", "isbn13",
+    "my_rating", "avg_rating", "publisher", "binding", "num_pages",
+    "year_published", "date_read", "genre", "age_group", "read"
+]
+
+
+class Book:
+    """
+    One book in the library
+
+    Uses __slots__ instead of a per-instance dict, and keeps ratings, page count, year and read
+    status as parsed numbers/bools so callers don't have to re-parse the CSV strings.
+    Supports book['field'] and book.get('field') returning the CSV string form, so it can be
+    passed to code written for csv.DictReader rows.
+    """
+    __slots__ = CSV_FIELDS
+
+    FLOAT_FIELDS = ("my_rating", "avg_rating")
+    INT_FIELDS = ("num_pages", "year_published")
+
+    def __init__(self, title, author_first, author_last, isbn, isbn13, my_rating, avg_rating,
+                 publisher, binding, num_pages, year_published, date_read, genre, age_group, read):
+        self.title = title
+        self.author_first_last = f"{author_first} {author_last}".strip()
+        self.author_last_first = f"{author_last}, {author_first}".strip(", ")
+        self.isbn = isbn
+        self.isbn13 = isbn13
+        self.my_rating = Book.parse_float(my_rating)
+        self.avg_rating = Book.parse_float(avg_rating)
+        self.publisher = publisher
+        self.binding = binding
+        self.num_pages = Book.parse_int(num_pages)
+        self.year_published = Book.parse_int(year_published)
+        self.date_read = date_read
+        self.genre = genre
+        self.age_group = age_group
+        self.read = Book.parse_bool(read)
+
+    @staticmethod
+    def parse_float(value):
+        if value is None or value == "":
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            return None
+
+    @staticmethod
+    def parse_int(value):
+        if value is None or value == "":
+            return None
+        try:
+            return int(value)
+        except ValueError:
+            number = Book.parse_float(value)
+            return None if number is None or not math.isfinite(number) else int(number)
+
+    @staticmethod
+    def parse_bool(value):
+        if isinstance(value, bool):
+            return value
+        return str(value).strip().lower() == "true"
+
+    @staticmethod
+    def format_value(value):
+        """
+        Formats a parsed value the way it is written to the CSV file
+        """
+        if value is None:
+            return ""
+        if isinstance(value, float):
+            return format(value, ".15g")
+        return str(value)
+
+    @classmethod
+    def from_row(cls, row):
+        """
+        Creates a Book from a csv.DictReader row
+
+        Args:
+            row (dict): A row with the CSV_FIELDS keys
+
+        Returns:
+            Book: The parsed book
+        """
+        book = cls.__new__(cls)
+        for field in CSV_FIELDS:
+            value = row.get(field, "")
+            if field in cls.FLOAT_FIELDS:
+                value = cls.parse_float(value)
+            elif field in cls.INT_FIELDS:
+                value = cls.parse_int(value)
+            elif field == "read":
+                value = cls.parse_bool(value)
+            setattr(book, field, value)
+        return book
+
+    @classmethod
+    def from_fields(cls, fields):
+        """
+        Creates a Book from user-supplied fields (command line, imported file)
+
+        Args:
+            fields (dict): Either the CSV_FIELDS keys or author_first/author_last in place of the
+                combined author fields. Missing fields are left empty
+
+        Returns:
+            Book: The parsed book, with the age group title-cased as add_book does
+        """
+        if 'author_first' in fields or 'author_last' in fields:
+            def get(field):
+                value = fields.get(field)
+                return "" if value is None else value
+            book = cls(get('title'), get('author_first'), get('author_last'), get('isbn'), get('isbn13'),
+                       get('my_rating'), get('avg_rating'), get('publisher'), get('binding'), get('num_pages'),
+                       get('year_published'), get('date_read'), get('genre'), get('age_group'), get('read'))
+        else:
+            book = cls.from_row(fields)
+        book.age_group = str(book.age_group or "").title()
+        return book
+
+    def to_row(self):
+        """
+        Returns:
+            dict: The book as a CSV row dictionary of strings
+        """
+        return {field: self.format_value(getattr(self, field)) for field in CSV_FIELDS}
+
+    def __getitem__(self, field):
+        if field not in CSV_FIELDS:
+            raise KeyError(field)
+        return self.format_value(getattr(self, field))
+
+    def get(self, field, default=None):
+        if field not in CSV_FIELDS:
+            return default
+        return self[field]
+
+    def keys(self):
+        return list(CSV_FIELDS)
+
+    def __repr__(self):
+        return f"Book({self.title!r}, {self.author_first_last!r})"
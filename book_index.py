@@ -0,0 +1,178 @@
+from bisect import bisect_left, insort
+
+
+class BookIndex:
+    """
+    Lookup index over the in-memory library
+
+    Keeps case-folded hash maps from title, author, ISBN and ISBN-13 to the positions of the
+    matching books in the library list, plus a sorted (title, position) list for prefix searches.
+    Positions in every bucket are kept in ascending order so the first one is the first match
+    in library order.
+
+    The index is built lazily on the first lookup, so loading a library costs nothing until
+    somebody actually searches it.
+    """
+
+    def __init__(self, library=None):
+        self.rebuild(library or [])
+
+    @staticmethod
+    def normalize(value):
+        """
+        Case-folds and strips a field value so lookups ignore case and surrounding whitespace
+
+        Args:
+            value: The raw field value (string, number or None)
+
+        Returns:
+            str: The normalized key, empty for missing values
+        """
+        if value is None:
+            return ""
+        return str(value).strip().casefold()
+
+    def rebuild(self, library):
+        """
+        Re-indexes the whole library. Used after operations that move books around (sort, delete)
+
+        Args:
+            library (list): List of book dictionaries
+        """
+        self.library = library
+        self.built = False
+
+    def _field_values(self, field):
+        column = getattr(self.library, 'column', None)  # ColumnarLibrary keeps text fields as plain lists
+        if column is not None:
+            return column(field)
+        return [book.get(field) for book in self.library]
+
+    def _ensure_built(self):
+        if self.built:
+            return
+        normalize = self.normalize
+        self.by_title = {}
+        self.by_author = {}
+        self.by_isbn = {}
+        self.by_isbn13 = {}
+
+        def add(mapping, key, position):
+            if key:
+                positions = mapping.get(key)
+                if positions is None:
+                    mapping[key] = [position]
+                elif positions[-1] != position:
+                    positions.append(position)
+
+        titles = [normalize(title) for title in self._field_values('title')]
+        for position, key in enumerate(titles):
+            add(self.by_title, key, position)
+        authors = zip(self._field_values('author_first_last'), self._field_values('author_last_first'))
+        for position, (first_last, last_first) in enumerate(authors):
+            add(self.by_author, normalize(first_last), position)
+            add(self.by_author, normalize(last_first), position)
+        for position, isbn in enumerate(self._field_values('isbn')):
+            add(self.by_isbn, normalize(isbn), position)
+        for position, isbn13 in enumerate(self._field_values('isbn13')):
+            add(self.by_isbn13, normalize(isbn13), position)
+        self.title_prefix = sorted(zip(titles, range(len(titles))))
+        self.built = True
+
+    def _keyed_maps(self, book):
+        authors = {self.normalize(book.get('author_first_last')), self.normalize(book.get('author_last_first'))}
+        yield self.by_title, [self.normalize(book.get('title'))]
+        yield self.by_author, authors
+        yield self.by_isbn, [self.normalize(book.get('isbn'))]
+        yield self.by_isbn13, [self.normalize(book.get('isbn13'))]
+
+    def _add_keys(self, book, position):
+        for mapping, keys in self._keyed_maps(book):
+            for key in keys:
+                if key:
+                    insort(mapping.setdefault(key, []), position)
+
+    def _remove_keys(self, book, position):
+        for mapping, keys in self._keyed_maps(book):
+            for key in keys:
+                positions = mapping.get(key)
+                if positions and position in positions:
+                    positions.remove(position)
+                    if not positions:
+                        del mapping[key]
+
+    def add(self, book, position):
+        """
+        Indexes a book that was appended to the library at the given position
+
+        Args:
+            book (dict): The book dictionary
+            position (int): Its position in the library list
+        """
+        if not self.built:
+            return  # picked up from the library when the index is built
+        self._add_keys(book, position)
+        insort(self.title_prefix, (self.normalize(book.get('title')), position))
+
+    def update(self, position, old_book, new_book):
+        """
+        Re-indexes the book at position after an edit. Nothing is touched if no indexed field changed
+
+        Args:
+            position (int): Position of the edited book in the library list
+            old_book (dict): The field values before the edit
+            new_book (dict): The field values after the edit
+        """
+        if not self.built:
+            return
+        old_keys = [keys for _, keys in self._keyed_maps(old_book)]
+        new_keys = [keys for _, keys in self._keyed_maps(new_book)]
+        if old_keys == new_keys:
+            return
+        self._remove_keys(old_book, position)
+        self._add_keys(new_book, position)
+        old_title = self.normalize(old_book.get('title'))
+        new_title = self.normalize(new_book.get('title'))
+        if old_title != new_title:
+            entry = (old_title, position)
+            index = bisect_left(self.title_prefix, entry)  # a binary search rather than remove()'s scan
+            if index < len(self.title_prefix) and self.title_prefix[index] == entry:
+                del self.title_prefix[index]
+            insort(self.title_prefix, (new_title, position))
+
+    def find_title(self, title):
+        self._ensure_built()
+        return list(self.by_title.get(self.normalize(title), []))
+
+    def find_author(self, author):
+        self._ensure_built()
+        return list(self.by_author.get(self.normalize(author), []))
+
+    def find_isbn(self, isbn):
+        self._ensure_built()
+        return list(self.by_isbn.get(self.normalize(isbn), []))
+
+    def find_isbn13(self, isbn13):
+        self._ensure_built()
+        return list(self.by_isbn13.get(self.normalize(isbn13), []))
+
+    def find_title_prefix(self, prefix):
+        """
+        Finds every book whose title starts with prefix, in title order
+
+        Args:
+            prefix (str): The title prefix (case-insensitive)
+
+        Returns:
+            list: Positions of the matching books
+        """
+        self._ensure_built()
+        prefix = self.normalize(prefix)
+        start = bisect_left(self.title_prefix, (prefix,))
+        positions = []
+        for i in range(start, len(self.title_prefix)):
+            title, position = self.title_prefix[i]
+            if not title.startswith(prefix):
+                break
+            positions.append(position)
+        return positions
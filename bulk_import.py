@@ -0,0 +1,181 @@
+import csv
+import json
+import os
+from collections import deque
+from itertools import islice
+
+from book import Book, CSV_FIELDS
+from book_index import BookIndex
+from helpers import Helpers
+from validation import Validation
+
+
+class BulkImporter:
+    """
+    Imports large CSV or JSONL files (e.g. a Goodreads export) into the library in one commit
+
+    The input is streamed and validated in batches with Validation.book_errors (after restoring
+    hyphenated, quoted or spreadsheet-mangled ISBNs with Validation.normalize_row). With workers > 1
+    the batches are validated in a process pool. Rows that pass are deduplicated against the
+    library and against each other: same ISBN, same ISBN-13, or same title and author. The
+    surviving rows are added to the library, which is then written once to a new CSV that
+    atomically replaces the old one. Nothing is written if no row survives.
+
+    Every rejected row is reported with its line number in the input and the reasons.
+    """
+
+    BATCH_SIZE = 5000
+
+    def __init__(self, batch_size=BATCH_SIZE, workers=None):
+        self.batch_size = batch_size
+        self.workers = workers  # validate in a process pool of this many workers when > 1
+
+    @staticmethod
+    def iter_rows(path):
+        """
+        Streams the rows of a .csv or .jsonl/.ndjson file
+
+        Yields:
+            tuple: (line number, row dict), the number being the file line the row starts on
+        """
+        if path.endswith((".jsonl", ".ndjson")):
+            with open(path, mode='r', encoding='utf-8') as file:
+                for number, line in enumerate(file, start=1):
+                    if not line.strip():
+                        continue
+                    try:
+                        row = json.loads(line)
+                    except json.JSONDecodeError as e:
+                        row = {"_error": f"Unreadable JSON: {e.msg}."}
+                    if not isinstance(row, dict):
+                        row = {"_error": "Expected a JSON object."}
+                    yield number, row
+        else:
+            yield from Helpers.iter_csv_rows(path, line_numbers=True)
+
+    def iter_batches(self, path):
+        rows = self.iter_rows(path)
+        while True:
+            batch = list(islice(rows, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
+    @staticmethod
+    def validate_batch(batch):
+        """
+        Validates one batch of (line number, row) pairs. Runs in the worker processes in parallel mode
+
+        Returns:
+            tuple: (accepted, rejected) where accepted holds (line number, CSV row) pairs and
+            rejected holds (line number, input row, errors) triples
+        """
+        accepted = []
+        rejected = []
+        for number, row in batch:
+            if "_error" not in row:
+                row = Validation.normalize_row(row)
+            errors = [row["_error"]] if "_error" in row else Validation.book_errors(row)
+            if errors:
+                rejected.append((number, row, errors))
+            else:
+                accepted.append((number, Book.from_fields(row).to_row()))
+        return accepted, rejected
+
+    def validated_batches(self, path):
+        """
+        Yields validate_batch of every batch, in input order. The pool is kept at most workers * 2
+        batches ahead of the consumer, so the input is never read much faster than it is used
+        """
+        batches = self.iter_batches(path)
+        if self.workers and self.workers > 1:
+            from concurrent.futures import ProcessPoolExecutor  # only imported when a pool is used
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                pending = deque()
+                for batch in batches:
+                    if len(pending) >= self.workers * 2:
+                        yield pending.popleft().result()
+                    pending.append(executor.submit(self.validate_batch, batch))
+                while pending:
+                    yield pending.popleft().result()
+        else:
+            for batch in batches:
+                yield self.validate_batch(batch)
+
+    @staticmethod
+    def identity_keys(row):
+        """
+        Returns the keys two rows are considered the same book by: ISBN, ISBN-13, title + author
+        """
+        normalize = BookIndex.normalize
+        keys = []
+        if normalize(row.get('isbn')):
+            keys.append(('isbn', normalize(row.get('isbn'))))
+        if normalize(row.get('isbn13')):
+            keys.append(('isbn13', normalize(row.get('isbn13'))))
+        keys.append(('title', normalize(row.get('title')), normalize(row.get('author_first_last'))))
+        return keys
+
+    @staticmethod
+    def in_library(index, library, row):
+        normalize = BookIndex.normalize
+        if normalize(row.get('isbn')) and index.find_isbn(row['isbn']):
+            return "Duplicate ISBN of a book already in the library."
+        if normalize(row.get('isbn13')) and index.find_isbn13(row['isbn13']):
+            return "Duplicate ISBN-13 of a book already in the library."
+        author = normalize(row.get('author_first_last'))
+        for position in index.find_title(row.get('title')):
+            if normalize(library[position].get('author_first_last')) == author:
+                return "Same title and author as a book already in the library."
+        return None
+
+    def run(self, path, library, index):
+        """
+        Validates and deduplicates every row of path
+
+        Args:
+            path (str): The .csv or .jsonl file to import
+            library (list): The current library, used for deduplication only
+            index (BookIndex): Index over library
+
+        Returns:
+            tuple: (accepted, rejected) where accepted is the list of new CSV rows, in input order,
+            and rejected a list of (line number, input row, errors) sorted by line number
+        """
+        accepted = []
+        rejected = []
+        seen = {}  # identity key -> line number of the first row with it
+        for batch_accepted, batch_rejected in self.validated_batches(path):
+            rejected.extend(batch_rejected)
+            for number, row in batch_accepted:
+                reason = self.in_library(index, library, row)
+                keys = self.identity_keys(row)
+                if reason is None:
+                    earlier = next((seen[key] for key in keys if key in seen), None)
+                    if earlier is not None:
+                        reason = f"Duplicate of line {earlier} in this import."
+                if reason is not None:
+                    rejected.append((number, row, [reason]))
+                    continue
+                for key in keys:
+                    seen[key] = number
+                accepted.append(row)
+        rejected.sort(key=lambda item: item[0])
+        return accepted, rejected
+
+    @staticmethod
+    def write_report(report_file, rejected):
+        """
+        Writes the rejected rows to a CSV with their line number and the reasons they were rejected
+        """
+        extra = []
+        for _, row, _ in rejected:
+            extra.extend(field for field in row if field not in CSV_FIELDS and field not in extra and field != "_error")
+        fieldnames = ["line", "errors"] + CSV_FIELDS + extra
+        directory = os.path.dirname(os.path.abspath(report_file))
+        os.makedirs(directory, exist_ok=True)
+        with open(report_file, mode='w', newline='', encoding='utf-8') as file:
+            writer = csv.DictWriter(file, fieldnames=fieldnames, extrasaction='ignore')
+            writer.writeheader()
+            for number, row, errors in rejected:
+                writer.writerow(dict(row, line=number, errors=" ".join(errors)))
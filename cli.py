@@ -0,0 +1,318 @@
+"""
+Non-interactive command line for the library manager, for scripts and pipelines
+
+    python cli.py add --title "Dune" --author-first Frank --author-last Herbert --binding Paperback \
+        --num-pages 412 --year 1965 --age-group Adult
+    python cli.py import new_books.csv
+    python cli.py view --page 3 --page-size 50
+    python cli.py shelves --page 1
+    python cli.py search "herbert dune"
+    python cli.py edit "Dune" --read true --date-read 2024-05-01
+    python cli.py edit "Dune" --delete
+    python cli.py sort -- -avg_rating title
+    python cli.py normalize-isbns
+    python cli.py validate
+    python cli.py cluster 4 --workers 4
+    python cli.py similar "Dune" "Emma" -k 5
+    python cli.py plan --speed 40 --hours 20 --mode exact
+    python cli.py plan --speed 20 30 40 --hours 10 50
+
+Every command works on --csv (data/books.csv by default) and exits with status 1 when nothing
+could be done (invalid input, book not found, rejected rows). --profile prints where the time
+went to stderr (see profiling.py).
+"""
+
+import argparse
+import json
+import os
+import sys
+
+from lazy_imports import tabulate
+
+from file_lock import LibraryConflictError
+from MyLibraryManager import MyLibraryManager
+from profiling import Profiler, profiler
+from scheduler import ReadingScheduler
+from sorting import Sorting
+from table_renderer import TableRenderer
+
+
+# add option -> CSV field
+ADD_OPTIONS = [
+    ("title", "title"), ("author-first", "author_first"), ("author-last", "author_last"),
+    ("isbn", "isbn"), ("isbn13", "isbn13"), ("my-rating", "my_rating"), ("avg-rating", "avg_rating"),
+    ("publisher", "publisher"), ("binding", "binding"), ("num-pages", "num_pages"),
+    ("year", "year_published"), ("date-read", "date_read"), ("genre", "genre"),
+    ("age-group", "age_group"), ("read", "read"),
+]
+
+
+def print_json(data):
+    print(json.dumps(data, indent=2))
+
+
+def print_rejected(rejected):
+    for number, row, errors in rejected:
+        print(f"Line {number} ({row.get('title') or 'untitled'}): {' '.join(errors)}", file=sys.stderr)
+
+
+def command_add(manager, args):
+    fields = {field: getattr(args, field) for _, field in ADD_OPTIONS if getattr(args, field) is not None}
+    added, rejected = manager.add_books([fields])
+    print_rejected(rejected)
+    if added:
+        print(f"Added '{added[0]['title']}'.")
+    return 0 if added else 1
+
+
+def command_import(manager, args):
+    if not os.path.exists(args.file):
+        print(f"File {args.file} does not exist.", file=sys.stderr)
+        return 1
+    added, rejected = manager.import_books(args.file, args.workers, args.report)
+    if args.report is None:
+        print_rejected(rejected)
+    if args.json:
+        print_json({"added": len(added), "rejected": [{"line": number, "errors": errors}
+                                                       for number, _, errors in rejected]})
+    else:
+        print(f"Imported {len(added)} books, rejected {len(rejected)}.")
+    return 0 if added or not rejected else 1
+
+
+def command_view(manager, args):
+    manager.view_books(args.page, args.page_size)
+    return 0
+
+
+def command_shelves(manager, args):
+    buckets = manager.shelf_cache.get(manager.library, manager.library_version)
+    Sorting.print_sorted_bookshelves(manager.library, buckets, args.page, args.page_size)
+    return 0
+
+
+def command_search(manager, args):
+    results = manager.search_books(" ".join(args.query), args.limit)
+    if args.json:
+        print_json([dict(book, score=round(score, 4)) for book, score in results])
+        return 0 if results else 1
+    if not results:
+        print("No books matched.", file=sys.stderr)
+        return 1
+    table_data = [[book['title'], book['author_first_last'], book['genre'], f"{score:.2f}"] for book, score in results]
+    print(tabulate(table_data, headers=["Title", "Author", "Genre", "Score"], tablefmt="pretty"))
+    return 0
+
+
+def command_edit(manager, args):
+    if args.delete:
+        if not manager.delete_book(args.title):
+            print(f"Book titled '{args.title}' not found in the library.", file=sys.stderr)
+            return 1
+        print(f"'{args.title}' has been deleted from your library.")
+        return 0
+
+    changes = dict(field_value.split("=", 1) for field_value in args.set)
+    if args.read is not None:
+        changes['read'] = str(args.read.strip().lower() == "true")
+        if changes['read'] == "False" and args.date_read is None:
+            changes['date_read'] = ""
+    if args.date_read is not None:
+        changes['date_read'] = args.date_read
+    if args.my_rating is not None:
+        changes['my_rating'] = args.my_rating
+    if not changes:
+        print("Nothing to change. Use --read, --date-read, --my-rating, --set FIELD=VALUE or --delete.",
+              file=sys.stderr)
+        return 1
+
+    book = manager.edit_book_fields(args.title, changes)
+    if book is None:
+        print(f"Book titled '{args.title}' not found in the library.", file=sys.stderr)
+        return 1
+    print(f"Changes to '{book['title']}' have been saved.")
+    return 0
+
+
+def command_sort(manager, args):
+    manager.sort_library(args.fields)
+    print(f"Sorted {len(manager.library)} books by {', '.join(args.fields)}.")
+    return 0
+
+
+def command_normalize_isbns(manager, args):
+    changed = manager.normalize_isbns()
+    for title, old, new in changed:
+        print(f"{title}: ISBN-13 {old} -> {new}")
+    print(f"Restored {len(changed)} ISBN-13s.")
+    return 0
+
+
+def command_validate(manager, args):
+    invalid = manager.invalid_books()
+    if args.json:
+        print_json([{"position": position, "title": title, "field": field, "value": value}
+                    for position, title, field, value in invalid])
+    else:
+        for position, title, field, value in invalid:
+            print(f"Book {position + 1} ({title or 'untitled'}): invalid {field} '{value}'")
+        print(f"{len(invalid)} invalid value(s) in {len(manager.library)} books.")
+    return 1 if invalid else 0
+
+
+def command_cluster(manager, args):
+    clusters = manager.cluster_books(args.num_clusters, args.method, args.workers)
+    if args.json:
+        print_json([[dict(book) for book in cluster] for cluster in clusters])
+        return 0
+    for idx, cluster in enumerate(clusters):
+        print(f"\nCluster {idx + 1}:")
+        for book in cluster:
+            print(f" - {book['title']} by {book['author_first_last']} (Rating: {book['avg_rating']}, Genre: {book['genre']})")
+    return 0
+
+
+def command_similar(manager, args):
+    try:
+        results = manager.similar_books(args.titles, args.k)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    if args.json:
+        print_json({title: None if similar is None else [dict(book, similarity=similarity)
+                                                         for book, similarity in similar]
+                    for title, similar in results.items()})
+        return 0 if all(similar is not None for similar in results.values()) else 1
+    status = 0
+    for title, similar in results.items():
+        if similar is None:
+            print(f"Book titled '{title}' not found in the library.", file=sys.stderr)
+            status = 1
+            continue
+        print(f"\nBooks similar to '{title}':")
+        for book, similarity in similar:
+            print(f" - {book['title']} by {book['author_first_last']} (Rating: {book['avg_rating']}, "
+                  f"Genre: {book['genre']}, Similarity: {similarity:.2f})")
+    return status
+
+
+def command_plan(manager, args):
+    if len(args.speed) == 1 and len(args.hours) == 1:
+        result = manager.plan_reading(args.speed[0], args.hours[0], args.mode)
+        if args.json:
+            result = dict(result, books=[dict(book) for book in result['books']])
+            print_json(result)
+            return 0
+        table_data = [
+            [book['title'], book['author_first_last'], book['avg_rating'], book['num_pages'], f"{hours:.2f}"]
+            for book, hours in zip(result['books'], result['hours'])
+        ]
+        print(tabulate(table_data, headers=["Title", "Author", "Rating", "Pages", "Hours"], tablefmt="pretty"))
+        print(f"Total value (sum of average ratings): {result['value']:.2f} in {result['hours_used']:.2f} hours")
+        return 0
+
+    if args.mode != "greedy":
+        print("Several speeds or budgets are planned in greedy mode only.", file=sys.stderr)
+        return 1
+    plans = manager.what_if_plans(args.speed, args.hours, show=not args.json)
+    if args.json:
+        print_json(plans)
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="Manage the book library without interactive prompts.")
+    parser.add_argument("--csv", default="data/books.csv", help="library CSV file (default: data/books.csv)")
+    parser.add_argument("--columnar", action="store_true", help="keep the library in the compact columnar layout")
+    parser.add_argument("--profile", action="store_true", help="print timings and peak memory per operation to stderr")
+    parser.add_argument("--profile-out", metavar="FILE", help="also dump cProfile stats to FILE")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    add = commands.add_parser("add", help="add one book")
+    for option, field in ADD_OPTIONS:
+        add.add_argument(f"--{option}", dest=field, required=option == "title")
+    add.set_defaults(handler=command_add)
+
+    import_ = commands.add_parser("import", help="bulk-import a CSV or JSONL file, skipping duplicates")
+    import_.add_argument("file", help=".csv or .jsonl file with the library's columns (or author_first/author_last)")
+    import_.add_argument("--workers", type=int, help="validate in a pool of this many processes")
+    import_.add_argument("--report", help="write the rejected rows and the reasons to this CSV file")
+    import_.add_argument("--json", action="store_true", help="print the result as JSON")
+    import_.set_defaults(handler=command_import)
+
+    view = commands.add_parser("view", help="print the library as a table")
+    shelves = commands.add_parser("shelves", help="print the bookshelves, sorted by author and title")
+    for command, handler in ((view, command_view), (shelves, command_shelves)):
+        command.add_argument("--page", type=int, help="only print this page (starting at 1)")
+        command.add_argument("--page-size", type=int, help=f"books per page (default: {TableRenderer.PAGE_SIZE})")
+        command.set_defaults(handler=handler)
+
+    search = commands.add_parser("search", help="full-text search over titles, authors, publishers and genres")
+    search.add_argument("query", nargs="+")
+    search.add_argument("--limit", type=int, default=10)
+    search.add_argument("--json", action="store_true", help="print the matches as JSON")
+    search.set_defaults(handler=command_search)
+
+    edit = commands.add_parser("edit", help="edit or delete a book, found by title")
+    edit.add_argument("title")
+    edit.add_argument("--read", choices=["true", "false", "True", "False"])
+    edit.add_argument("--date-read", dest="date_read")
+    edit.add_argument("--my-rating", dest="my_rating")
+    edit.add_argument("--set", action="append", default=[], metavar="FIELD=VALUE", help="set any CSV field")
+    edit.add_argument("--delete", action="store_true", help="delete the book instead")
+    edit.set_defaults(handler=command_edit)
+
+    sort = commands.add_parser("sort", help="sort the library and save it (prefix a field with - for descending)")
+    sort.add_argument("fields", nargs="+")
+    sort.set_defaults(handler=command_sort)
+
+    normalize = commands.add_parser("normalize-isbns",
+                                    help="restore ISBN-13s a spreadsheet saved as 9.78163E+12 and save the library")
+    normalize.set_defaults(handler=command_normalize_isbns)
+
+    validate = commands.add_parser("validate", help="list the books with invalid values (exit status 1 if any)")
+    validate.add_argument("--json", action="store_true", help="print the invalid values as JSON")
+    validate.set_defaults(handler=command_validate)
+
+    cluster = commands.add_parser("cluster", help="cluster books by similarity")
+    cluster.add_argument("num_clusters", type=int)
+    cluster.add_argument("--method", choices=["linkage", "prim"])
+    cluster.add_argument("--workers", type=int, help="cluster each genre in a pool of this many processes")
+    cluster.add_argument("--json", action="store_true", help="print the clusters as JSON")
+    cluster.set_defaults(handler=command_cluster)
+
+    similar = commands.add_parser("similar", help="list the books most similar to one or more titles")
+    similar.add_argument("titles", nargs="+")
+    similar.add_argument("-k", type=int, default=5, help="number of similar books per title (default: 5)")
+    similar.add_argument("--json", action="store_true", help="print the results as JSON")
+    similar.set_defaults(handler=command_similar)
+
+    plan = commands.add_parser("plan", help="schedule unread books for the hours available")
+    plan.add_argument("--speed", type=float, nargs="+", required=True, help="reading speed(s) in pages per hour")
+    plan.add_argument("--hours", type=float, nargs="+", required=True, help="hours available")
+    plan.add_argument("--mode", choices=ReadingScheduler.MODES, default="greedy")
+    plan.add_argument("--json", action="store_true", help="print the plan as JSON")
+    plan.set_defaults(handler=command_plan)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if getattr(args, "set", None) and any("=" not in field_value for field_value in args.set):
+        print("--set expects FIELD=VALUE", file=sys.stderr)
+        return 2
+    Profiler.from_environment(args.profile, args.profile_out)
+    manager = MyLibraryManager(args.csv, columnar=args.columnar)
+    try:
+        with profiler.section(f"cli: {args.command}"):
+            status = args.handler(manager, args)
+        manager.search_index.save()  # keep the persisted index current if this command updated it
+        return status
+    except (ValueError, LibraryConflictError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
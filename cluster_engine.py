@@ -0,0 +1,323 @@
+from array import array
+
+from disjoint_set import DisjointSet
+from mst_clustering import MSTClustering
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")  # NumPy is optional, only the dense Prim engine needs it
+
+
+class ClusterEngine:
+    """
+    Faster drop-in for MSTClustering.apply_greedy
+
+    Books are encoded once into a genre code list and a rating list, so avg_rating is parsed a
+    single time per book instead of once per pair. Two MST engines are available:
+
+    - "linkage": exact single-linkage over the rating axis inside genre buckets. Only a
+      near-linear number of candidate edges can belong to the MST, so it runs in O(n log n).
+    - "prim": Prim's algorithm over the implicit dense graph with NumPy, O(n^2) time and O(n)
+      memory. Used as the reference engine for very mixed libraries.
+
+    Both engines break weight ties by (weight, i, j) exactly like the Kruskal sort in
+    MSTClustering.build_mst, so the clusters returned match MSTClustering.apply_greedy.
+
+    With workers > 1 either engine runs once per genre in a process pool (parallel_mst) and
+    the per-genre trees are joined afterwards, which gives the same clusters.
+    """
+
+    SAME_GENRE_BONUS = 10
+
+    def __init__(self, method="linkage", workers=None):
+        self.method = method
+        self.workers = workers  # split the work by genre over a process pool of this many workers when > 1
+        self.mst_clustering = MSTClustering()
+
+    def encode(self, books):
+        """
+        Encodes genre and average rating into parallel lists
+
+        Args:
+            books (list): List of book dictionaries.
+
+        Returns:
+            tuple: (genre codes, ratings) where genre codes are small ints
+        """
+        genre_codes = {}
+        genres = []
+        ratings = []
+        for book in books:
+            genres.append(genre_codes.setdefault(book['genre'], len(genre_codes)))
+            ratings.append(float(book['avg_rating']))
+        return genres, ratings
+
+    def edge_weight(self, same_genre, rating1, rating2):
+        """
+        Edge weight as used by MSTClustering: the negated calculate_similarity score
+        """
+        similarity = 0
+        if same_genre:
+            similarity += self.SAME_GENRE_BONUS
+        similarity -= abs(rating1 - rating2)
+        return -similarity
+
+    def prim_mst(self, genres, ratings):
+        """
+        Build the MST of the complete similarity graph with Prim's algorithm.
+        Edge weights are computed on the fly from the encoded arrays, one row at a time.
+
+        Args:
+            genres (list): Genre code of each book.
+            ratings (list): Average rating of each book.
+
+        Returns:
+            list: MST edges (weight, i, j) with i < j, in Kruskal order.
+        """
+        if np is None:
+            raise ImportError("NumPy is required for the 'prim' clustering engine, use method='linkage' instead")
+
+        n = len(genres)
+        if n < 2:
+            return []
+
+        genre_array = np.asarray(genres)
+        rating_array = np.asarray(ratings, dtype=np.float64)
+        positions = np.arange(n)
+        in_tree = np.zeros(n, dtype=bool)
+        best_weight = np.full(n, np.inf)
+        best_lo = np.full(n, n)
+        best_hi = np.full(n, n)
+
+        mst = []
+        u = 0
+        for _ in range(n - 1):
+            in_tree[u] = True
+            bonus = np.where(genre_array == genre_array[u], float(self.SAME_GENRE_BONUS), 0.0)
+            weight = -(bonus - np.abs(rating_array - rating_array[u]))
+            lo = np.minimum(positions, u)
+            hi = np.maximum(positions, u)
+
+            # Keep the smallest (weight, lo, hi) edge linking each outside vertex to the tree
+            better = (weight < best_weight) | ((weight == best_weight) & (
+                (lo < best_lo) | ((lo == best_lo) & (hi < best_hi))))
+            better &= ~in_tree
+            best_weight[better] = weight[better]
+            best_lo[better] = lo[better]
+            best_hi[better] = hi[better]
+
+            candidate_weight = np.where(in_tree, np.inf, best_weight)
+            ties = candidate_weight == candidate_weight.min()
+            ties &= best_lo == np.where(ties, best_lo, n).min()
+            u = int(np.argmin(np.where(ties, best_hi, n)))
+            mst.append((float(best_weight[u]), int(best_lo[u]), int(best_hi[u])))
+
+        mst.sort()
+        return mst
+
+    def linkage_edges(self, genres, ratings):
+        """
+        Candidate edges that are enough to contain the MST.
+
+        Same-genre edges always beat cross-genre ones (+10 bonus vs at most 5 rating points),
+        and along one rating axis only neighbouring ratings can be MST edges. So it is enough to
+        keep: books with identical genre and rating joined to the lowest index of their group,
+        neighbouring ratings within each genre, and cross-genre pairs at the same or
+        neighbouring rating values. Each group pair is represented by its lowest (i, j) pair,
+        which is the one Kruskal's (weight, i, j) order would pick.
+
+        Args:
+            genres (list): Genre code of each book.
+            ratings (list): Average rating of each book.
+
+        Returns:
+            list: Candidate edges (weight, i, j) with i < j.
+        """
+        groups = {}
+        for i, key in enumerate(zip(genres, ratings)):
+            groups.setdefault(key, []).append(i)
+
+        edges = []
+        for (genre, rating), members in groups.items():
+            head = members[0]
+            for other in members[1:]:
+                edges.append((self.edge_weight(True, rating, rating), head, other))
+
+        heads = {group: members[0] for group, members in groups.items()}
+        levels_by_genre = {}
+        for genre, rating in groups:
+            levels_by_genre.setdefault(genre, []).append(rating)
+
+        for genre, levels in levels_by_genre.items():
+            levels.sort()
+            for low, high in zip(levels, levels[1:]):
+                edges.append(self.group_edge(heads, (genre, low), (genre, high)))
+
+        edges.extend(self.cross_genre_edges(heads))
+        return edges
+
+    def group_edge(self, heads, group_a, group_b):
+        """
+        The lowest (i, j) edge between two (genre, rating) groups, given the lowest index of each
+        """
+        a, b = heads[group_a], heads[group_b]
+        weight = self.edge_weight(group_a[0] == group_b[0], group_a[1], group_b[1])
+        return weight, min(a, b), max(a, b)
+
+    def cross_genre_edges(self, heads):
+        """
+        The cross-genre part of linkage_edges: pairs of genres at the same or neighbouring ratings
+
+        Args:
+            heads (dict): (genre, rating) -> lowest index of the books with that genre and rating
+
+        Returns:
+            list: Candidate edges (weight, i, j) with i < j.
+        """
+        genres_by_level = {}
+        for genre, rating in heads:
+            genres_by_level.setdefault(rating, []).append(genre)
+
+        edges = []
+        levels = sorted(genres_by_level)
+        for level in levels:
+            level_genres = genres_by_level[level]
+            for x, genre_a in enumerate(level_genres):
+                for genre_b in level_genres[x + 1:]:
+                    edges.append(self.group_edge(heads, (genre_a, level), (genre_b, level)))
+        for low, high in zip(levels, levels[1:]):
+            for genre_a in genres_by_level[low]:
+                for genre_b in genres_by_level[high]:
+                    if genre_a != genre_b:
+                        edges.append(self.group_edge(heads, (genre_a, low), (genre_b, high)))
+        return edges
+
+    def linkage_mst(self, genres, ratings):
+        """
+        Build the MST from the linkage candidate edges with Kruskal's algorithm.
+
+        Returns:
+            list: MST edges (weight, i, j) with i < j, in Kruskal order.
+        """
+        return self.mst_clustering.build_mst(self.linkage_edges(genres, ratings), len(genres))
+
+    @staticmethod
+    def genre_mst(task):
+        """
+        MST of the books of one genre, run in a worker process by parallel_mst
+
+        Args:
+            task (tuple): (method, positions, ratings) with the genre's library positions in
+                ascending order and their ratings
+
+        Returns:
+            tuple: (weights, i, j) arrays of the MST edges in library positions and Kruskal order,
+            and rating -> lowest position. Arrays are much cheaper than tuples to send back
+        """
+        method, positions, ratings = task
+        engine = ClusterEngine(method)
+        genres = [0] * len(ratings)
+        mst = engine.prim_mst(genres, ratings) if method == "prim" else engine.linkage_mst(genres, ratings)
+        heads = {}
+        for position, rating in zip(positions, ratings):
+            heads.setdefault(rating, position)
+        # positions are ascending, so mapping keeps every edge's i < j and the (weight, i, j) order
+        weights, lows, highs = array('d'), array('q'), array('q')
+        for weight, i, j in mst:
+            weights.append(weight)
+            lows.append(positions[i])
+            highs.append(positions[j])
+        return (weights, lows, highs), heads
+
+    def parallel_mst(self, genres, ratings, method, workers):
+        """
+        Build the same MST as linkage_mst/prim_mst with one task per genre in a process pool.
+
+        Same-genre edges weigh at most -5 and cross-genre ones at least 0, so Kruskal's algorithm
+        takes every same-genre MST edge before looking at any cross-genre edge: the MST is the
+        union of the per-genre MSTs, joined by the cheapest cross-genre edges. The genres are
+        solved independently in the workers. Here each genre is then a single component, so
+        joining them is a Kruskal pass over the cross-genre candidates (see cross_genre_edges)
+        with one union-find element per genre.
+
+        Args:
+            genres (list): Genre code of each book.
+            ratings (list): Average rating of each book.
+            method (str): Engine used inside each genre, "linkage" or "prim".
+            workers (int): Number of worker processes.
+
+        Returns:
+            list: MST edges (weight, i, j) with i < j, in Kruskal order.
+        """
+        partitions = {}
+        for i, genre in enumerate(genres):
+            partitions.setdefault(genre, []).append(i)
+        # Largest genres first, so the longest task does not start last
+        order = sorted(partitions, key=lambda genre: len(partitions[genre]), reverse=True)
+        tasks = [(method, partitions[genre], [ratings[i] for i in partitions[genre]]) for genre in order]
+
+        from concurrent.futures import ProcessPoolExecutor  # only imported when a pool is used
+        with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+            results = list(executor.map(self.genre_mst, tasks))
+
+        mst = []
+        heads = {}
+        for genre, (genre_edges, genre_heads) in zip(order, results):
+            mst.extend(zip(*genre_edges))
+            for rating, position in genre_heads.items():
+                heads[(genre, rating)] = position
+        mst.sort()  # merges the per-genre runs, all lighter than any cross-genre edge
+
+        components = DisjointSet(len(partitions))  # genre codes are 0..len(partitions) - 1
+        for edge in sorted(self.cross_genre_edges(heads)):
+            if components.union(genres[edge[1]], genres[edge[2]]):
+                mst.append(edge)
+                if components.count == 1:
+                    break
+        return mst
+
+    def build_mst(self, books, method=None, workers=None):
+        genres, ratings = self.encode(books)
+        method = method or self.method
+        workers = workers or self.workers
+        if workers and workers > 1 and len(set(genres)) > 1:
+            return self.parallel_mst(genres, ratings, method, workers)
+        if method == "prim":
+            return self.prim_mst(genres, ratings)
+        return self.linkage_mst(genres, ratings)
+
+    def clusters_from_mst(self, mst, num_books, num_clusters):
+        """
+        Remove the num_clusters - 1 heaviest MST edges and return the remaining components.
+        Equal weights are removed in Kruskal order, matching the stable sort in apply_greedy.
+
+        Args:
+            mst (list): MST edges (weight, i, j) in Kruskal order.
+            num_books (int): The number of books (nodes).
+            num_clusters (int): The desired number of clusters.
+
+        Returns:
+            list: List of clusters, each cluster is a list of book indices.
+        """
+        mst = sorted(mst, reverse=True, key=lambda x: x[0])
+        kept = mst[max(num_clusters - 1, 0):]
+
+        components = DisjointSet(num_books)
+        components.union_many((u, v) for weight, u, v in kept)
+        return components.groups()
+
+    def apply_greedy(self, books, num_clusters, method=None, workers=None):
+        """
+        Cluster books exactly like MSTClustering.apply_greedy, without building all n^2 edges.
+
+        Args:
+            books (list): List of book dictionaries.
+            num_clusters (int): The desired number of clusters.
+            method (str): "linkage" or "prim", defaults to the engine's method.
+            workers (int): Build the per-genre MSTs in this many processes when > 1 (see
+                parallel_mst), defaults to the engine's workers.
+
+        Returns:
+            list: List of clusters, each cluster is a list of book indices.
+        """
+        mst = self.build_mst(books, method, workers)
+        return self.clusters_from_mst(mst, len(books), num_clusters)
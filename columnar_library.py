@@ -0,0 +1,300 @@
+import math
+import re
+import tracemalloc
+from array import array
+from collections.abc import MutableMapping
+
+from book import Book, CSV_FIELDS
+from helpers import Helpers
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")  # NumPy is optional, columns are plain arrays without it
+
+
+INT_MISSING = -2 ** 63  # stored in int columns for empty values
+INT_MAX = 2 ** 63 - 1
+DECIMAL = re.compile(r"-?\d+(?:\.(\d+))?")  # floats written like this are rebuilt with their decimals
+
+
+class ColumnarRow(MutableMapping):
+    """
+    Dictionary-like view of one row of a ColumnarLibrary
+
+    Reads and writes go straight to the library's columns, so code written for
+    csv.DictReader rows (book['title'], book.get('read'), book['read'] = ...) keeps working.
+    """
+    __slots__ = ("store", "position")
+
+    def __init__(self, store, position):
+        self.store = store
+        self.position = position
+
+    def __getitem__(self, field):
+        return self.store.get_value(self.position, field)
+
+    def __setitem__(self, field, value):
+        self.store.set_value(self.position, field, value)
+
+    def __delitem__(self, field):
+        raise TypeError("Columns cannot be removed from a single row")
+
+    def __iter__(self):
+        return iter(self.store.fields())
+
+    def __len__(self):
+        return len(self.store.fields())
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+class ColumnarLibrary:
+    """
+    Column-oriented library store
+
+    Instead of one dict of 15 strings per book, each field is one column:
+    - ratings are array('d') columns (NaN for missing) with an array('b') of the decimals each
+      value was written with, so "5.0" reads back as "5.0"; pages and years are array('q') columns
+    - genre, publisher, binding, age group and read status are stored as array('I') codes into a
+      shared list of distinct values, so every repeated value is kept once, exactly as written
+    - the remaining text fields are plain lists of strings
+
+    A value that the typed column cannot give back unchanged ("0412", "n/a", a number past
+    2^63) is kept as its original string in the row's entry of raw, and wins over the column,
+    which then holds the parsed number or the missing marker. Reading a row always gives back
+    the strings it was built from.
+
+    It behaves like the list of row dictionaries the rest of the program uses: len(), indexing,
+    iteration, append and pop all work and rows are ColumnarRow views.
+    """
+
+    FLOAT_FIELDS = Book.FLOAT_FIELDS
+    INT_FIELDS = Book.INT_FIELDS
+    CATEGORY_FIELDS = ("publisher", "binding", "genre", "age_group", "read")
+
+    def __init__(self):
+        self.columns = {}
+        self.categories = {}
+        self.decimals = {}
+        for field in CSV_FIELDS:
+            if field in self.FLOAT_FIELDS:
+                self.columns[field] = array('d')
+                self.decimals[field] = array('b')  # -1: shortest form, for values set as numbers
+            elif field in self.INT_FIELDS:
+                self.columns[field] = array('q')
+            elif field in self.CATEGORY_FIELDS:
+                self.columns[field] = array('I')
+                self.categories[field] = ([], {})  # (values, value -> code)
+            else:
+                self.columns[field] = []
+        self.extras = []  # per-row dict of fields outside CSV_FIELDS, None when unused
+        self.raw = []  # per-row dict of original strings the columns cannot rebuild, None when unused
+        self.raw_counts = dict.fromkeys(CSV_FIELDS, 0)  # field -> rows with a raw value
+
+    @classmethod
+    def from_rows(cls, rows):
+        """
+        Builds a columnar library from row dictionaries (or Book objects)
+
+        Args:
+            rows (iterable): Rows with the CSV_FIELDS keys
+
+        Returns:
+            ColumnarLibrary: The library
+        """
+        library = cls()
+        for row in rows:
+            library.append(row)
+        return library
+
+    @classmethod
+    def from_csv(cls, csv_file):
+        return cls.from_rows(Helpers.read_csv_as_dict(csv_file))
+
+    def fields(self):
+        return CSV_FIELDS
+
+    def __len__(self):
+        return len(self.columns["title"])
+
+    def __getitem__(self, position):
+        if isinstance(position, slice):
+            return [self[i] for i in range(*position.indices(len(self)))]
+        if position < 0:
+            position += len(self)
+        if not 0 <= position < len(self):
+            raise IndexError("ColumnarLibrary index out of range")
+        return ColumnarRow(self, position)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield ColumnarRow(self, position)
+
+    def _encode(self, field, value):
+        """
+        Returns (stored, decimals, raw): the value for the field's column, the decimals to format a
+        float with (None for other fields) and the original string if decoding would not give it back
+        """
+        if field in self.FLOAT_FIELDS:
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                return float(value), -1, None
+            text = "" if value is None else str(value)
+            number = Book.parse_float(text)
+            match = DECIMAL.fullmatch(text)
+            decimals = len(match[1] or "") if match is not None and len(match[1] or "") < 128 else -1
+            stored = math.nan if number is None else number
+            return stored, decimals, None if self._decode_float(stored, decimals) == text else text
+        if field in self.INT_FIELDS:
+            text = "" if value is None else str(value)
+            number = Book.parse_int(text)
+            if number is None or not INT_MISSING < number <= INT_MAX:
+                return INT_MISSING, None, text or None
+            return number, None, None if str(number) == text else text
+        if field in self.CATEGORY_FIELDS:
+            values, codes = self.categories[field]
+            value = "" if value is None else str(value)
+            if value not in codes:
+                codes[value] = len(values)
+                values.append(value)
+            return codes[value], None, None
+        return "" if value is None else str(value), None, None
+
+    @staticmethod
+    def _decode_float(stored, decimals):
+        if math.isnan(stored):
+            return ""
+        if decimals >= 0 and math.isfinite(stored):
+            return format(stored, f".{decimals}f")
+        return Book.format_value(stored)
+
+    def _decode(self, field, stored, decimals=-1):
+        if field in self.FLOAT_FIELDS:
+            return self._decode_float(stored, decimals)
+        if field in self.INT_FIELDS:
+            return "" if stored == INT_MISSING else str(stored)
+        if field in self.CATEGORY_FIELDS:
+            return self.categories[field][0][stored]
+        return stored
+
+    def decode(self, field, stored):
+        """
+        Returns the CSV string form of a value taken from column(field). Floats come back in their
+        shortest form and raw values are not seen; see has_raw
+        """
+        return self._decode(field, stored)
+
+    def has_raw(self, field):
+        """
+        True if some rows keep field as an original string that column(field) does not show
+        """
+        return self.raw_counts.get(field, 0) > 0
+
+    def append(self, row):
+        raw = None
+        for field in CSV_FIELDS:
+            stored, decimals, original = self._encode(field, row.get(field, ""))
+            self.columns[field].append(stored)
+            if decimals is not None:
+                self.decimals[field].append(decimals)
+            if original is not None:
+                raw = raw or {}
+                raw[field] = original
+                self.raw_counts[field] += 1
+        self.raw.append(raw)
+        extra = {key: value for key, value in row.items() if key not in self.columns}
+        self.extras.append(extra or None)
+
+    def pop(self, position=-1):
+        row = dict(self[position])
+        for column in self.columns.values():
+            column.pop(position)
+        for decimals in self.decimals.values():
+            decimals.pop(position)
+        for field in self.raw.pop(position) or ():
+            self.raw_counts[field] -= 1
+        self.extras.pop(position)
+        return row
+
+    def get_value(self, position, field):
+        if field in self.columns:
+            raw = self.raw[position]
+            if raw is not None and field in raw:
+                return raw[field]
+            if field in self.decimals:
+                return self._decode_float(self.columns[field][position], self.decimals[field][position])
+            return self._decode(field, self.columns[field][position])
+        extra = self.extras[position]
+        if extra is None or field not in extra:
+            raise KeyError(field)
+        return extra[field]
+
+    def set_value(self, position, field, value):
+        if field in self.columns:
+            stored, decimals, original = self._encode(field, value)
+            self.columns[field][position] = stored
+            if decimals is not None:
+                self.decimals[field][position] = decimals
+            raw = self.raw[position]
+            if raw is not None and field in raw:
+                del raw[field]
+                self.raw_counts[field] -= 1
+            if original is not None:
+                if raw is None:
+                    raw = self.raw[position] = {}
+                raw[field] = original
+                self.raw_counts[field] += 1
+            return
+        if self.extras[position] is None:
+            self.extras[position] = {}
+        self.extras[position][field] = value
+
+    def column(self, field):
+        """
+        Returns the raw column for a field: an array for numeric/category/bool fields, a list otherwise
+        """
+        return self.columns[field]
+
+    def as_numpy(self, field):
+        """
+        Returns a numeric column as a NumPy array sharing the column's memory (no copy)
+        """
+        if np is None:
+            raise ImportError("NumPy is required for as_numpy()")
+        column = self.columns[field]
+        if not isinstance(column, array):
+            raise TypeError(f"Field '{field}' is not stored as a numeric column")
+        return np.frombuffer(column, dtype=column.typecode) if len(column) else np.array([], dtype=column.typecode)
+
+    def to_rows(self):
+        return [dict(row) for row in self]
+
+    @staticmethod
+    def memory_report(csv_file):
+        """
+        Measures how much memory the library takes in each layout, using tracemalloc
+
+        Args:
+            csv_file (str): Path to the CSV file to load
+
+        Returns:
+            dict: Bytes used by 'dict rows', 'Book objects' and 'columnar', plus the row count
+        """
+        def measure(build):
+            tracemalloc.start()
+            try:
+                before = tracemalloc.get_traced_memory()[0]
+                result = build()
+                used = tracemalloc.get_traced_memory()[0] - before
+            finally:
+                tracemalloc.stop()
+            return result, used
+
+        rows, dict_bytes = measure(lambda: Helpers.read_csv_as_dict(csv_file))
+        books, book_bytes = measure(lambda: [Book.from_row(row) for row in Helpers.read_csv_as_dict(csv_file)])
+        columnar, columnar_bytes = measure(lambda: ColumnarLibrary.from_csv(csv_file))
+        return {
+            "rows": len(rows),
+            "dict rows": dict_bytes,
+            "Book objects": book_bytes,
+            "columnar": columnar_bytes,
+        }
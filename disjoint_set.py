@@ -0,0 +1,95 @@
+class DisjointSet:
+    """
+    Array-backed union-find over the elements 0..n-1
+
+    find uses path halving (every visited node is re-pointed to its grandparent) and union
+    links the smaller set under the larger one, so any sequence of m operations costs
+    O(m α(n)). Everything is iterative, so long chains never hit Python's recursion limit.
+    """
+
+    def __init__(self, size):
+        self.parent = list(range(size))
+        self.size = [1] * size
+        self.count = size  # number of disjoint sets
+
+    def __len__(self):
+        return len(self.parent)
+
+    def find(self, x):
+        """
+        Find the root of the set containing x.
+
+        Args:
+            x (int): The element to find.
+
+        Returns:
+            int: The root of the set containing x.
+        """
+        parent = self.parent
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    def union(self, x, y):
+        """
+        Merge the sets containing x and y.
+
+        Args:
+            x (int): The first element.
+            y (int): The second element.
+
+        Returns:
+            bool: True if two different sets were merged, False if x and y were already joined.
+        """
+        root_x = self.find(x)
+        root_y = self.find(y)
+        if root_x == root_y:
+            return False
+        if self.size[root_x] < self.size[root_y]:
+            root_x, root_y = root_y, root_x
+        self.parent[root_y] = root_x
+        self.size[root_x] += self.size[root_y]
+        self.count -= 1
+        return True
+
+    def connected(self, x, y):
+        return self.find(x) == self.find(y)
+
+    def find_many(self, elements):
+        """
+        Find the root of every element.
+
+        Args:
+            elements (iterable): The elements to look up.
+
+        Returns:
+            list: The root of each element, in the same order.
+        """
+        find = self.find
+        return [find(x) for x in elements]
+
+    def union_many(self, pairs):
+        """
+        Merge the sets of every (x, y) pair.
+
+        Args:
+            pairs (iterable): Pairs of elements, e.g. (weight, u, v) edges sliced to (u, v).
+
+        Returns:
+            int: The number of pairs that merged two different sets.
+        """
+        union = self.union
+        return sum(1 for x, y in pairs if union(x, y))
+
+    def groups(self):
+        """
+        Group the elements by set.
+
+        Returns:
+            list: One list of elements per set, ordered by the smallest element of each set.
+        """
+        groups = {}
+        for x, root in enumerate(self.find_many(range(len(self.parent)))):
+            groups.setdefault(root, []).append(x)
+        return list(groups.values())
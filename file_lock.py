@@ -0,0 +1,78 @@
+import os
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # not available on Windows, locking is then skipped
+    fcntl = None
+
+
+class LibraryConflictError(Exception):
+    """
+    Raised when another process changed the library between our last read and a write that
+    depends on it. The in-memory library has been reloaded; the change should be retried
+    """
+
+
+class FileLock:
+    """
+    Advisory lock shared by every process using the same CSV, held on a separate lock file
+    (books.csv -> books.csv.lock) so that replacing the CSV itself never drops the lock
+
+    Readers take it shared, writers exclusive, with fcntl.flock. The lock is re-entrant within
+    one FileLock object: nested shared or exclusive sections inside an exclusive one, and nested
+    shared sections inside a shared one, don't lock again. Upgrading a shared section to an
+    exclusive one is not allowed because two processes doing it at once would deadlock.
+    """
+
+    SUFFIX = ".lock"
+
+    def __init__(self, csv_file):
+        self.path = csv_file + self.SUFFIX
+        self.file = None
+        self.mode = None  # "shared" or "exclusive" while held
+        self.depth = 0
+
+    @contextmanager
+    def _hold(self, exclusive):
+        if self.depth:
+            if exclusive and self.mode != "exclusive":
+                raise RuntimeError("Cannot upgrade a shared library lock to an exclusive one")
+            self.depth += 1
+            try:
+                yield
+            finally:
+                self.depth -= 1
+            return
+
+        if fcntl is not None:
+            directory = os.path.dirname(os.path.abspath(self.path))
+            os.makedirs(directory, exist_ok=True)
+            self.file = open(self.path, 'a')
+            fcntl.flock(self.file.fileno(), fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        self.mode = "exclusive" if exclusive else "shared"
+        self.depth = 1
+        try:
+            yield
+        finally:
+            self.depth = 0
+            self.mode = None
+            if self.file is not None:
+                fcntl.flock(self.file.fileno(), fcntl.LOCK_UN)
+                self.file.close()
+                self.file = None
+
+    def shared(self):
+        """
+        Context manager for reading the CSV and its journal as one consistent state
+        """
+        return self._hold(exclusive=False)
+
+    def exclusive(self):
+        """
+        Context manager for changing the CSV or its journal
+        """
+        return self._hold(exclusive=True)
+
+    def held(self):
+        return self.depth > 0
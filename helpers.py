@@ -1,5 +1,7 @@
 import csv
 import os
+import tempfile
+from book import CSV_FIELDS
 
 class Helpers:
     @staticmethod
@@ -16,6 +18,51 @@ class Helpers:
         
         return books
 
+    @staticmethod
+    def iter_csv_rows(csv_file, fields=None, line_numbers=False):
+        '''
+        INTENT: Stream csv_file one row at a time instead of loading it into a list
+        fields: optional list of columns to keep (projection); all columns if None
+        line_numbers: if True, yield (line number, row) pairs, where the line number is the file
+        line the row starts on (blank lines and newlines inside quoted fields are counted)
+        Only the requested columns are copied into each row, so memory stays constant no matter
+        how large the file is
+        YIELDS one dictionary per row
+        '''
+        if not os.path.exists(csv_file):
+            print(f"File {csv_file} does not exist.")
+            return
+
+        with open(csv_file, mode='r', newline='', encoding='utf-8') as file:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                return
+            wanted = header if fields is None else fields
+            missing = [field for field in wanted if field not in header]
+            if missing:
+                raise KeyError(f"{csv_file} has no column(s): {', '.join(missing)}")
+            columns = [(field, header.index(field)) for field in wanted]
+            start = reader.line_num + 1
+            for values in reader:
+                if values:
+                    row = {field: values[i] if i < len(values) else '' for field, i in columns}
+                    yield (start, row) if line_numbers else row
+                start = reader.line_num + 1
+
+    @staticmethod
+    def file_signature(csv_file):
+        '''
+        INTENT: Cheap fingerprint of csv_file used to decide whether it changed on disk
+        RETURNS (mtime_ns, size, inode) of csv_file, or None if the file does not exist
+        The inode changes on every atomic rewrite, which catches rewrites that keep the size and
+        land within the filesystem's mtime granularity
+        '''
+        try:
+            stat = os.stat(csv_file)
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
 
     @staticmethod
     def divide_books(book_list):
@@ -39,10 +86,33 @@ class Helpers:
         mid = len(book_list) // 2
         return book_list[:mid], book_list[mid:]
 
+    @staticmethod
+    def copy_permissions(source, target):
+        '''
+        INTENT: Give target the permission bits of source
+        tempfile.mkstemp creates its files readable by the owner only; files renamed into place next
+        to the CSV should be as readable as the CSV itself. Does nothing if source does not exist
+        '''
+        if source and os.path.exists(source):
+            os.chmod(target, os.stat(source).st_mode & 0o777)
+
     @staticmethod
     def rewrite_csv(csv_file, books):
-        with open(csv_file, mode='w', newline='', encoding='utf-8') as file:
-            fieldnames = books[0].keys()
-            writer = csv.DictWriter(file, fieldnames=fieldnames)
-            writer.writeheader()
-            writer.writerows(books)
\ No newline at end of file
+        '''
+        INTENT: Replace csv_file with books
+        The rows are written to a temporary file in the same directory which is then renamed over
+        csv_file, so readers see either the old or the new file, never a half-written one
+        '''
+        directory = os.path.dirname(os.path.abspath(csv_file))
+        handle, temp_file = tempfile.mkstemp(dir=directory, prefix=".books-", suffix=".csv")
+        try:
+            with os.fdopen(handle, mode='w', newline='', encoding='utf-8') as file:
+                fieldnames = books[0].keys() if books else CSV_FIELDS
+                writer = csv.DictWriter(file, fieldnames=fieldnames)
+                writer.writeheader()
+                writer.writerows(books)
+            Helpers.copy_permissions(csv_file, temp_file)
+            os.replace(temp_file, csv_file)
+        except BaseException:
+            os.remove(temp_file)
+            raise
\ No newline at end of file
@@ -0,0 +1,123 @@
+import json
+import os
+
+from helpers import Helpers
+
+
+class ChangeJournal:
+    """
+    Append-only log of edits and deletions, stored next to the CSV (books.csv -> books.csv.journal)
+
+    Editing or deleting one book appends a single JSON line here instead of rewriting the whole
+    CSV, so it costs O(1) I/O. On load the entries are replayed, in order, on top of the rows
+    read from the CSV. Once the journal grows past threshold bytes it is compacted: the current
+    library is written to a new CSV which atomically replaces the old one, and the journal is
+    cleared.
+
+    Entries refer to books by their position in the library at the time of the change, plus
+    the title as a sanity check. Books appended to the CSV never move existing positions, so
+    appends and journal entries can be mixed freely.
+    """
+
+    SUFFIX = ".journal"
+    COMPACT_THRESHOLD_BYTES = 1 << 20
+
+    def __init__(self, csv_file, threshold=COMPACT_THRESHOLD_BYTES):
+        self.csv_file = csv_file
+        self.path = csv_file + self.SUFFIX
+        self.threshold = threshold
+
+    def size(self):
+        try:
+            return os.path.getsize(self.path)
+        except FileNotFoundError:
+            return 0
+
+    def signature(self):
+        return Helpers.file_signature(self.path)
+
+    def needs_compaction(self):
+        return self.size() > self.threshold
+
+    def _append(self, entry):
+        with open(self.path, mode='a', encoding='utf-8') as file:
+            file.write(json.dumps(entry) + "\n")
+            file.flush()
+            os.fsync(file.fileno())
+
+    def record_edit(self, position, title, fields):
+        """
+        Logs new values for some fields of the book at position
+
+        Args:
+            position (int): Position of the book in the library
+            title (str): Title of the book before the edit
+            fields (dict): Changed fields and their new values
+        """
+        self._append({"op": "edit", "position": position, "title": title,
+                      "fields": {field: "" if value is None else str(value) for field, value in fields.items()}})
+
+    def record_delete(self, position, title):
+        """
+        Logs a tombstone for the book at position
+
+        Args:
+            position (int): Position of the book in the library
+            title (str): Title of the deleted book
+        """
+        self._append({"op": "delete", "position": position, "title": title})
+
+    def entries(self):
+        """
+        Yields the journal entries in order. A torn last line (crash mid-write) is ignored
+        """
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, mode='r', encoding='utf-8') as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    print(f"Skipping unreadable journal entry in {self.path}")
+
+    def replay(self, library):
+        """
+        Applies the journal to a freshly loaded library, in place
+
+        Args:
+            library (list): The rows read from the CSV
+
+        Returns:
+            int: The number of entries applied
+        """
+        applied = 0
+        for entry in self.entries():
+            position = entry.get("position")
+            if not isinstance(position, int) or not 0 <= position < len(library) \
+                    or library[position]['title'] != entry.get("title"):
+                print(f"Skipping journal entry that no longer matches the CSV: {entry}")
+                continue
+            if entry["op"] == "delete":
+                library.pop(position)
+            elif entry["op"] == "edit":
+                for field, value in entry["fields"].items():
+                    library[position][field] = value
+            applied += 1
+        return applied
+
+    def compact(self, library):
+        """
+        Folds the journal into the CSV: writes library to a new CSV that atomically replaces the
+        old one, then clears the journal
+
+        Args:
+            library (list): The current library (CSV rows with the journal applied)
+        """
+        Helpers.rewrite_csv(self.csv_file, library)
+        self.clear()
+
+    def clear(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
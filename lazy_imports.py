@@ -0,0 +1,37 @@
+import importlib.util
+import sys
+
+
+def lazy_import(name):
+    """
+    Imports a module without running it: the module body only runs on first attribute access.
+    Only used for NumPy, which costs more to import than small libraries take to load and is
+    only needed for large ones; cheap standard-library modules are imported normally
+
+    Args:
+        name (str): Module name, e.g. "numpy"
+
+    Returns:
+        module: The (lazy) module, or None if it is not installed, like the usual
+        try/except ImportError fallback
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return None
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
+
+
+def tabulate(*args, **kwargs):
+    """
+    tabulate.tabulate, imported on the first table printed rather than at startup
+    """
+    from tabulate import tabulate as render_table
+    return render_table(*args, **kwargs)
@@ -0,0 +1,388 @@
+"""
+Local HTTP/JSON service over a library that stays loaded in memory
+
+    python library_server.py [--csv data/books.csv] [--host 127.0.0.1] [--port 8765]
+
+Queries (GET) are answered straight from the warm library and its index:
+
+    /health
+    /books?title=...  /books?author=...  /books?isbn=...  /books?prefix=...  (&limit=N)
+    /search?q=...&limit=N              ranked full-text search (MyLibraryManager.search_books)
+    /shelves                           age-group shelves (Sorting.bucket_sort_books)
+    /plan?speed=40&hours=20&mode=exact one reading plan; several speed=/hours= give a what-if table
+    /clusters?k=4&method=linkage
+    /similar?title=...&k=5             most similar books, several title= for a batch
+    /summary?speed=40                  reading summary (StreamingStats.reading_summary)
+    /validate                          invalid values per field and the books holding them
+
+Mutations (POST, JSON body) go through a single writer queue, so they are applied one at a
+time, in arrival order, and never interleave with each other:
+
+    /books          a book object or a list of them            -> add_books
+    /books/edit     {"title": ..., "changes": {...}}          -> edit_book_fields
+    /books/delete   {"title": ...}                            -> delete_book
+    /sort           {"fields": ["-avg_rating", "title"]}      -> sort_library
+
+GET responses are cached until the library changes. Changes made by other processes are picked
+up on the next request (the CSV and journal signatures are checked first). The slow queries
+(/search, /plan, /clusters, /validate) run in a worker thread, so they do not hold up other connections;
+mutations and reloads wait until no query is running. Standard library only.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from file_lock import LibraryConflictError
+from MyLibraryManager import MyLibraryManager
+from scheduler import ReadingScheduler
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class LibraryServer:
+    """
+    asyncio HTTP/1.1 server (keep-alive, JSON in and out) around one MyLibraryManager
+    """
+
+    REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+               409: "Conflict", 413: "Payload Too Large", 500: "Internal Server Error"}
+    MAX_BODY_BYTES = 64 << 20
+    MAX_CACHED_RESPONSES = 1024
+
+    def __init__(self, manager):
+        self.manager = manager
+        self.writes = asyncio.Queue()
+        self.response_cache = {}  # target -> encoded body, valid for cache_version
+        self.cache_version = None
+        # Queries share the library, mutations and reloads need it to themselves
+        self.access = asyncio.Condition()
+        self.readers = 0
+        self.writers = 0  # waiting or writing; new queries wait behind them
+        # One thread, so two slow queries never build the same lazy index at once
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="library-query")
+        self.routes = {
+            ("GET", "/health"): self.health,
+            ("GET", "/books"): self.search,
+            ("GET", "/search"): self.full_text,
+            ("GET", "/shelves"): self.shelves,
+            ("GET", "/plan"): self.plan,
+            ("GET", "/clusters"): self.clusters,
+            ("GET", "/similar"): self.similar,
+            ("GET", "/summary"): self.summary,
+            ("GET", "/validate"): self.validate,
+            ("POST", "/books"): self.add,
+            ("POST", "/books/edit"): self.edit,
+            ("POST", "/books/delete"): self.delete,
+            ("POST", "/sort"): self.sort,
+        }
+        self.threaded = {self.full_text, self.plan, self.clusters, self.validate}  # too slow to run on the event loop
+
+    # --- queries -------------------------------------------------------------------------
+
+    @staticmethod
+    def rows(books):
+        return [dict(book) for book in books]
+
+    @staticmethod
+    def number(query, name, default=None, kind=float):
+        values = query.get(name)
+        if not values:
+            if default is None:
+                raise HTTPError(400, f"Missing parameter '{name}'")
+            return default
+        try:
+            return kind(values[0])
+        except ValueError:
+            raise HTTPError(400, f"Parameter '{name}' must be a number")
+
+    def health(self, query):
+        return {"books": len(self.manager.library), "version": self.manager.library_version}
+
+    def search(self, query):
+        manager = self.manager
+        limit = self.number(query, "limit", 100, int)
+        if "title" in query:
+            books = [manager.library[position] for position in manager.index.find_title(query["title"][0])]
+        elif "author" in query:
+            books = manager.find_books_by_author(query["author"][0])
+        elif "isbn" in query:
+            book = manager.find_book_by_isbn(query["isbn"][0])
+            books = [book] if book is not None else []
+        elif "prefix" in query:
+            books = manager.find_books_by_title_prefix(query["prefix"][0])
+        else:
+            raise HTTPError(400, "Search by title, author, isbn or prefix")
+        return {"count": len(books), "books": self.rows(books[:limit])}
+
+    def full_text(self, query):
+        if not query.get("q"):
+            raise HTTPError(400, "Missing parameter 'q'")
+        results = self.manager.search_books(query["q"][0], self.number(query, "limit", 10, int))
+        return {"books": [dict(book, score=score) for book, score in results]}
+
+    def shelves(self, query):
+        buckets = self.manager.shelf_cache.get(self.manager.library, self.manager.library_version)
+        return {age_group: self.rows(books) for age_group, books in buckets.items()}
+
+    def plan(self, query):
+        speeds = [float(speed) for speed in query.get("speed", [])]
+        budgets = [float(hours) for hours in query.get("hours", [])]
+        if not speeds or not budgets:
+            raise HTTPError(400, "Pass at least one speed= and one hours=")
+        mode = query.get("mode", ["greedy"])[0]
+        if mode not in ReadingScheduler.MODES:
+            raise HTTPError(400, f"mode must be one of {', '.join(ReadingScheduler.MODES)}")
+        if len(speeds) > 1 or len(budgets) > 1:
+            return {"plans": self.manager.what_if_plans(speeds, budgets, show=False)}
+        result = self.manager.plan_reading(speeds[0], budgets[0], mode)
+        return dict(result, books=self.rows(result["books"]))
+
+    def clusters(self, query):
+        k = self.number(query, "k", kind=int)
+        method = query.get("method", [None])[0]
+        if method not in (None, "linkage", "prim"):
+            raise HTTPError(400, "method must be linkage or prim")
+        return {"clusters": [self.rows(cluster) for cluster in self.manager.cluster_books(k, method)]}
+
+    def similar(self, query):
+        if not query.get("title"):
+            raise HTTPError(400, "Missing parameter 'title'")
+        results = self.manager.similar_books(query["title"], self.number(query, "k", 5, int))
+        return {title: None if similar is None else [dict(book, similarity=similarity) for book, similarity in similar]
+                for title, similar in results.items()}
+
+    def summary(self, query):
+        return self.manager.reading_summary(self.number(query, "speed", 40.0))
+
+    def validate(self, query):
+        invalid = self.manager.invalid_books()
+        return {"issues": {field: len(positions) for field, positions in self.manager.validation_issues.items()},
+                "books": [{"position": position, "title": title, "field": field, "value": value}
+                          for position, title, field, value in invalid]}
+
+    # --- mutations (run by the writer task only) ----------------------------------------
+
+    def add(self, body):
+        rows = body if isinstance(body, list) else [body]
+        if not all(isinstance(row, dict) for row in rows):
+            raise HTTPError(400, "Expected a book object or a list of them")
+        added, rejected = self.manager.add_books(rows)
+        return {"added": len(added),
+                "rejected": [{"index": number - 1, "errors": errors} for number, _, errors in rejected]}
+
+    @staticmethod
+    def require_object(body, *fields):
+        if not isinstance(body, dict) or any(field not in body for field in fields):
+            raise HTTPError(400, f"Expected a JSON object with {', '.join(fields)}")
+
+    def edit(self, body):
+        self.require_object(body, "title", "changes")
+        if not isinstance(body["changes"], dict):
+            raise HTTPError(400, "Expected {\"title\": ..., \"changes\": {...}}")
+        book = self.manager.edit_book_fields(body.get("title"), body["changes"])
+        if book is None:
+            raise HTTPError(404, f"Book titled '{body.get('title')}' not found")
+        return {"book": dict(book)}
+
+    def delete(self, body):
+        self.require_object(body, "title")
+        if not self.manager.delete_book(body.get("title")):
+            raise HTTPError(404, f"Book titled '{body.get('title')}' not found")
+        return {"deleted": body.get("title")}
+
+    def sort(self, body):
+        self.require_object(body, "fields")
+        fields = body["fields"]
+        if not isinstance(fields, list) or not fields or not all(isinstance(field, str) for field in fields):
+            raise HTTPError(400, "fields must be a non-empty list of field names")
+        self.manager.sort_library(fields)
+        return {"sorted": len(self.manager.library)}
+
+    async def writer(self):
+        """
+        The single writer: applies queued mutations one at a time and resolves their futures
+        """
+        while True:
+            handler, body, future = await self.writes.get()
+            try:
+                async with self.exclusive():
+                    result = handler(body)
+            except Exception as e:
+                if not future.cancelled():
+                    future.set_exception(e)
+            else:
+                if not future.cancelled():
+                    future.set_result(result)
+            finally:
+                self.writes.task_done()
+
+    @contextlib.asynccontextmanager
+    async def shared(self):
+        async with self.access:
+            await self.access.wait_for(lambda: not self.writers)
+            self.readers += 1
+        try:
+            yield
+        finally:
+            async with self.access:
+                self.readers -= 1
+                self.access.notify_all()
+
+    @contextlib.asynccontextmanager
+    async def exclusive(self):
+        async with self.access:
+            self.writers += 1
+            try:
+                await self.access.wait_for(lambda: not self.readers)
+            except BaseException:
+                self.writers -= 1
+                self.access.notify_all()
+                raise
+        try:
+            yield  # runs on the event loop thread, so nothing else touches the manager meanwhile
+        finally:
+            async with self.access:
+                self.writers -= 1
+                self.access.notify_all()
+
+    # --- HTTP ----------------------------------------------------------------------------
+
+    async def dispatch(self, method, target, body):
+        parts = urlsplit(target)
+        handler = self.routes.get((method, parts.path))
+        if handler is None:
+            if any(path == parts.path for _, path in self.routes):
+                raise HTTPError(405, f"{method} is not supported on {parts.path}")
+            raise HTTPError(404, f"No endpoint {parts.path}")
+
+        if method == "POST":
+            try:
+                payload = json.loads(body or b"{}")
+            except json.JSONDecodeError as e:
+                raise HTTPError(400, f"Invalid JSON: {e.msg}")
+            future = asyncio.get_running_loop().create_future()
+            await self.writes.put((handler, payload, future))
+            return json.dumps(await future).encode()
+
+        manager = self.manager
+        if manager.needs_refresh():
+            async with self.exclusive():  # another process wrote (or nothing is loaded yet): reload
+                manager.refresh_library()
+        if self.cache_version != manager.library_version:
+            self.response_cache.clear()
+            self.cache_version = manager.library_version
+        response = self.response_cache.get(target)
+        if response is None:
+            async with self.shared():
+                version = manager.library_version
+                query = parse_qs(parts.query)
+                if handler in self.threaded:
+                    result = await asyncio.get_running_loop().run_in_executor(self.executor, handler, query)
+                else:
+                    result = handler(query)
+            response = json.dumps(result).encode()
+            if version == self.cache_version:
+                if len(self.response_cache) >= self.MAX_CACHED_RESPONSES:
+                    self.response_cache.clear()
+                self.response_cache[target] = response
+        return response
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                status = 200
+                try:
+                    length = int(headers.get("content-length", 0))
+                    if length > self.MAX_BODY_BYTES:
+                        raise HTTPError(413, "Request body too large")
+                    body = await reader.readexactly(length) if length else b""
+                    response = await self.dispatch(method, target, body)
+                except HTTPError as e:
+                    status, response = e.status, json.dumps({"error": str(e)}).encode()
+                except LibraryConflictError as e:
+                    status, response = 409, json.dumps({"error": str(e)}).encode()
+                except ValueError as e:
+                    status, response = 400, json.dumps({"error": str(e)}).encode()
+                except asyncio.IncompleteReadError:
+                    break
+                except Exception as e:
+                    status, response = 500, json.dumps({"error": f"{type(e).__name__}: {e}"}).encode()
+
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                writer.write(
+                    f"HTTP/1.1 {status} {self.REASONS.get(status, 'Error')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(response)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1") + response)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host, port, ready=None):
+        """
+        Runs the server until cancelled
+
+        Args:
+            host (str): Interface to listen on
+            port (int): Port to listen on, 0 for any free port
+            ready (callable): Called with the bound port once the server accepts connections
+        """
+        writer_task = asyncio.create_task(self.writer())
+        server = await asyncio.start_server(self.handle, host, port)
+        port = server.sockets[0].getsockname()[1]
+        if ready is not None:
+            ready(port)
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            writer_task.cancel()
+            self.executor.shutdown(wait=True)
+            self.manager.search_index.save()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the library as a local JSON API.")
+    parser.add_argument("--csv", default="data/books.csv", help="library CSV file (default: data/books.csv)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--columnar", action="store_true", help="keep the library in the compact columnar layout")
+    args = parser.parse_args(argv)
+
+    manager = MyLibraryManager(args.csv, columnar=args.columnar)
+    server = LibraryServer(manager)
+    ready = lambda port: print(f"Serving {len(manager.library)} books on http://{args.host}:{port}", flush=True)
+    try:
+        asyncio.run(server.serve(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,6 @@
+from disjoint_set import DisjointSet
+
+
 class MSTClustering:
     def calculate_similarity(self, book1, book2):
         """
@@ -34,43 +37,6 @@ class MSTClustering:
                     edges.append((-similarity, i, j))  # Use negative similarity for MST
         return edges
 
-    def find(self, parent, i):
-        """
-        Find the root of the set in which element i is located.
-
-        Args:
-            parent (list): List representing the parent of each element.
-            i (int): The element to find.
-
-        Returns:
-            int: The root of the set containing element i.
-        """
-        if parent[i] == i:
-            return i
-        else:
-            return self.find(parent, parent[i])
-
-    def union(self, parent, rank, x, y):
-        """
-        Perform the union of two sets.
-
-        Args:
-            parent (list): List representing the parent of each element.
-            rank (list): List representing the rank of each element.
-            x (int): The first element.
-            y (int): The second element.
-        """
-        root_x = self.find(parent, x)
-        root_y = self.find(parent, y)
-
-        if rank[root_x] < rank[root_y]:
-            parent[root_x] = root_y
-        elif rank[root_x] > rank[root_y]:
-            parent[root_y] = root_x
-        else:
-            parent[root_y] = root_x
-            rank[root_x] += 1
-
     def build_mst(self, edges, num_books):
         """
         Build the Minimum Spanning Tree (MST) using Kruskal's algorithm.
@@ -83,15 +49,15 @@ class MSTClustering:
             list: List of edges in the MST.
         """
         edges.sort()
-        parent = list(range(num_books))
-        rank = [0] * num_books
+        components = DisjointSet(num_books)
         mst = []
 
         for edge in edges:
             weight, u, v = edge
-            if self.find(parent, u) != self.find(parent, v):
-                self.union(parent, rank, u, v)
+            if components.union(u, v):
                 mst.append(edge)
+                if components.count == 1:
+                    break
 
         return mst
 
@@ -117,15 +83,7 @@ class MSTClustering:
             mst.pop(0)
 
         # Extract clusters
-        parent = list(range(len(books)))
-        for weight, u, v in mst:
-            self.union(parent, [0] * len(books), u, v)
-
-        clusters = {}
-        for i in range(len(books)):
-            root = self.find(parent, i)
-            if root not in clusters:
-                clusters[root] = []
-            clusters[root].append(i)
-
-        return list(clusters.values())
\ No newline at end of file
+        components = DisjointSet(len(books))
+        components.union_many((u, v) for weight, u, v in mst)
+
+        return components.groups()
\ No newline at end of file
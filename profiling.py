@@ -0,0 +1,220 @@
+import atexit
+import contextlib
+import functools
+import os
+import sys
+import time
+import tracemalloc
+
+from lazy_imports import tabulate
+
+
+class Profiler:
+    """
+    Opt-in timing instrumentation for menu operations and the heavy internals
+
+    Turned on with the LIBRARY_PROFILE=1 environment variable (or --profile on cli.py). When on:
+
+    - every operation dispatched from the menu or the CLI is timed as a section
+    - the functions listed by targets() are wrapped so each call records wall time, rows processed and
+      peak traced memory (tracemalloc). Recursive calls (merge_sort) count once, at the top
+    - with LIBRARY_PROFILE_OUT=file (--profile-out), the whole session also runs under cProfile
+      and the stats are dumped to that file, for `python -m pstats file` or snakeviz
+    - counters bumped with count() (e.g. CSV reloads avoided) are listed under the summary table,
+      which is printed to stderr when the program exits
+
+    When off, nothing is wrapped and section() returns a shared null context, so the cost is one
+    attribute check per menu choice.
+    """
+
+    ENV_FLAG = "LIBRARY_PROFILE"
+    ENV_OUTPUT = "LIBRARY_PROFILE_OUT"
+
+    def __init__(self):
+        self.enabled = False
+        self.stats = {}  # name -> [calls, seconds, max seconds, rows, peak bytes]
+        self.counters = {}  # name -> count, for events that take no time worth measuring
+        self.peaks = []  # running peak of every open section, innermost last
+        self.depth = {}  # name -> open calls, so recursion is only timed at the outermost call
+        self.patched = []  # (owner, attribute, original) to undo in disable()
+        self.cprofile = None
+        self.output = None
+
+    @staticmethod
+    def targets():
+        """
+        Returns:
+            list: (owner, attribute, rows) for every function to instrument, where rows(args, result)
+            gives the number of rows the call processed (args include self for methods)
+        """
+        from helpers import Helpers
+        from sorting import Sorting
+        from mst_clustering import MSTClustering
+        from cluster_engine import ClusterEngine
+        from columnar_library import ColumnarLibrary
+
+        returned = lambda args, result: len(result)
+        first = lambda args, result: len(args[0])
+        second = lambda args, result: len(args[1])
+        return [
+            (Helpers, "read_csv_as_dict", returned),
+            (ColumnarLibrary, "from_csv", returned),
+            (Helpers, "rewrite_csv", second),
+            (MSTClustering, "apply_greedy", second),
+            (ClusterEngine, "apply_greedy", second),
+            (Sorting, "merge_sort", first),
+            (Sorting, "typed_merge_sort", first),
+        ]
+
+    def enable(self, output=None):
+        """
+        Wraps the targets, starts tracemalloc and, if output is given, cProfile
+
+        Args:
+            output (str): File to dump the cProfile stats to when the session ends
+        """
+        if self.enabled:
+            return
+        import cProfile
+        import inspect
+
+        self.enabled = True
+        self.output = output
+        for owner, attribute, rows in self.targets():
+            original = inspect.getattr_static(owner, attribute)
+            function = original.__func__ if isinstance(original, (staticmethod, classmethod)) else original
+            wrapper = self.wrap(f"{owner.__name__}.{attribute}", function, rows)
+            if isinstance(original, staticmethod):
+                wrapper = staticmethod(wrapper)
+            elif isinstance(original, classmethod):
+                wrapper = classmethod(wrapper)
+            setattr(owner, attribute, wrapper)
+            self.patched.append((owner, attribute, original))
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+        if output:
+            self.cprofile = cProfile.Profile()
+            self.cprofile.enable()
+        atexit.register(self.finish)
+
+    def disable(self):
+        """
+        Restores the original functions and stops tracing. The recorded stats are kept
+        """
+        if not self.enabled:
+            return
+        for owner, attribute, original in reversed(self.patched):
+            setattr(owner, attribute, original)
+        self.patched = []
+        if self.cprofile is not None:
+            self.cprofile.disable()
+        tracemalloc.stop()
+        self.enabled = False
+
+    @classmethod
+    def from_environment(cls, flag=False, output=None):
+        """
+        Enables the shared profiler if flag is set or LIBRARY_PROFILE is set to a non-empty value
+        other than 0
+
+        Returns:
+            Profiler: The shared profiler
+        """
+        output = output or os.environ.get(cls.ENV_OUTPUT) or None
+        if flag or output or os.environ.get(cls.ENV_FLAG, "") not in ("", "0"):
+            profiler.enable(output)
+        return profiler
+
+    def wrap(self, name, function, rows):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if self.depth.get(name):
+                return function(*args, **kwargs)
+            with self.measure(name) as record:
+                result = function(*args, **kwargs)
+                try:
+                    record.append(rows(args, result))
+                except (TypeError, IndexError):
+                    pass
+            return result
+        return wrapper
+
+    @contextlib.contextmanager
+    def measure(self, name):
+        """
+        Records one call of name: wall time, peak traced memory and, if the body appends it to
+        the yielded list, the number of rows processed
+        """
+        self.depth[name] = self.depth.get(name, 0) + 1
+        if self.peaks:
+            self.peaks[-1] = max(self.peaks[-1], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        self.peaks.append(0)
+        record = []
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            elapsed = time.perf_counter() - start
+            peak = max(self.peaks.pop(), tracemalloc.get_traced_memory()[1])
+            if self.peaks:
+                self.peaks[-1] = max(self.peaks[-1], peak)
+            self.depth[name] -= 1
+            stats = self.stats.setdefault(name, [0, 0.0, 0.0, 0, 0])
+            stats[0] += 1
+            stats[1] += elapsed
+            stats[2] = max(stats[2], elapsed)
+            stats[3] += record[0] if record else 0
+            stats[4] = max(stats[4], peak)
+
+    def section(self, name):
+        """
+        Context manager timing one operation (e.g. a menu choice). A no-op when profiling is off
+        """
+        if not self.enabled:
+            return NULL_SECTION
+        return self.measure(name)
+
+    def count(self, name, amount=1):
+        """
+        Adds amount to the session counter name. A no-op when profiling is off
+        """
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def summary_rows(self):
+        rows = []
+        for name, (calls, seconds, longest, processed, peak) in sorted(
+                self.stats.items(), key=lambda item: item[1][1], reverse=True):
+            rows.append([name, calls, f"{seconds:.4f}", f"{seconds / calls * 1000:.2f}", f"{longest * 1000:.2f}",
+                         processed or "", f"{peak / (1 << 20):.1f}"])
+        return rows
+
+    def report(self, file=None):
+        """
+        Prints the per-session summary table (to stderr by default)
+        """
+        if not self.stats and not self.counters:
+            return
+        file = file or sys.stderr
+        headers = ["Operation", "Calls", "Total s", "Mean ms", "Max ms", "Rows", "Peak MB"]
+        print("\nProfile summary:", file=file)
+        if self.stats:
+            print(tabulate(self.summary_rows(), headers=headers, tablefmt="pretty"), file=file)
+        for name, value in sorted(self.counters.items()):
+            print(f"{name}: {value}", file=file)
+
+    def finish(self):
+        """
+        Ends the session: dumps the cProfile stats if requested and prints the summary
+        """
+        if self.cprofile is not None:
+            self.cprofile.disable()
+            self.cprofile.dump_stats(self.output)
+            print(f"cProfile stats written to {self.output}", file=sys.stderr)
+            self.cprofile = None
+        self.report()
+
+
+NULL_SECTION = contextlib.nullcontext()
+profiler = Profiler()
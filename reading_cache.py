@@ -0,0 +1,103 @@
+from collections import OrderedDict
+
+
+class ReadingTimeCache:
+    """
+    Bounded LRU cache of reading-time estimates that lives as long as the manager
+
+    Entries are keyed by book identity (title, author) and reading speed. Each entry remembers
+    the book's num_pages and read status when it was computed; if either changed, the entry is
+    treated as a miss and recomputed, so only books that actually changed cost anything when
+    the same "what if I read N pages/hour" question is asked again.
+    """
+
+    def __init__(self, maxsize=100_000):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()  # (book_id, pages_per_hour) -> (fingerprint, hours)
+        self.speeds_by_book = {}  # book_id -> set of pages_per_hour cached for it
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def book_id(book):
+        return book.get('title'), book.get('author_first_last')  # Using title and author as a unique identifier
+
+    @staticmethod
+    def fingerprint(book):
+        return book.get('num_pages'), book.get('read')
+
+    def get_hours(self, book, pages_per_hour):
+        """
+        PRECONDITION: book is a dictionary containing book details, pages_per_hour is a positive float
+        RETURNS: hours_for_book, the time required to read the book
+        POST: the estimate is cached until the book's num_pages or read status changes
+
+        Args:
+            book (dict): A dictionary containing book details
+            pages_per_hour (float): The reading speed in pages per hour
+
+        Returns:
+            float: The time required to read the book
+        """
+        book_id = self.book_id(book)
+        key = (book_id, pages_per_hour)
+        fingerprint = self.fingerprint(book)
+        entry = self.entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        hours_for_book = int(book.get('num_pages') or 0) / pages_per_hour
+        self.entries[key] = (fingerprint, hours_for_book)
+        self.entries.move_to_end(key)
+        self.speeds_by_book.setdefault(book_id, set()).add(pages_per_hour)
+        while len(self.entries) > self.maxsize:
+            (old_id, old_speed), _ = self.entries.popitem(last=False)
+            self._forget_speed(old_id, old_speed)
+            self.evictions += 1
+        return hours_for_book
+
+    def total_hours(self, books, pages_per_hour):
+        return sum(self.get_hours(book, pages_per_hour) for book in books)
+
+    def _forget_speed(self, book_id, pages_per_hour):
+        speeds = self.speeds_by_book.get(book_id)
+        if speeds is not None:
+            speeds.discard(pages_per_hour)
+            if not speeds:
+                del self.speeds_by_book[book_id]
+
+    def invalidate(self, book):
+        """
+        Drops every cached estimate for book (all reading speeds)
+
+        Args:
+            book (dict): The book as it was cached (title and author identify it)
+        """
+        book_id = self.book_id(book)
+        for pages_per_hour in self.speeds_by_book.pop(book_id, ()):
+            if self.entries.pop((book_id, pages_per_hour), None) is not None:
+                self.invalidations += 1
+
+    def clear(self):
+        self.entries.clear()
+        self.speeds_by_book.clear()
+
+    def stats(self):
+        """
+        Returns:
+            dict: hits, misses, hit rate, evictions, invalidations and current size
+        """
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations,
+            'size': len(self.entries),
+        }
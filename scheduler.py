@@ -0,0 +1,225 @@
+import math
+from bisect import bisect_right
+
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")  # NumPy is optional, the DP falls back to plain lists
+
+
+class ReadingScheduler:
+    """
+    Picks which unread books to read in the hours available, maximizing the total average rating
+
+    Modes:
+    - "greedy": highest value per hour first, one pass after sorting, O(n log n). Same picks as
+      the original augment_greedily/schedule_from loop, but the time left is counted in whole
+      pages like the other modes, so a book that fits to the last page is never lost to float
+      rounding of the hours.
+    - "exact": 0/1 knapsack by dynamic programming. Hours are discretized into page steps
+      (hours * pages_per_hour pages, `page_step` pages per step, each book rounded up so the
+      schedule always fits). With the default of one page per step this is exact. O(n*H) time.
+      The value row is O(H), but reconstructing the chosen books needs a take table of one bit
+      per (book, step) (one byte without NumPy), so memory is O(n*H) bits overall.
+    - "bnb": branch and bound on whole pages (no discretization), pruning with the fractional
+      knapsack bound. Stops after max_nodes and returns the best schedule found so far.
+
+    Every result reports the value achieved next to the optimum (or the fractional upper bound
+    when the optimum was not computed), and the books' rows are never modified.
+    """
+
+    MODES = ("greedy", "exact", "bnb")
+
+    def __init__(self, page_step=1, max_nodes=1_000_000):
+        self.page_step = page_step  # pages per DP step in exact mode, raise it to trade accuracy for speed
+        self.max_nodes = max_nodes  # search limit for bnb mode
+
+    @staticmethod
+    def prepare(books, pages_per_hour, hours_for=None):
+        """
+        Computes hours and value for every book, ordered by value per hour (descending, stable)
+
+        Args:
+            books (list): Book rows
+            pages_per_hour (float): The reading speed in pages per hour
+            hours_for (callable): Optional book -> hours function, e.g. a ReadingTimeCache lookup
+
+        Returns:
+            list: (book index, hours, value, pages) tuples
+        """
+        items = []
+        for i, book in enumerate(books):
+            pages = int(book.get('num_pages') or 0)
+            value = float(book.get('avg_rating') or 0)
+            hours = hours_for(book) if hours_for is not None else pages / pages_per_hour
+            items.append((i, hours, value, pages))
+        items.sort(key=lambda item: item[2] / item[1] if item[1] else math.inf, reverse=True)
+        return items
+
+    @staticmethod
+    def greedy_pass(hours, hours_available):
+        """
+        INTENT: Take every book, in the given order, that still fits in the remaining hours
+        Works the same on whole pages and a page capacity, which is how greedy mode calls it
+
+        PRECONDITION: hours[i] >= 0, books ordered by value per hour descending
+        RETURNS the positions of the chosen books
+        """
+        chosen = []
+        for position, book_hours in enumerate(hours):
+            if book_hours <= hours_available:
+                chosen.append(position)
+                hours_available -= book_hours
+        return chosen
+
+    @staticmethod
+    def fractional_bound(items, hours_available, start=0):
+        """
+        Upper bound on the value of any schedule of items[start:]: fill greedily by value per hour
+        and take a fraction of the first book that does not fit
+        """
+        bound = 0.0
+        for i in range(start, len(items)):
+            _, hours, value, _ = items[i]
+            if hours <= hours_available:
+                bound += value
+                hours_available -= hours
+            else:
+                return bound + value * hours_available / hours
+        return bound
+
+    def greedy(self, items, hours_available, pages_per_hour):
+        pages = [item[3] for item in items]
+        positions = self.greedy_pass(pages, self.page_capacity(hours_available, pages_per_hour))
+        return positions, None
+
+    def exact(self, items, hours_available, pages_per_hour):
+        steps = self.page_capacity(hours_available, pages_per_hour) // self.page_step
+        if steps < 0:
+            return [], 0.0
+        weights = [-(-pages // self.page_step) for _, _, _, pages in items]
+        values = [item[2] for item in items]
+
+        if np is not None:
+            best = np.zeros(steps + 1)
+            taken = []
+            for weight, value in zip(weights, values):
+                take = np.zeros(steps + 1, dtype=bool)
+                if weight <= steps:
+                    candidate = best[:steps + 1 - weight] + value
+                    take[weight:] = candidate > best[weight:]
+                    best[weight:] = np.where(take[weight:], candidate, best[weight:])
+                taken.append(np.packbits(take))
+            optimum = float(best[steps])
+            is_taken = lambda i, capacity: (taken[i][capacity >> 3] >> (7 - (capacity & 7))) & 1
+        else:
+            best = [0.0] * (steps + 1)
+            taken = []
+            for weight, value in zip(weights, values):
+                take = bytearray(steps + 1)
+                for capacity in range(steps, weight - 1, -1):
+                    candidate = best[capacity - weight] + value
+                    if candidate > best[capacity]:
+                        best[capacity] = candidate
+                        take[capacity] = 1
+                taken.append(take)
+            optimum = best[steps]
+            is_taken = lambda i, capacity: taken[i][capacity]
+
+        positions = []
+        capacity = steps
+        for i in range(len(items) - 1, -1, -1):
+            if is_taken(i, capacity):
+                positions.append(i)
+                capacity -= weights[i]
+        positions.reverse()
+        return positions, optimum
+
+    @staticmethod
+    def page_capacity(hours_available, pages_per_hour):
+        # Whole pages readable in the time available; integer pages avoid float drift in the sums
+        return int(math.floor(hours_available * pages_per_hour + 1e-9))
+
+    def branch_and_bound(self, items, hours_available, pages_per_hour):
+        # Prefix sums let the fractional bound from any item be found by bisection in O(log n)
+        prefix_pages = [0]
+        prefix_value = [0.0]
+        for _, _, value, pages in items:
+            prefix_pages.append(prefix_pages[-1] + pages)
+            prefix_value.append(prefix_value[-1] + value)
+
+        def bound(start, pages_left):
+            end = bisect_right(prefix_pages, prefix_pages[start] + pages_left) - 1
+            total = prefix_value[end] - prefix_value[start]
+            if end < len(items):
+                _, _, value, pages = items[end]
+                spare = pages_left - (prefix_pages[end] - prefix_pages[start])
+                total += value * spare / pages
+            return total
+
+        def positions(chosen):
+            taken = []
+            while chosen is not None:
+                taken.append(chosen[0])
+                chosen = chosen[1]
+            return taken[::-1]
+
+        best_value = 0.0
+        best_chosen = None
+        nodes = 0
+        # Each stack entry: (next item, pages left, value so far, chosen). chosen is a
+        # (position, parent) chain shared between entries, so taking an item costs O(1)
+        stack = [(0, self.page_capacity(hours_available, pages_per_hour), 0.0, None)]
+        while stack:
+            nodes += 1
+            if nodes > self.max_nodes:
+                return positions(best_chosen), None  # not proven optimal
+            i, pages_left, value, chosen = stack.pop()
+            if value > best_value:
+                best_value, best_chosen = value, chosen
+            if i == len(items) or value + bound(i, pages_left) <= best_value:
+                continue
+            _, _, item_value, pages = items[i]
+            stack.append((i + 1, pages_left, value, chosen))  # skip item i (explored last)
+            if pages <= pages_left:
+                stack.append((i + 1, pages_left - pages, value + item_value, (i, chosen)))
+        return positions(best_chosen), best_value
+
+    def schedule(self, books, pages_per_hour, hours_available, mode="greedy", hours_for=None):
+        """
+        PRECONDITION: pages_per_hour > 0, hours_available >= 0
+        RETURNS: result
+        POST1: result['books'] fit in hours_available
+        POST2: books and their rows are unchanged
+
+        Args:
+            books (list): Candidate (unread) book rows
+            pages_per_hour (float): The reading speed in pages per hour
+            hours_available (float): The number of hours available to read
+            mode (str): "greedy", "exact" or "bnb"
+            hours_for (callable): Optional book -> hours function (defaults to num_pages / pages_per_hour)
+
+        Returns:
+            dict: books (chosen rows, in value-per-hour order), hours (per chosen book), value,
+            hours_used, optimum (None if not computed), upper_bound and mode
+        """
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown scheduling mode '{mode}', expected one of {', '.join(self.MODES)}")
+        items = self.prepare(books, pages_per_hour, hours_for)
+
+        if mode == "greedy":
+            positions, optimum = self.greedy(items, hours_available, pages_per_hour)
+        elif mode == "exact":
+            positions, optimum = self.exact(items, hours_available, pages_per_hour)
+        else:
+            positions, optimum = self.branch_and_bound(items, hours_available, pages_per_hour)
+
+        chosen = [items[p] for p in positions]
+        return {
+            'mode': mode,
+            'books': [books[item[0]] for item in chosen],
+            'hours': [item[1] for item in chosen],
+            'value': sum(item[2] for item in chosen),
+            'hours_used': sum(item[1] for item in chosen),
+            'optimum': optimum,
+            'upper_bound': self.fractional_bound(items, hours_available),
+        }
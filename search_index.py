@@ -0,0 +1,376 @@
+import heapq
+import math
+import os
+import pickle
+import re
+import tempfile
+from array import array
+from bisect import bisect_left, insort
+
+from helpers import Helpers
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")  # NumPy is optional, scores are accumulated in dictionaries without it
+
+
+class SearchIndex:
+    """
+    Full-text inverted index over titles, authors, publishers and genres
+
+    Field values are case-folded and split into word tokens. Every term maps to the positions of
+    the books containing it (ascending) and a weighted term frequency, where a token in the title
+    counts more than one in the author, publisher or genre. Queries are ranked with BM25 over
+    those weighted frequencies.
+
+    Each query word matches:
+    - the exact term
+    - terms it is a prefix of (words of 3+ characters, at most MAX_EXPANSIONS of them)
+    - when neither exists, terms within 1 edit (2 for words of 8+ characters). Candidates are
+      found through the sorted vocabulary and a sorted list of reversed terms, so a term must
+      share the first or the last part of the word with the query
+
+    Like BookIndex the index is built lazily on the first search. The built index is persisted
+    next to the CSV (books.csv -> books.csv.search), keyed by the CSV and journal signatures, so
+    later runs load it instead of re-tokenizing the library. Appends and edits update it in
+    place. Building or updating never touches the disk: save() writes the index back and is
+    called by whoever owns the session (the menu on exit, cli.main, the server on shutdown).
+    """
+
+    FORMAT_VERSION = 1
+    SUFFIX = ".search"
+    FIELD_WEIGHTS = {'title': 3.0, 'author_first_last': 2.0, 'publisher': 1.0, 'genre': 1.0}
+    K1 = 1.2
+    B = 0.75
+    MAX_EXPANSIONS = 20
+    PREFIX_WEIGHT = 0.7
+    FUZZY_WEIGHT = 0.5
+    TOKEN = re.compile(r"\w+")
+
+    def __init__(self, csv_file=None, signature=None, library=None):
+        """
+        Args:
+            csv_file (str): CSV the library is read from, None to keep the index in memory only
+            signature (callable): Returns the current on-disk signature of the library
+            library (list): The library to index
+        """
+        self.csv_file = csv_file
+        self.path = csv_file + self.SUFFIX if csv_file else None
+        self.signature = signature
+        self.rebuild(library or [])
+
+    @classmethod
+    def tokenize(cls, value):
+        if not value:
+            return []
+        return cls.TOKEN.findall(str(value).casefold())
+
+    @classmethod
+    def term_weights(cls, book):
+        """
+        Returns:
+            dict: term -> weighted frequency of the term in the book's indexed fields
+        """
+        weights = {}
+        for field, weight in cls.FIELD_WEIGHTS.items():
+            for term in cls.tokenize(book.get(field)):
+                weights[term] = weights.get(term, 0.0) + weight
+        return weights
+
+    def rebuild(self, library):
+        """
+        Re-indexes the whole library on the next search. Used after operations that move books around
+        """
+        self.library = library
+        self.built = False
+        self.dirty = False
+
+    def _field_values(self, field):
+        column = getattr(self.library, 'column', None)  # ColumnarLibrary keeps text fields as plain lists
+        if column is not None and isinstance(column(field), list):
+            return column(field)
+        return [book.get(field) for book in self.library]
+
+    def _ensure_built(self):
+        if self.built:
+            return
+        if self._load():
+            self.built = True
+            return
+
+        weights = [{} for _ in range(len(self.library))]
+        for field, weight in self.FIELD_WEIGHTS.items():
+            for book_weights, value in zip(weights, self._field_values(field)):
+                for term in self.tokenize(value):
+                    book_weights[term] = book_weights.get(term, 0.0) + weight
+
+        postings = {}
+        self.doc_lengths = array('f')
+        for position, book_weights in enumerate(weights):
+            for term, weight in book_weights.items():
+                posting = postings.get(term)
+                if posting is None:
+                    postings[term] = posting = ([], [])
+                posting[0].append(position)
+                posting[1].append(weight)
+            self.doc_lengths.append(sum(book_weights.values()))
+        self.postings = {term: (array('i', positions), array('f', tfs))
+                         for term, (positions, tfs) in postings.items()}
+        self.total_length = sum(self.doc_lengths)
+        self.terms = sorted(self.postings)
+        self.reversed_terms = sorted(term[::-1] for term in self.postings)
+        self.built = True
+        self.dirty = True
+
+    # --- persistence ---------------------------------------------------------------------
+
+    def _load(self):
+        if self.path is None or self.signature is None or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path, 'rb') as file:
+                saved = pickle.load(file)
+            if (saved["format"] != self.FORMAT_VERSION or saved["signature"] != self.signature()
+                    or saved["count"] != len(self.library)):
+                return False
+        except Exception:
+            return False  # truncated or corrupt index: rebuild it
+        self.postings = saved["postings"]
+        self.doc_lengths = saved["doc_lengths"]
+        self.total_length = saved["total_length"]
+        self.terms = saved["terms"]
+        self.reversed_terms = saved["reversed_terms"]
+        return True
+
+    def save(self):
+        """
+        Writes the index next to the CSV if it changed since it was built or loaded. Written to a
+        temporary file and renamed into place so a crash never leaves a half-written index
+        """
+        if not self.built or not self.dirty or self.path is None or self.signature is None:
+            return
+        saved = {
+            "format": self.FORMAT_VERSION,
+            "signature": self.signature(),
+            "count": len(self.doc_lengths),
+            "postings": self.postings,
+            "doc_lengths": self.doc_lengths,
+            "total_length": self.total_length,
+            "terms": self.terms,
+            "reversed_terms": self.reversed_terms,
+        }
+        directory = os.path.dirname(os.path.abspath(self.path))
+        try:
+            handle, temp_file = tempfile.mkstemp(dir=directory, prefix=".search-")
+            with os.fdopen(handle, 'wb') as file:
+                pickle.dump(saved, file, protocol=pickle.HIGHEST_PROTOCOL)
+            Helpers.copy_permissions(self.csv_file, temp_file)
+            os.replace(temp_file, self.path)
+            self.dirty = False
+        except OSError as e:
+            print(f"Could not write search index {self.path}: {e}")
+
+    def remove(self):
+        if self.path is None:
+            return
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    # --- incremental updates -------------------------------------------------------------
+
+    def _add_term(self, term, position, weight):
+        posting = self.postings.get(term)
+        if posting is None:
+            self.postings[term] = (array('i', [position]), array('f', [weight]))
+            insort(self.terms, term)
+            insort(self.reversed_terms, term[::-1])
+            return
+        positions, tfs = posting
+        i = bisect_left(positions, position)
+        positions.insert(i, position)
+        tfs.insert(i, weight)
+
+    def _remove_term(self, term, position):
+        positions, tfs = self.postings[term]
+        i = bisect_left(positions, position)
+        del positions[i]
+        del tfs[i]
+        if not positions:
+            del self.postings[term]
+            del self.terms[bisect_left(self.terms, term)]
+            del self.reversed_terms[bisect_left(self.reversed_terms, term[::-1])]
+
+    def add(self, book, position):
+        """
+        Indexes a book that was appended to the library at the given position
+
+        Args:
+            book (dict): The book dictionary
+            position (int): Its position in the library list
+        """
+        if not self.built:
+            return  # picked up from the library when the index is built
+        if position != len(self.doc_lengths):
+            self.rebuild(self.library)
+            return
+        weights = self.term_weights(book)
+        for term, weight in weights.items():
+            self._add_term(term, position, weight)
+        self.doc_lengths.append(sum(weights.values()))
+        self.total_length += self.doc_lengths[-1]
+        self.dirty = True
+
+    def update(self, position, old_book, new_book):
+        """
+        Re-indexes the book at position after an edit. Nothing is touched if no indexed field changed
+
+        Args:
+            position (int): Position of the edited book in the library list
+            old_book (dict): The field values before the edit
+            new_book (dict): The field values after the edit
+        """
+        if not self.built:
+            return
+        old_weights = self.term_weights(old_book)
+        new_weights = self.term_weights(new_book)
+        if old_weights == new_weights:
+            return
+        for term in old_weights:
+            self._remove_term(term, position)
+        for term, weight in new_weights.items():
+            self._add_term(term, position, weight)
+        self.total_length -= self.doc_lengths[position]
+        self.doc_lengths[position] = sum(new_weights.values())
+        self.total_length += self.doc_lengths[position]
+        self.dirty = True
+
+    # --- queries -------------------------------------------------------------------------
+
+    @staticmethod
+    def edit_distance(a, b, limit):
+        """
+        Levenshtein distance between a and b, or limit + 1 as soon as it is known to exceed limit
+        """
+        if abs(len(a) - len(b)) > limit:
+            return limit + 1
+        previous = list(range(len(b) + 1))
+        for i, char_a in enumerate(a, start=1):
+            current = [i]
+            for j, char_b in enumerate(b, start=1):
+                current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b)))
+            if min(current) > limit:
+                return limit + 1
+            previous = current
+        return previous[-1]
+
+    @staticmethod
+    def _prefix_range(sorted_terms, prefix):
+        start = bisect_left(sorted_terms, prefix)
+        for i in range(start, len(sorted_terms)):
+            if not sorted_terms[i].startswith(prefix):
+                break
+            yield sorted_terms[i]
+
+    def expand(self, word):
+        """
+        Finds the indexed terms a query word matches
+
+        Args:
+            word (str): A case-folded query token
+
+        Returns:
+            list: (term, weight) pairs, weight 1 for the exact term
+        """
+        matches = []
+        if word in self.postings:
+            matches.append((word, 1.0))
+        if len(word) >= 3:
+            for term in self._prefix_range(self.terms, word):
+                if term != word:
+                    matches.append((term, self.PREFIX_WEIGHT))
+                    if len(matches) > self.MAX_EXPANSIONS:
+                        break
+        if matches or len(word) < 4:
+            return matches
+
+        limit = 1 if len(word) < 8 else 2
+        piece = len(word) // (limit + 1)
+        candidates = set(self._prefix_range(self.terms, word[:piece]))
+        candidates.update(term[::-1] for term in self._prefix_range(self.reversed_terms, word[::-1][:piece]))
+        scored = sorted((self.edit_distance(word, term, limit), term) for term in candidates)
+        return [(term, self.FUZZY_WEIGHT / distance) for distance, term in scored[:self.MAX_EXPANSIONS]
+                if distance <= limit]
+
+    def search(self, query, limit=10):
+        """
+        Ranks books against a free-text query
+
+        Args:
+            query (str): Words to look for in titles, authors, publishers and genres
+            limit (int): Maximum number of results
+
+        Returns:
+            list: (position, score) pairs, best match first
+        """
+        self._ensure_built()
+        count = len(self.doc_lengths)
+        if not count or limit <= 0:
+            return []
+        average_length = self.total_length / count or 1.0
+        word_matches = [self.expand(word) for word in dict.fromkeys(self.tokenize(query))]
+        word_matches = [matches for matches in word_matches if matches]
+        if not word_matches:
+            return []
+
+        if np is not None:
+            return self._search_numpy(word_matches, count, average_length, limit)
+
+        totals = {}
+        for matches in word_matches:
+            best = {}
+            for term, weight in matches:
+                positions, tfs = self.postings[term]
+                idf = math.log(1 + (count - len(positions) + 0.5) / (len(positions) + 0.5)) * weight
+                for position, tf in zip(positions, tfs):
+                    norm = self.K1 * (1 - self.B + self.B * self.doc_lengths[position] / average_length)
+                    score = idf * tf * (self.K1 + 1) / (tf + norm)
+                    if score > best.get(position, 0.0):
+                        best[position] = score
+            for position, score in best.items():
+                totals[position] = totals.get(position, 0.0) + score
+        return heapq.nlargest(limit, totals.items(), key=lambda item: (item[1], -item[0]))
+
+    def _search_numpy(self, word_matches, count, average_length, limit):
+        # Works on the postings touched by the query only, never on arrays as long as the library
+        doc_lengths = np.frombuffer(self.doc_lengths, dtype=np.float32)
+        word_positions = []
+        word_scores = []
+        for matches in word_matches:
+            positions_by_term = []
+            scores_by_term = []
+            for term, weight in matches:
+                positions, tfs = self.postings[term]
+                positions = np.frombuffer(positions, dtype=np.int32)
+                tfs = np.frombuffer(tfs, dtype=np.float32)
+                idf = math.log(1 + (count - len(positions) + 0.5) / (len(positions) + 0.5)) * weight
+                norm = self.K1 * (1 - self.B + self.B * doc_lengths[positions] / average_length)
+                positions_by_term.append(positions)
+                scores_by_term.append(idf * tfs * (self.K1 + 1) / (tfs + norm))
+            positions = np.concatenate(positions_by_term)
+            scores = np.concatenate(scores_by_term)
+            if len(positions_by_term) > 1:  # a book matching several expansions of a word keeps the best one
+                order = np.lexsort((-scores, positions))
+                positions, scores = positions[order], scores[order]
+                first = np.concatenate(([True], positions[1:] != positions[:-1]))
+                positions, scores = positions[first], scores[first]
+            word_positions.append(positions)
+            word_scores.append(scores)
+
+        candidates, inverse = np.unique(np.concatenate(word_positions), return_inverse=True)
+        totals = np.bincount(inverse, weights=np.concatenate(word_scores))
+        if len(candidates) > limit:
+            best = np.argpartition(-totals, limit - 1)[:limit]
+            candidates, totals = candidates[best], totals[best]
+        ranked = sorted(zip(candidates.tolist(), totals.tolist()), key=lambda item: (-item[1], item[0]))
+        return ranked
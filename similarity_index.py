@@ -0,0 +1,150 @@
+import heapq
+from bisect import bisect_left
+
+from mst_clustering import MSTClustering
+
+
+class SimilarityIndex:
+    """
+    Top-k "books like this one" queries with the MSTClustering.calculate_similarity metric
+
+    Similarity is +10 for the same genre minus the difference in average rating. Ratings lie
+    in 0..5, so every book of the same genre is more similar than any book of another genre,
+    and within a genre similarity only depends on the rating distance.
+
+    Each genre keeps its distinct ratings sorted, with the positions of the books at each
+    rating. A query finds its rating with a binary search in its own genre and walks outwards
+    in both directions, merging the two sides (and, only if the genre runs out, the other
+    genres) through a heap. That is O(log n + k log k) per query instead of scoring every book.
+
+    Ties are broken by library position, so results match sorting all books by
+    (-similarity, position), which is what brute_force does.
+    """
+
+    def __init__(self, library=None):
+        self.mst_clustering = MSTClustering()
+        self.rebuild(library or [])
+
+    @staticmethod
+    def rating(book):
+        try:
+            return float(book['avg_rating'])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def similarity(same_genre, rating1, rating2):
+        """
+        MSTClustering.calculate_similarity on already parsed values, with the same float operations
+        """
+        similarity = 0
+        if same_genre:
+            similarity += 10
+        similarity -= abs(rating1 - rating2)
+        return similarity
+
+    def rebuild(self, library):
+        """
+        Indexes library. Books without a numeric average rating cannot be scored and are left out
+
+        Args:
+            library (list): List of book dictionaries
+        """
+        self.library = library
+        members = {}  # genre -> rating -> positions
+        for position, book in enumerate(library):
+            rating = self.rating(book)
+            if rating is not None:
+                members.setdefault(book['genre'], {}).setdefault(rating, []).append(position)
+        self.levels = {genre: sorted(by_rating) for genre, by_rating in members.items()}
+        self.members = {genre: [by_rating[level] for level in self.levels[genre]]
+                        for genre, by_rating in members.items()}
+
+    def _push_level(self, heap, genre, same_genre, rating, level, step, exclude):
+        levels = self.levels[genre]
+        while 0 <= level < len(levels):
+            positions = self.members[genre][level]
+            first = 1 if positions[0] == exclude else 0
+            if first < len(positions):
+                score = self.similarity(same_genre, rating, levels[level])
+                heapq.heappush(heap, (-score, positions[first], genre, level, first, step))
+                return
+            level += step  # only the excluded book has this rating
+
+    def _open_genre(self, heap, genre, same_genre, rating, exclude):
+        start = bisect_left(self.levels[genre], rating)
+        self._push_level(heap, genre, same_genre, rating, start, 1, exclude)
+        self._push_level(heap, genre, same_genre, rating, start - 1, -1, exclude)
+
+    def similar_to(self, book, k, exclude=None):
+        """
+        Finds the k books most similar to book
+
+        Args:
+            book (dict): The book to compare against (needs genre and avg_rating)
+            k (int): Number of books to return
+            exclude (int): Library position to leave out, usually the book's own
+
+        Returns:
+            list: (position, similarity) pairs, most similar first
+
+        Raises:
+            ValueError: If the book has no numeric average rating
+        """
+        rating = self.rating(book)
+        if rating is None:
+            raise ValueError(f"'{book.get('title')}' has no average rating to compare")
+        genre = book.get('genre')
+        heap = []
+        if genre in self.levels:
+            self._open_genre(heap, genre, True, rating, exclude)
+        others_opened = False
+
+        results = []
+        while len(results) < k:
+            if not heap:
+                if others_opened:
+                    break
+                # Every book of the same genre is taken: only now look at the other genres
+                for other in self.levels:
+                    if other != genre:
+                        self._open_genre(heap, other, False, rating, exclude)
+                others_opened = True
+                continue
+
+            score, position, entry_genre, level, index, step = heapq.heappop(heap)
+            results.append((position, -score))
+            positions = self.members[entry_genre][level]
+            index += 1
+            if index < len(positions) and positions[index] == exclude:
+                index += 1
+            if index < len(positions):
+                heapq.heappush(heap, (score, positions[index], entry_genre, level, index, step))
+            else:
+                self._push_level(heap, entry_genre, entry_genre == genre, rating, level + step, step, exclude)
+        return results
+
+    def similar_to_many(self, positions, k):
+        """
+        Batch form of similar_to for books already in the library, each excluding itself
+
+        Args:
+            positions (iterable): Library positions of the books to query
+            k (int): Number of books to return for each
+
+        Returns:
+            dict: position -> list of (position, similarity) pairs, most similar first
+        """
+        return {position: self.similar_to(self.library[position], k, exclude=position) for position in positions}
+
+    def brute_force(self, book, k, exclude=None):
+        """
+        Reference answer: scores every book with MSTClustering.calculate_similarity and sorts them
+
+        Returns:
+            list: (position, similarity) pairs, most similar first
+        """
+        scored = [(-self.mst_clustering.calculate_similarity(book, other), position)
+                  for position, other in enumerate(self.library)
+                  if position != exclude and self.rating(other) is not None]
+        return [(position, -score) for score, position in heapq.nsmallest(k, scored)]
@@ -0,0 +1,191 @@
+import hashlib
+import os
+import pickle
+import tempfile
+from array import array
+
+from helpers import Helpers
+
+
+class Snapshot:
+    """
+    Binary cache of the parsed library, stored next to the CSV file (books.csv -> books.csv.snapshot)
+
+    The snapshot records the size, mtime and SHA-1 of the CSV it was built from. Loading checks
+    size and mtime first; if only the mtime moved (e.g. the file was touched or copied) the hash
+    decides. Whenever the CSV changed, or the snapshot is missing, unreadable or corrupt, the
+    CSV is parsed as usual and the snapshot is rebuilt, so callers never see stale data.
+
+    Two layouts are cached: "rows" (the list of dictionaries from Helpers.read_csv_as_dict) and
+    "columnar" (a ColumnarLibrary, which loads fastest since its numeric columns are raw arrays).
+    Rows are not pickled one dictionary at a time: pack_rows stores one list per field, and a field
+    with few distinct values (genre, binding, year...) as array('I') codes into those values. Loading
+    rebuilds each row with dict(zip(...)), and repeated values are shared between rows instead of
+    being unpickled once per book, which halves the memory the loaded library takes.
+    """
+
+    FORMAT_VERSION = 3
+    SUFFIX = ".snapshot"
+
+    @staticmethod
+    def path_for(csv_file):
+        return csv_file + Snapshot.SUFFIX
+
+    @staticmethod
+    def file_hash(csv_file):
+        digest = hashlib.sha1()
+        with open(csv_file, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def pack_rows(rows):
+        """
+        Stores a list of row dictionaries column by column
+
+        Returns:
+            dict: The fields and, for each field, (distinct values, array of codes) or (None, list of
+            values), or None if the rows do not all have the same fields
+        """
+        if not rows:
+            return None
+        keys = rows[0].keys()
+        if any(row.keys() != keys for row in rows):
+            return None
+        fields = list(keys)
+        columns = []
+        for field in fields:
+            column = [row[field] for row in rows]
+            try:
+                values = list(dict.fromkeys(column))
+            except TypeError:  # unhashable values, e.g. the list csv.DictReader keeps surplus cells in
+                values = column
+            if len(values) * 2 <= len(column):
+                codes = {value: code for code, value in enumerate(values)}
+                columns.append((values, array('I', map(codes.__getitem__, column))))
+            else:
+                columns.append((None, column))
+        return {"fields": fields, "columns": columns}
+
+    @staticmethod
+    def unpack_rows(packed):
+        """
+        Rebuilds the row dictionaries saved by pack_rows
+        """
+        fields = packed["fields"]
+        columns = packed["columns"]
+        template = dict.fromkeys(fields)
+        rows = [template.copy() for _ in range(len(columns[0][1]))]  # copies of a same-keyed dict never resize
+        for field, (values, column) in zip(fields, columns):
+            if values is not None:
+                column = map(values.__getitem__, column)
+            for row, value in zip(rows, column):
+                row[field] = value
+        return rows
+
+    @staticmethod
+    def read(csv_file, layout):
+        """
+        Loads the cached library if the snapshot still matches the CSV file
+
+        Args:
+            csv_file (str): Path to the CSV file
+            layout (str): "rows" or "columnar"
+
+        Returns:
+            The cached library, or None if there is no usable snapshot
+        """
+        signature = Helpers.file_signature(csv_file)
+        snapshot_file = Snapshot.path_for(csv_file)
+        if signature is None or not os.path.exists(snapshot_file):
+            return None
+
+        try:
+            with open(snapshot_file, 'rb') as file:
+                snapshot = pickle.load(file)
+            if snapshot["format"] != Snapshot.FORMAT_VERSION or snapshot["layout"] != layout:
+                return None
+            mtime_ns, size = signature[:2]
+            if snapshot["size"] != size:
+                return None
+            if snapshot["mtime_ns"] != mtime_ns:
+                if snapshot["sha1"] != Snapshot.file_hash(csv_file):
+                    return None
+                Snapshot.write(csv_file, layout, snapshot["library"], snapshot["sha1"], snapshot["packed"])
+            if snapshot["packed"]:
+                return Snapshot.unpack_rows(snapshot["library"])
+            return snapshot["library"]
+        except Exception:
+            return None  # missing, truncated or corrupt snapshot: fall back to the CSV
+
+    @staticmethod
+    def write(csv_file, layout, library, sha1=None, packed=False):
+        """
+        Saves library as the snapshot of csv_file. Written to a temporary file and renamed into
+        place so a crash never leaves a half-written snapshot
+
+        Args:
+            csv_file (str): Path to the CSV file the library was parsed from
+            layout (str): "rows" or "columnar"
+            library: The parsed library
+            sha1 (str): Hash of csv_file if already known
+            packed (bool): library is already the output of pack_rows (when refreshing a snapshot)
+        """
+        signature = Helpers.file_signature(csv_file)
+        if signature is None:
+            return
+        if layout == "rows" and not packed:
+            packed_rows = Snapshot.pack_rows(library)
+            if packed_rows is not None:
+                library, packed = packed_rows, True
+        mtime_ns, size = signature[:2]
+        snapshot = {
+            "format": Snapshot.FORMAT_VERSION,
+            "layout": layout,
+            "size": size,
+            "mtime_ns": mtime_ns,
+            "sha1": sha1 or Snapshot.file_hash(csv_file),
+            "packed": packed,
+            "library": library,
+        }
+        snapshot_file = Snapshot.path_for(csv_file)
+        directory = os.path.dirname(os.path.abspath(snapshot_file))
+        try:
+            handle, temp_file = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+            with os.fdopen(handle, 'wb') as file:
+                pickle.dump(snapshot, file, protocol=pickle.HIGHEST_PROTOCOL)
+            Helpers.copy_permissions(csv_file, temp_file)
+            os.replace(temp_file, snapshot_file)
+        except OSError as e:
+            print(f"Could not write snapshot {snapshot_file}: {e}")
+
+    @staticmethod
+    def load(csv_file, parse, layout="rows"):
+        """
+        Returns the library for csv_file from the snapshot, or parses the CSV and rebuilds the snapshot
+
+        Args:
+            csv_file (str): Path to the CSV file
+            parse (callable): Parses csv_file into the library when the snapshot can't be used
+            layout (str): "rows" or "columnar"
+
+        Returns:
+            The library
+        """
+        library = Snapshot.read(csv_file, layout)
+        if library is not None:
+            return library
+        signature = Helpers.file_signature(csv_file)
+        library = parse(csv_file)
+        # Only cache what we parsed if nobody changed the file while we were reading it
+        if signature is not None and Helpers.file_signature(csv_file) == signature:
+            Snapshot.write(csv_file, layout, library)
+        return library
+
+    @staticmethod
+    def remove(csv_file):
+        try:
+            os.remove(Snapshot.path_for(csv_file))
+        except FileNotFoundError:
+            pass
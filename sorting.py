@@ -1,5 +1,6 @@
+from operator import itemgetter
 from helpers import Helpers
-from tabulate import tabulate
+from table_renderer import BOOK_HEADERS, TableRenderer, book_rows
 
 class Sorting:
     def merge_sort(book_list, sorting_categories):
@@ -38,6 +39,101 @@ class Sorting:
 
         return sorted_list
 
+    # Fields compared as numbers by typed_merge_sort; every other field is a case-folded string
+    FIELD_TYPES = {
+        'my_rating': float,
+        'avg_rating': float,
+        'num_pages': int,
+        'year_published': int,
+    }
+
+    @staticmethod
+    def typed_value(book, field):
+        '''
+        Intent: Parse one field of a book into the type it should be compared as
+        returns the parsed value, or None if the field is missing or cannot be parsed
+        '''
+        value = book.get(field)
+        if value is None or str(value).strip() == "":
+            return None
+        field_type = Sorting.FIELD_TYPES.get(field)
+        if field_type is None:
+            return str(value).strip().casefold()
+        try:
+            return field_type(value)
+        except ValueError:
+            try:
+                return field_type(float(value))
+            except (ValueError, OverflowError):  # e.g. "inf" or "1e999" in an int field
+                return None
+
+    @staticmethod
+    def typed_sort_keys(book_list, sort_fields):
+        '''
+        book_list: list of dictionaries
+        sort_fields: field names, most significant first; a leading '-' sorts that field descending
+        Intent: Build one typed key tuple per book, once
+        Each field is replaced by the rank of its parsed value (reversed for descending fields) and the
+        ranks are packed into a single int per book, so comparing two keys is one int comparison.
+        Missing values get a rank after every real value in both directions
+        returns list of int keys, one per book
+        '''
+        base = len(book_list) + 1
+        keys = [0] * len(book_list)
+        for sort_field in sort_fields:
+            descending = sort_field.startswith('-')
+            field = sort_field.lstrip('-')
+            values = [Sorting.typed_value(book, field) for book in book_list]
+            distinct = sorted({v for v in values if v is not None})
+            if descending:
+                distinct.reverse()
+            ranks = {value: rank for rank, value in enumerate(distinct)}
+            missing_rank = len(distinct)
+            keys = [key * base + (missing_rank if v is None else ranks[v]) for key, v in zip(keys, values)]
+        return keys
+
+    @staticmethod
+    def typed_merge_sort(book_list, sort_fields):
+        '''
+        book_list: list of dictionaries
+        sort_fields: any number of field names, e.g. ['-avg_rating', 'year_published', 'title']
+        Intent: Stable merge sort that compares numbers as numbers and strings case-insensitively
+        Keys are computed once and the sort runs bottom-up over index arrays, so no sub-lists are sliced
+        POSTCONDITION: books with equal keys keep their original order
+        returns a new sorted list
+        '''
+        n = len(book_list)
+        keys = Sorting.typed_sort_keys(book_list, sort_fields)
+        source = list(range(n))
+        target = [0] * n
+
+        width = 1
+        while width < n:
+            for lo in range(0, n, 2 * width):
+                mid = min(lo + width, n)
+                hi = min(lo + 2 * width, n)
+                i, j, k = lo, mid, lo
+                while i < mid and j < hi:
+                    if keys[source[j]] < keys[source[i]]:
+                        target[k] = source[j]
+                        j += 1
+                    else:
+                        target[k] = source[i]
+                        i += 1
+                    k += 1
+                while i < mid:
+                    target[k] = source[i]
+                    i += 1
+                    k += 1
+                while j < hi:
+                    target[k] = source[j]
+                    j += 1
+                    k += 1
+            source, target = target, source
+            width *= 2
+
+        return [book_list[i] for i in source]
+
     @staticmethod
     def bubble_sort_books(books, key1, key2):
         '''
@@ -55,6 +151,18 @@ class Sorting:
                     books[j], books[j+1] = books[j+1], books[j]
         return books
 
+    @staticmethod
+    def keyed_sort_books(books, key1, key2):
+        '''
+        books: list of dictionaries
+        Intent: Sort the list of dictionaries by key1 and key2 in O(n log n)
+        PRECONDITION: books is a list of dictionaries, key1 and key2 are keys in the dictionaries
+        POSTCONDITION: each book's (key1, key2) sort key is computed exactly once
+        POSTCONDITION: the sort is stable, so the order is the same as bubble_sort_books gives
+        returns a new sorted list
+        '''
+        return sorted(books, key=itemgetter(key1, key2))
+
     @staticmethod
     def bucket_sort_books(library):
         '''
@@ -78,20 +186,24 @@ class Sorting:
                 buckets[age_group].append(book)
 
         for age_group in buckets:
-            buckets[age_group] = Sorting.bubble_sort_books(buckets[age_group], 'author_last_first', 'title')
+            buckets[age_group] = Sorting.keyed_sort_books(buckets[age_group], 'author_last_first', 'title')
 
         return buckets
 
     @staticmethod
-    def print_sorted_bookshelves(library):
+    def print_sorted_bookshelves(library, buckets=None, page=None, page_size=None):
         '''
         Prints the sorted bookshelves of a library.
         Args:
             library (dict): A dictionary representing the library with books categorized by age group.
+            buckets (dict): Already sorted shelves (e.g. from a ShelfCache). Computed from library if None.
+            page (int): Only print this page (starting at 1) of each shelf, None for whole shelves.
+            page_size (int): Books per page.
         The function sorts the books using the bucket_sort_books method from the Sorting module
-        and prints each category of books in a tabulated format.
+        and streams each category of books as a table (see TableRenderer).
         '''
-        buckets = Sorting.bucket_sort_books(library)
+        if buckets is None:
+            buckets = Sorting.bucket_sort_books(library)
 
         for age_group, books in buckets.items():
             print(f"\n{age_group} Bookshelf:")
@@ -99,15 +211,33 @@ class Sorting:
                 print("No books in this category.")
                 continue
 
-            headers = ["Title", "Author", "Year Published", "Average Rating", "Your Ratings", "Read", "Date Read"]
-            books_display = [[
-                book.get("title", "N/A"),
-                book.get("author_first_last", "N/A"),
-                book.get("year_published", "N/A"),
-                book.get("avg_rating", "N/A"),
-                book.get("my_rating", "N/A"),
-                book.get("read", "N/A"),
-                book.get("date_read", "N/A")
-            ] for book in books]
-
-            print(tabulate(books_display, headers=headers, tablefmt="pretty"))
+            if page is not None or page_size is not None:
+                try:
+                    start, stop, pages = TableRenderer.page_bounds(len(books), page, page_size)
+                except ValueError as e:  # shelves differ in length, so a page can exist on some only
+                    print(e)
+                    continue
+                print(f"Page {page or 1} of {pages} (books {start + 1}-{stop} of {len(books)})")
+                books = books[start:stop]
+            TableRenderer(BOOK_HEADERS).render(book_rows(books))
+
+
+class ShelfCache:
+    '''
+    Keeps the result of Sorting.bucket_sort_books between calls
+    The shelves are only re-sorted when the library version changes
+    '''
+    def __init__(self):
+        self.version = None
+        self.buckets = None
+
+    def get(self, library, version):
+        '''
+        library: list of dictionaries
+        version: counter that changes whenever library changes
+        returns the sorted shelves for library, re-sorting only if version changed
+        '''
+        if self.buckets is None or version != self.version:
+            self.buckets = Sorting.bucket_sort_books(library)
+            self.version = version
+        return self.buckets
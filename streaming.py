@@ -0,0 +1,82 @@
+from helpers import Helpers
+
+
+class StreamingStats:
+    """
+    Single-pass statistics over any iterable of book rows
+
+    Works the same on the in-memory library and on Helpers.iter_csv_rows, so a multi-GB export
+    can be summarized in constant memory without loading it.
+    """
+
+    # The only columns reading_summary needs, used to project the CSV stream
+    SUMMARY_FIELDS = ["num_pages", "avg_rating", "read", "age_group"]
+
+    @staticmethod
+    def is_read(book):
+        return (book.get('read') or 'False').lower() == 'true'
+
+    @staticmethod
+    def iter_unread(books):
+        """
+        Yields the unread books from books without building a list
+        """
+        return (book for book in books if not StreamingStats.is_read(book))
+
+    @staticmethod
+    def reading_summary(books, pages_per_hour):
+        """
+        PRECONDITION: books is an iterable of book rows, pages_per_hour is a positive float
+        RETURNS: summary
+        POST1: summary['unread_hours'] is the time needed to read every unread book
+        POST2: books was traversed exactly once
+
+        Args:
+            books (iterable): Book rows (list, ColumnarLibrary or Helpers.iter_csv_rows stream)
+            pages_per_hour (float): The reading speed in pages per hour
+
+        Returns:
+            dict: total and unread book counts, unread pages and hours, average rating of the
+            unread books and the number of books on each age-group shelf
+        """
+        total_books = unread_books = unread_pages = 0
+        rating_sum = 0.0
+        rated = 0
+        shelf_counts = {'Children': 0, 'Young Adult': 0, 'Adult': 0}
+
+        for book in books:
+            total_books += 1
+            age_group = book.get('age_group')
+            if age_group in shelf_counts:
+                shelf_counts[age_group] += 1
+            if StreamingStats.is_read(book):
+                continue
+            unread_books += 1
+            unread_pages += int(book.get('num_pages') or 0)
+            if book.get('avg_rating'):
+                rating_sum += float(book['avg_rating'])
+                rated += 1
+
+        return {
+            'total_books': total_books,
+            'unread_books': unread_books,
+            'unread_pages': unread_pages,
+            'unread_hours': unread_pages / pages_per_hour,
+            'unread_avg_rating': rating_sum / rated if rated else None,
+            'shelf_counts': shelf_counts,
+        }
+
+    @staticmethod
+    def summarize_csv(csv_file, pages_per_hour):
+        """
+        Streams csv_file once, reading only the columns the summary needs
+
+        Args:
+            csv_file (str): Path to the CSV file (can be larger than memory)
+            pages_per_hour (float): The reading speed in pages per hour
+
+        Returns:
+            dict: See reading_summary
+        """
+        rows = Helpers.iter_csv_rows(csv_file, StreamingStats.SUMMARY_FIELDS)
+        return StreamingStats.reading_summary(rows, pages_per_hour)
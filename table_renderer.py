@@ -0,0 +1,125 @@
+import itertools
+import sys
+
+# Columns of the book tables printed by View Books and the bookshelves: (header, book field)
+BOOK_COLUMNS = [
+    ("Title", "title"),
+    ("Author", "author_first_last"),
+    ("Year Published", "year_published"),
+    ("Average Rating", "avg_rating"),
+    ("Your Ratings", "my_rating"),
+    ("Read", "read"),
+    ("Date Read", "date_read"),
+]
+BOOK_HEADERS = [header for header, _ in BOOK_COLUMNS]
+
+
+def book_rows(books):
+    """
+    Yields the BOOK_COLUMNS cells of each book, one row at a time
+    """
+    fields = [field for _, field in BOOK_COLUMNS]
+    for book in books:
+        yield [book.get(field, "N/A") for field in fields]
+
+
+class TableRenderer:
+    """
+    Writes a table in the layout of tabulate's "pretty" format, one row at a time
+
+    tabulate measures every cell before printing anything and returns the whole table as one
+    string, which for a 100k-book library takes seconds and a lot of memory. Here the column
+    widths come from the headers and the first sample_size rows, capped at max_width, and each
+    row is written as soon as it is formatted. A cell wider than its column is cut short and
+    ends in "...". When every row is in the sample and no cell hits the cap, the output is the
+    same as tabulate's.
+    """
+
+    SAMPLE_SIZE = 1000
+    MAX_WIDTH = 60
+    PAGE_SIZE = 50
+    ELLIPSIS = "..."
+
+    def __init__(self, headers, sample_size=SAMPLE_SIZE, max_width=MAX_WIDTH, file=None):
+        """
+        Args:
+            headers (list): Column headers
+            sample_size (int): Number of leading rows the column widths are computed from
+            max_width (int): Widest a column gets, headers included
+            file: Stream to write to, sys.stdout by default
+        """
+        self.headers = [str(header) for header in headers]
+        self.sample_size = sample_size
+        self.max_width = max_width
+        self.file = file
+
+    @classmethod
+    def page_bounds(cls, total, page=None, page_size=None):
+        """
+        Finds the rows shown on one page
+
+        Args:
+            total (int): Number of rows
+            page (int): Page number, starting at 1 (the first page if None)
+            page_size (int): Rows per page, PAGE_SIZE if None
+
+        Returns:
+            tuple: (start, stop, pages) where rows[start:stop] is the page and pages the page count
+
+        Raises:
+            ValueError: If page_size is not positive or page is past the last page
+        """
+        page = page or 1
+        page_size = page_size or cls.PAGE_SIZE
+        if page_size < 1:
+            raise ValueError("The page size must be at least 1")
+        pages = max(1, -(-total // page_size))
+        if not 1 <= page <= pages:
+            raise ValueError(f"Page {page} is out of range (1-{pages})")
+        start = (page - 1) * page_size
+        return start, min(start + page_size, total), pages
+
+    def fit(self, value, width):
+        text = "" if value is None else str(value)
+        if "\n" in text:
+            text = " ".join(text.split("\n"))
+        if len(text) > width:
+            text = text[:width - len(self.ELLIPSIS)] + self.ELLIPSIS
+        return text
+
+    def render(self, rows):
+        """
+        Writes the table
+
+        Args:
+            rows (iterable): Rows of cells, e.g. a generator; only the first sample_size are held at once
+
+        Returns:
+            int: Number of rows written
+        """
+        file = self.file or sys.stdout
+        rows = iter(rows)
+        sample = list(itertools.islice(rows, self.sample_size))
+
+        widths = [len(header) for header in self.headers]
+        for row in sample:
+            for column, value in enumerate(row):
+                widths[column] = max(widths[column], len(self.fit(value, self.max_width)))
+        widths = [min(width, self.max_width) for width in widths]
+        formats = [f"^{width}" for width in widths]
+
+        border = "+" + "+".join("-" * (width + 2) for width in widths) + "+\n"
+
+        def line(cells):
+            return "| " + " | ".join(format(self.fit(value, width), spec)
+                                     for value, width, spec in zip(cells, widths, formats)) + " |\n"
+
+        file.write(border)
+        file.write(line(self.headers))
+        file.write(border)
+        count = 0
+        for row in itertools.chain(sample, rows):
+            file.write(line(row))
+            count += 1
+        file.write(border)
+        return count
@@ -0,0 +1,18 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+
+@pytest.fixture
+def books_csv(tmp_path):
+    """
+    A private copy of data/books.csv, so tests can write the CSV and the files kept next to it
+    """
+    path = tmp_path / "books.csv"
+    shutil.copy(os.path.join(ROOT, "data", "books.csv"), path)
+    return str(path)
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from book_index import BookIndex
+from columnar_library import ColumnarLibrary
+from helpers import Helpers
+
+
+def lookups(index, titles, authors, prefixes):
+    return ([index.find_title(title) for title in titles],
+            [index.find_author(author) for author in authors],
+            [index.find_title_prefix(prefix) for prefix in prefixes])
+
+
+def edit(library, index, position, **changes):
+    old_book = dict(library[position])
+    library[position].update(changes)
+    index.update(position, old_book, library[position])
+
+
+@pytest.fixture
+def library(books_csv):
+    return Helpers.read_csv_as_dict(books_csv)
+
+
+def test_rename_moves_the_title_and_prefix_entries(library):
+    index = BookIndex(library)
+    old_title = library[3]['title']
+    assert index.find_title(old_title) == [3]
+
+    edit(library, index, 3, title="Zzz Renamed")
+    assert index.find_title(old_title) == []
+    assert index.find_title("zzz renamed") == [3]
+    assert index.find_title_prefix("ZZZ") == [3]
+    assert 3 not in index.find_title_prefix(old_title)
+    assert index.title_prefix == sorted(index.title_prefix)
+
+
+def test_duplicate_titles_keep_every_position(library):
+    for position in (2, 5, 9):
+        library[position]['title'] = "Shared Title"
+    index = BookIndex(library)
+    assert index.find_title("shared title") == [2, 5, 9]
+    assert index.find_title_prefix("Shared") == [2, 5, 9]
+
+    edit(library, index, 5, title="Shared Title, Revised")
+    assert index.find_title("Shared Title") == [2, 9]
+    assert index.find_title_prefix("Shared Title") == [2, 9, 5]  # in title order
+    edit(library, index, 9, title="shared title ")  # same key after normalizing: nothing moves
+    assert index.find_title("Shared Title") == [2, 9]
+
+
+def test_prefix_lookup_after_add(library):
+    index = BookIndex(library)
+    index.find_title("")  # the first lookup builds the index
+    library.append(dict(library[0], title="Aaa New Book", author_first_last="New Author"))
+    index.add(library[-1], len(library) - 1)
+    assert index.find_title_prefix("aaa") == [len(library) - 1]
+    assert index.find_author("new author") == [len(library) - 1]
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_random_edits_match_a_fresh_index(library, columnar):
+    rng = random.Random(int(columnar))
+    if columnar:
+        library = ColumnarLibrary.from_rows(library)
+    index = BookIndex(library)
+    index.find_title("")  # the first lookup builds the index
+    titles = ["Dune", "dune", "Emma", "Emma ", "Middlemarch"]
+    authors = ["Jane Austen", "Frank Herbert"]
+    for _ in range(60):
+        position = rng.randrange(len(library))
+        if rng.random() < 0.7:
+            edit(library, index, position, title=rng.choice(titles))
+        else:
+            edit(library, index, position, author_first_last=rng.choice(authors))
+    fresh = BookIndex(library)
+    queries = (titles, authors, ["d", "e", "m", "the", ""])
+    assert lookups(index, *queries) == lookups(fresh, *queries)
+    fresh.find_title("")
+    assert index.title_prefix == fresh.title_prefix
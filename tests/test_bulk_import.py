@@ -0,0 +1,120 @@
+import csv
+import json
+
+import pytest
+
+from book import CSV_FIELDS
+from book_index import BookIndex
+from bulk_import import BulkImporter
+from helpers import Helpers
+from MyLibraryManager import MyLibraryManager
+
+
+def new_row(library_row, title, isbn=""):
+    return dict(library_row, title=title, isbn=isbn, isbn13="")
+
+
+def write_csv(path, rows, blank_lines_after=()):
+    """
+    Writes rows under the CSV header, with an empty line after each row index in blank_lines_after
+    """
+    with open(path, "w", newline="", encoding="utf-8") as file:
+        writer = csv.DictWriter(file, fieldnames=CSV_FIELDS)
+        writer.writeheader()
+        for i, row in enumerate(rows):
+            writer.writerow(row)
+            if i in blank_lines_after:
+                file.write("\r\n")
+
+
+@pytest.fixture
+def library(books_csv):
+    return Helpers.read_csv_as_dict(books_csv)
+
+
+def rejected_lines(rejected):
+    return {number: errors for number, _, errors in rejected}
+
+
+def test_csv_import_dedups_and_reports_file_lines(library, tmp_path):
+    path = str(tmp_path / "import.csv")
+    rows = [
+        new_row(library[0], "First New Book", isbn="0306406152"),               # line 2
+        dict(library[1]),                                                        # line 4, after a blank line
+        dict(new_row(library[0], "Spans\ntwo lines"), num_pages="x"),            # lines 5-6
+        new_row(library[0], "Same ISBN, other title", isbn="0-306-40615-2"),     # line 7
+        new_row(library[0], "first new book"),                                   # line 8
+        new_row(library[0], "Second New Book"),                                  # line 9
+    ]
+    write_csv(path, rows, blank_lines_after={0})
+
+    accepted, rejected = BulkImporter().run(path, library, BookIndex(library))
+    assert [row['title'] for row in accepted] == ["First New Book", "Second New Book"]
+    assert accepted[0]['isbn'] == "0306406152"
+    lines = rejected_lines(rejected)
+    assert sorted(lines) == [4, 5, 7, 8]
+    assert lines[4] == ["Same title and author as a book already in the library."]
+    assert "pages" in " ".join(lines[5])
+    assert lines[7] == ["Duplicate of line 2 in this import."]
+    assert lines[8] == ["Duplicate of line 2 in this import."]
+
+
+def test_jsonl_import_reports_unreadable_lines(library, tmp_path):
+    path = str(tmp_path / "import.jsonl")
+    with open(path, "w", encoding="utf-8") as file:
+        file.write(json.dumps(new_row(library[0], "From JSON")) + "\n")
+        file.write("\n")
+        file.write('{"title": "torn\n')
+        file.write('["not", "an", "object"]\n')
+        file.write(json.dumps(dict(library[2])) + "\n")
+
+    accepted, rejected = BulkImporter().run(path, library, BookIndex(library))
+    assert [row['title'] for row in accepted] == ["From JSON"]
+    assert sorted(rejected_lines(rejected)) == [3, 4, 5]
+
+
+def test_parallel_validation_gives_the_same_result(library, tmp_path):
+    path = str(tmp_path / "import.csv")
+    rows = [new_row(library[i // 2 % len(library)], f"Book {i // 2}") for i in range(40)]  # every book twice
+    write_csv(path, rows)
+
+    serial = BulkImporter(batch_size=7).run(path, library, BookIndex(library))
+    parallel = BulkImporter(batch_size=7, workers=2).run(path, library, BookIndex(library))
+    assert parallel == serial
+    assert len(serial[0]) == 20
+
+
+def test_manager_import_saves_once_and_writes_the_report(books_csv, library, tmp_path):
+    path = str(tmp_path / "import.csv")
+    write_csv(path, [new_row(library[0], "Imported Book"), dict(library[3])])
+    report = str(tmp_path / "reports" / "rejected.csv")
+
+    manager = MyLibraryManager(books_csv)
+    added, rejected = manager.import_books(path, report_file=report)
+    assert [row['title'] for row in added] == ["Imported Book"]
+    assert Helpers.read_csv_as_dict(books_csv) == library + added
+    with open(report, newline="", encoding="utf-8") as file:
+        reported = list(csv.DictReader(file))
+    assert [(row['line'], row['title']) for row in reported] == [("3", library[3]['title'])]
+
+
+def test_parallel_validation_reads_a_bounded_window_ahead(library, tmp_path, monkeypatch):
+    path = str(tmp_path / "import.csv")
+    write_csv(path, [new_row(library[i % len(library)], f"Book {i}") for i in range(30)])
+    read = []
+    iter_batches = BulkImporter.iter_batches
+
+    def counting_batches(self, path):
+        for batch in iter_batches(self, path):
+            read.append(len(batch))
+            yield batch
+
+    monkeypatch.setattr(BulkImporter, "iter_batches", counting_batches)
+    importer = BulkImporter(batch_size=2, workers=2)
+    batches = importer.validated_batches(path)
+    first = next(batches)
+    assert [number for number, _ in first[0]] == [2, 3]
+    assert len(read) == 5  # four batches in flight, plus the one read when the first result was due
+    rest = list(batches)
+    assert len(read) == 15 and len(rest) == 14
+    assert [number for accepted, _ in [first] + rest for number, _ in accepted] == list(range(2, 32))
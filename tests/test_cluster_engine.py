@@ -0,0 +1,52 @@
+import random
+
+import pytest
+
+from cluster_engine import ClusterEngine
+from mst_clustering import MSTClustering
+
+
+def make_library(rng, n, genres):
+    # Ratings on a coarse grid, so many pairs tie on weight and the tie-breaking is exercised
+    return [{'title': f"Book {i}", 'genre': f"Genre {rng.randrange(genres)}",
+             'avg_rating': f"{rng.randint(0, 20) / 4:.2f}"} for i in range(n)]
+
+
+@pytest.mark.parametrize("method", ["linkage", "prim"])
+@pytest.mark.parametrize("workers", [None, 1])
+@pytest.mark.parametrize("seed", range(12))
+def test_engines_match_the_original_clustering(method, workers, seed):
+    rng = random.Random(seed)
+    books = make_library(rng, rng.randint(1, 40), rng.randint(1, 4))
+    engine = ClusterEngine(method, workers)
+    for k in sorted({1, 2, rng.randint(1, len(books)), len(books)}):
+        assert engine.apply_greedy(books, k) == MSTClustering().apply_greedy(books, k), k
+
+
+
+@pytest.mark.parametrize("method", ["linkage", "prim"])
+def test_parallel_genres_match_the_serial_engine(method, monkeypatch):
+    calls = []
+    parallel_mst = ClusterEngine.parallel_mst
+    monkeypatch.setattr(ClusterEngine, "parallel_mst", lambda self, *args: calls.append(args) or parallel_mst(self, *args))
+    rng = random.Random(5)
+    libraries = [make_library(rng, n, genres) for n, genres in [(2, 2), (30, 3), (120, 6)]]
+    libraries.append([{'title': f"Solo {i}", 'genre': f"Genre {i}", 'avg_rating': "3.00"} for i in range(5)])
+    engine = ClusterEngine(method)
+    for books in libraries:
+        serial = engine.build_mst(books)
+        assert engine.build_mst(books, workers=2) == serial
+        for k in (1, 3, len(books)):
+            assert engine.apply_greedy(books, k, workers=2) == engine.apply_greedy(books, k), (len(books), k)
+    assert len(calls) == 4 * 4
+
+
+def fail(*args):
+    raise AssertionError("a single genre was sent to the process pool")
+
+
+def test_one_genre_skips_the_pool(monkeypatch):
+    monkeypatch.setattr(ClusterEngine, "parallel_mst", fail)
+    books = make_library(random.Random(9), 25, 1)
+    engine = ClusterEngine(workers=2)
+    assert engine.apply_greedy(books, 4) == MSTClustering().apply_greedy(books, 4)
@@ -0,0 +1,58 @@
+import filecmp
+
+import pytest
+
+from columnar_library import ColumnarLibrary
+from helpers import Helpers
+
+
+def test_rows_read_back_as_parsed(books_csv):
+    rows = Helpers.read_csv_as_dict(books_csv)
+    library = ColumnarLibrary.from_csv(books_csv)
+    assert len(library) == len(rows)
+    assert library.to_rows() == rows
+    assert [dict(row) for row in library] == rows
+
+
+def test_rewriting_from_columns_keeps_the_file(books_csv, tmp_path):
+    copy = str(tmp_path / "copy.csv")
+    Helpers.rewrite_csv(copy, ColumnarLibrary.from_csv(books_csv).to_rows())
+    assert filecmp.cmp(copy, books_csv, shallow=False)
+
+
+@pytest.mark.parametrize("field, value", [
+    ("read", "TRUE"),
+    ("read", "true"),
+    ("my_rating", "5.0"),
+    ("avg_rating", "4.470"),
+    ("avg_rating", "-0.0"),
+    ("num_pages", "0412"),
+    ("num_pages", "1e999"),
+    ("num_pages", str(2 ** 40)),
+    ("year_published", "n/a"),
+    ("year_published", " 1999"),
+    ("isbn13", "9.78163E+12"),
+    ("genre", ""),
+])
+def test_every_value_reads_back_as_written(books_csv, field, value):
+    library = ColumnarLibrary.from_csv(books_csv)
+    row = dict(library[0], **{field: value})
+    library.append(row)
+    assert library[-1][field] == value
+    assert dict(library[-1]) == row
+
+    library.set_value(0, field, value)
+    assert library.get_value(0, field) == value
+
+
+def test_raw_values_go_away_with_their_rows(books_csv):
+    rows = Helpers.read_csv_as_dict(books_csv)
+    library = ColumnarLibrary.from_rows(rows)
+    assert not library.has_raw('year_published')
+
+    odd = dict(rows[0], year_published="unknown")
+    library.append(odd)
+    assert library.has_raw('year_published')
+    assert library.pop() == odd
+    assert not library.has_raw('year_published')
+    assert library.to_rows() == rows
@@ -0,0 +1,82 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from file_lock import FileLock, LibraryConflictError, fcntl
+from MyLibraryManager import MyLibraryManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def locked_by_others(lock, exclusive):
+    """
+    True if another open file (as another process would have) cannot take the lock in that mode
+    """
+    with open(lock.path, 'a') as other:
+        try:
+            fcntl.flock(other.fileno(), (fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH) | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+        fcntl.flock(other.fileno(), fcntl.LOCK_UN)
+        return False
+
+
+@pytest.mark.skipif(fcntl is None, reason="file locking needs fcntl")
+def test_shared_and_exclusive_sections(books_csv):
+    lock = FileLock(books_csv)
+    with lock.shared():
+        assert not locked_by_others(lock, exclusive=False)
+        assert locked_by_others(lock, exclusive=True)
+        with lock.shared():
+            assert lock.held()
+    with lock.exclusive():
+        assert locked_by_others(lock, exclusive=False)
+        with lock.shared():  # nested sections inside an exclusive one don't lock again
+            assert locked_by_others(lock, exclusive=False)
+    assert not lock.held()
+    assert not locked_by_others(lock, exclusive=True)
+
+
+def test_shared_section_cannot_be_upgraded(books_csv):
+    lock = FileLock(books_csv)
+    with lock.shared():
+        with pytest.raises(RuntimeError):
+            with lock.exclusive():
+                pass
+    assert not lock.held()
+
+
+def test_stale_optimistic_write_is_refused_and_reloaded(books_csv):
+    first = MyLibraryManager(books_csv)
+    second = MyLibraryManager(books_csv)
+    title = first.library[0]['title']
+    second.library
+    first.edit_book_fields(title, {'my_rating': "1"})
+
+    with pytest.raises(LibraryConflictError):
+        second.edit_book_fields(title, {'my_rating': "2"}, expect_unchanged=True)
+    assert second.library[0]['my_rating'] == "1"  # reloaded, so a retry starts from the current data
+    second.edit_book_fields(title, {'my_rating': "2"}, expect_unchanged=True)
+    assert MyLibraryManager(books_csv).library[0]['my_rating'] == "2"
+
+
+def test_writes_from_two_managers_are_all_kept(books_csv):
+    first = MyLibraryManager(books_csv)
+    second = MyLibraryManager(books_csv)
+    template = dict(first.library[0], isbn="", isbn13="")
+    first.add_books([dict(template, title="From First")])
+    second.add_books([dict(template, title="From Second")])
+    first.delete_book(first.library[1]['title'])
+
+    titles = [book['title'] for book in MyLibraryManager(books_csv).library]
+    assert "From First" in titles and "From Second" in titles
+    assert titles == [book['title'] for book in first.library]
+
+
+@pytest.mark.skipif(fcntl is None, reason="file locking needs fcntl")
+def test_concurrent_processes_lose_no_writes():
+    result = subprocess.run([sys.executable, os.path.join(ROOT, "benchmarks", "stress_concurrency.py"),
+                             "--workers", "3", "--ops", "20"], capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
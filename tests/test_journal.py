@@ -0,0 +1,71 @@
+import os
+from pathlib import Path
+
+from helpers import Helpers
+from journal import ChangeJournal
+from MyLibraryManager import MyLibraryManager
+
+
+def test_replay_applies_edits_and_deletes_in_order(books_csv):
+    rows = Helpers.read_csv_as_dict(books_csv)
+    journal = ChangeJournal(books_csv)
+    journal.record_edit(1, rows[1]['title'], {'my_rating': 3, 'date_read': None})
+    journal.record_delete(0, rows[0]['title'])
+    journal.record_edit(0, rows[1]['title'], {'title': "Renamed"})
+
+    library = Helpers.read_csv_as_dict(books_csv)
+    assert journal.replay(library) == 3
+    assert len(library) == len(rows) - 1
+    assert library[0] == dict(rows[1], my_rating="3", date_read="", title="Renamed")
+    assert library[1:] == rows[2:]
+
+
+def test_replay_skips_stale_and_torn_entries(books_csv, capsys):
+    rows = Helpers.read_csv_as_dict(books_csv)
+    journal = ChangeJournal(books_csv)
+    journal.record_edit(0, "Not the title at position 0", {'my_rating': "1"})
+    journal.record_delete(len(rows), "Past the end")
+    journal.record_edit(2, rows[2]['title'], {'my_rating': "1"})
+    with open(journal.path, "a", encoding="utf-8") as file:
+        file.write('{"op": "delete", "posi')  # crash mid-write
+
+    library = Helpers.read_csv_as_dict(books_csv)
+    assert journal.replay(library) == 1
+    assert library[0] == rows[0]
+    assert library[2]['my_rating'] == "1"
+    assert "Skipping" in capsys.readouterr().out
+
+
+def test_compact_folds_the_journal_into_the_csv(books_csv):
+    journal = ChangeJournal(books_csv)
+    library = Helpers.read_csv_as_dict(books_csv)
+    journal.record_delete(0, library[0]['title'])
+    journal.replay(library)
+
+    journal.compact(library)
+    assert not os.path.exists(journal.path)
+    assert Helpers.read_csv_as_dict(books_csv) == library
+
+
+def test_manager_edits_go_to_the_journal(books_csv):
+    manager = MyLibraryManager(books_csv)
+    csv_before = Path(books_csv).read_text(encoding="utf-8")
+    title = manager.library[0]['title']
+    manager.edit_book_fields(title, {'my_rating': "2"})
+    manager.delete_book(manager.library[1]['title'])
+
+    assert Path(books_csv).read_text(encoding="utf-8") == csv_before
+    assert manager.journal.size() > 0
+    reloaded = MyLibraryManager(books_csv)
+    assert reloaded.library == manager.library
+    assert reloaded.library[0]['my_rating'] == "2"
+
+
+def test_manager_compacts_past_the_threshold(books_csv):
+    manager = MyLibraryManager(books_csv)
+    manager.journal.threshold = 0
+    manager.edit_book_fields(manager.library[0]['title'], {'my_rating': "2"})
+
+    assert not os.path.exists(manager.journal.path)
+    assert Helpers.read_csv_as_dict(books_csv) == list(manager.library)
+    assert MyLibraryManager(books_csv).library[0]['my_rating'] == "2"
@@ -0,0 +1,122 @@
+import asyncio
+import http.client
+import json
+import threading
+import time
+
+import pytest
+
+from library_server import LibraryServer
+from MyLibraryManager import MyLibraryManager
+
+
+class Client:
+    def __init__(self, port):
+        self.port = port
+
+    def request(self, method, target, body=None):
+        connection = http.client.HTTPConnection("127.0.0.1", self.port, timeout=30)
+        try:
+            payload = body if isinstance(body, (bytes, type(None))) else json.dumps(body).encode()
+            connection.request(method, target, payload)
+            response = connection.getresponse()
+            return response.status, json.loads(response.read())
+        finally:
+            connection.close()
+
+    def get(self, target):
+        return self.request("GET", target)
+
+    def post(self, target, body):
+        return self.request("POST", target, body)
+
+
+@pytest.fixture
+def server(books_csv):
+    """
+    Runs a LibraryServer on a free port in a background thread; yields (client, server)
+    """
+    manager = MyLibraryManager(books_csv)
+    library_server = LibraryServer(manager)
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    ports = []
+    task = loop.create_task(library_server.serve("127.0.0.1", 0, lambda port: (ports.append(port), started.set())))
+
+    def run():
+        try:
+            loop.run_until_complete(task)
+        except asyncio.CancelledError:
+            pass  # how the fixture stops it
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    assert started.wait(10)
+    yield Client(ports[0]), library_server
+    loop.call_soon_threadsafe(task.cancel)
+    thread.join(10)
+    loop.close()
+
+
+def test_queries(server):
+    client, library_server = server
+    books = len(library_server.manager.library)
+    assert client.get("/health") == (200, {"books": books, "version": library_server.manager.library_version})
+    title = library_server.manager.library[0]['title']
+    status, found = client.get(f"/books?title={title.replace(' ', '%20').replace('#', '%23')}")
+    assert status == 200 and found["count"] == 1
+    for target in ("/search?q=hunger", "/plan?speed=40&hours=10", "/plan?speed=20&speed=40&hours=5",
+                   "/clusters?k=3", "/similar?title=Yellowface", "/summary", "/shelves", "/validate"):
+        status, _ = client.get(target)
+        assert status == 200, target
+    assert client.get("/clusters")[0] == 400
+    assert client.get("/nowhere")[0] == 404
+    assert client.post("/health", {})[0] == 405
+
+
+@pytest.mark.parametrize("body", [{"fields": "title"}, {"fields": []}, {"fields": ["title", 3]}, {}, [1]])
+def test_sort_fields_must_be_a_list_of_names(server, body):
+    client, _ = server
+    assert client.post("/sort", body)[0] == 400
+
+
+def test_sort_and_edit_change_later_answers(server, books_csv):
+    client, library_server = server
+    assert client.post("/sort", {"fields": ["-avg_rating", "title"]}) == (200, {"sorted": 20})
+    ratings = [float(book['avg_rating']) for book in MyLibraryManager(books_csv).library]
+    assert ratings == sorted(ratings, reverse=True)
+
+    title = library_server.manager.library[0]['title']
+    status, before = client.get("/summary?speed=40")
+    assert client.post("/books/edit", {"title": title, "changes": {"read": "False", "date_read": ""}})[0] == 200
+    status, after = client.get("/summary?speed=40")
+    assert after != before  # the cached answer was dropped
+    assert client.post("/books/edit", b"{not json")[0] == 400
+
+
+def test_changes_from_other_processes_are_picked_up(server, books_csv):
+    client, _ = server
+    client.get("/health")
+    MyLibraryManager(books_csv).delete_book("Yellowface")
+    status, health = client.get("/health")
+    assert health["books"] == 19
+
+
+def test_slow_queries_do_not_block_the_event_loop(server, monkeypatch):
+    client, library_server = server
+    cluster_books = library_server.manager.cluster_books
+
+    def slow_clusters(*args, **kwargs):
+        time.sleep(1.0)
+        return cluster_books(*args, **kwargs)
+
+    monkeypatch.setattr(library_server.manager, "cluster_books", slow_clusters)
+    results = []
+    slow = threading.Thread(target=lambda: results.append(client.get("/clusters?k=2")))
+    slow.start()
+    time.sleep(0.2)
+    start = time.perf_counter()
+    assert client.get("/health")[0] == 200
+    assert time.perf_counter() - start < 0.5
+    slow.join()
+    assert results[0][0] == 200
@@ -0,0 +1,93 @@
+import contextlib
+import io
+
+import pytest
+
+from MyLibraryManager import MyLibraryManager
+from profiling import Profiler
+
+
+class RecordingProfiler:
+    """
+    Stands in for the shared profiler and logs sections and prompts in the order they happen
+    """
+
+    def __init__(self, events):
+        self.events = events
+
+    @contextlib.contextmanager
+    def section(self, name):
+        self.events.append(("open", name))
+        yield
+        self.events.append(("close", name))
+
+    def count(self, name, amount=1):
+        self.events.append(("count", name))
+
+
+@pytest.fixture
+def events(monkeypatch):
+    events = []
+    monkeypatch.setattr("MyLibraryManager.profiler", RecordingProfiler(events))
+    return events
+
+
+def run_menu(manager, monkeypatch, events, answers):
+    answers = iter(answers)
+
+    def answer(prompt=""):
+        events.append(("input", prompt))
+        return next(answers)
+
+    monkeypatch.setattr("builtins.input", answer)
+    manager.menu()
+
+
+@pytest.mark.parametrize("answers", [
+    ["1", "10"],
+    ["4", "9", "2", "10"],          # an invalid sort choice first
+    ["7", "100, 40", "10"],
+    ["8", "60", "10", "exact", "10"],
+    ["9", "3", "10"],
+    ["3", "No Such Book", "10"],
+    ["6", "exit", "10"],
+])
+def test_prompts_are_answered_outside_the_sections(books_csv, monkeypatch, events, answers):
+    run_menu(MyLibraryManager(books_csv), monkeypatch, events, answers)
+    open_sections = 0
+    for kind, _ in events:
+        if kind == "input":
+            assert open_sections == 0
+        open_sections += {"open": 1, "close": -1}.get(kind, 0)
+    assert open_sections == 0
+    assert ("open", "menu: Exit") in events
+
+
+def test_each_timed_choice_is_recorded_under_its_menu_label(books_csv, monkeypatch, events):
+    run_menu(MyLibraryManager(books_csv), monkeypatch, events, ["4", "2", "7", "100", "abc", "10"])
+    opened = [name for kind, name in events if kind == "open" and name.startswith("menu:")]
+    assert opened == ["menu: Sort Books", "menu: Estimate Total Reading Time for Unread Books", "menu: Exit"]
+
+
+def test_avoided_reloads_are_listed_in_the_summary(books_csv, monkeypatch):
+    session = Profiler()
+    session.enabled = True  # counting only; enable() would also wrap the targets and trace memory
+    monkeypatch.setattr("MyLibraryManager.profiler", session)
+    manager = MyLibraryManager(books_csv)
+    manager.refresh_library()  # first load
+    manager.refresh_library()
+    manager.edit_book_fields(manager.library[0]['title'], {'my_rating': '4'})  # checks once more before writing
+    assert manager.reloads_avoided == 2
+
+    report = io.StringIO()
+    session.report(report)
+    assert "CSV reloads avoided: 2" in report.getvalue()
+
+
+def test_counters_are_ignored_when_profiling_is_off():
+    session = Profiler()
+    session.count("anything")
+    assert session.counters == {}
+    report = io.StringIO()
+    session.report(report)
+    assert report.getvalue() == ""
@@ -0,0 +1,112 @@
+import copy
+import itertools
+import random
+
+import pytest
+
+import scheduler
+from scheduler import ReadingScheduler
+
+
+def make_books(rng, n):
+    return [{'title': f"Book {i}", 'num_pages': str(rng.randint(0, 400)),
+             'avg_rating': f"{rng.randint(0, 500) / 100:.2f}"} for i in range(n)]
+
+
+def brute_force(books, page_capacity):
+    best = 0.0
+    for size in range(len(books) + 1):
+        for subset in itertools.combinations(books, size):
+            if sum(int(book['num_pages']) for book in subset) <= page_capacity:
+                best = max(best, sum(float(book['avg_rating']) for book in subset))
+    return best
+
+
+def pages(result):
+    return sum(int(book['num_pages']) for book in result['books'])
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_modes_agree_on_small_inputs(seed):
+    rng = random.Random(seed)
+    books = make_books(rng, rng.randint(0, 9))
+    original = copy.deepcopy(books)
+    pages_per_hour = rng.choice([20, 37.5, 50])
+    hours = rng.randint(0, 30)
+    capacity = ReadingScheduler.page_capacity(hours, pages_per_hour)
+    optimum = brute_force(books, capacity)
+
+    engine = ReadingScheduler()
+    results = {mode: engine.schedule(books, pages_per_hour, hours, mode) for mode in ReadingScheduler.MODES}
+    for mode, result in results.items():
+        assert pages(result) <= capacity, mode
+        assert result['value'] == pytest.approx(sum(float(book['avg_rating']) for book in result['books']))
+        assert result['value'] <= result['upper_bound'] + 1e-9, mode
+    assert results['exact']['value'] == pytest.approx(optimum)
+    assert results['exact']['optimum'] == pytest.approx(optimum)
+    assert results['bnb']['value'] == pytest.approx(optimum)
+    assert results['bnb']['optimum'] == pytest.approx(optimum)
+    assert results['greedy']['value'] <= optimum + 1e-9
+    assert books == original
+
+
+def test_modes_pick_the_same_books_when_greedy_is_optimal():
+    books = [{'title': t, 'num_pages': p, 'avg_rating': r}
+             for t, p, r in [("A", "100", "4.50"), ("B", "300", "4.00"), ("C", "50", "1.00"), ("D", "500", "3.00")]]
+    engine = ReadingScheduler()
+    picks = {mode: sorted(book['title'] for book in engine.schedule(books, 50, 9, mode)['books'])
+             for mode in ReadingScheduler.MODES}
+    assert picks == {mode: ["A", "B", "C"] for mode in ReadingScheduler.MODES}
+
+
+@pytest.mark.parametrize("pages, pages_per_hour, hours", [
+    (["1", "1", "1"], 10, 0.3),             # 0.1 + 0.1 + 0.1 hours > 0.3 in floats
+    (["7", "7", "7", "7", "7"], 3, 35 / 3),
+    (["120", "30", "50"], 37.5, 200 / 37.5),
+])
+def test_books_that_fit_to_the_last_page_are_taken(pages, pages_per_hour, hours):
+    books = [{'title': f"Book {i}", 'num_pages': p, 'avg_rating': "4.00"} for i, p in enumerate(pages)]
+    engine = ReadingScheduler()
+    for mode in ReadingScheduler.MODES:
+        result = engine.schedule(books, pages_per_hour, hours, mode)
+        assert len(result['books']) == len(books), mode
+
+
+@pytest.mark.parametrize("seed", range(30))
+def test_greedy_matches_the_original_loop_in_whole_pages(seed):
+    rng = random.Random(seed)
+    books = make_books(rng, rng.randint(0, 12))
+    pages_per_hour = rng.choice([7, 20, 37.5])
+    chosen = rng.sample(books, len(books) // 2)
+    hours = sum(int(book['num_pages']) for book in chosen) / pages_per_hour  # often an exact fit
+
+    result = ReadingScheduler().schedule(books, pages_per_hour, hours, "greedy")
+    items = ReadingScheduler.prepare(books, pages_per_hour)
+    capacity = ReadingScheduler.page_capacity(hours, pages_per_hour)
+    expected = []
+    for i, _, _, book_pages in items:
+        if book_pages <= capacity:
+            expected.append(books[i])
+            capacity -= book_pages
+    assert result['books'] == expected
+
+
+def test_exact_without_numpy_matches(monkeypatch):
+    books = make_books(random.Random(7), 9)
+    with_numpy = ReadingScheduler().schedule(books, 40, 15, "exact")
+    monkeypatch.setattr(scheduler, "np", None)
+    without_numpy = ReadingScheduler().schedule(books, 40, 15, "exact")
+    assert without_numpy['value'] == pytest.approx(with_numpy['value'])
+    assert without_numpy['value'] == pytest.approx(brute_force(books, 600))
+
+
+def test_bnb_node_limit_reports_no_optimum():
+    books = make_books(random.Random(3), 9)
+    result = ReadingScheduler(max_nodes=1).schedule(books, 40, 15, "bnb")
+    assert result['optimum'] is None
+    assert pages(result) <= 600
+
+
+def test_unknown_mode_is_rejected():
+    with pytest.raises(ValueError):
+        ReadingScheduler().schedule([], 40, 1, "fastest")
@@ -0,0 +1,132 @@
+import csv
+import os
+
+import pytest
+
+import search_index
+from book import CSV_FIELDS
+from MyLibraryManager import MyLibraryManager
+from search_index import SearchIndex
+
+
+def book(title, author, publisher="", genre=""):
+    return {'title': title, 'author_first_last': author, 'publisher': publisher, 'genre': genre}
+
+
+LIBRARY = [
+    book("Dune", "Frank Herbert", "Ace", "Science Fiction"),
+    book("Children of Dune", "Frank Herbert", "Putnam", "Science Fiction"),
+    book("The Hobbit", "J.R.R. Tolkien", "Allen & Unwin", "Fantasy"),
+    book("Sandworm Stories", "Various", "Dune Press", "Anthology"),
+]
+
+
+@pytest.fixture(params=["numpy", "plain"])
+def index(request, monkeypatch):
+    if request.param == "plain":
+        monkeypatch.setattr(search_index, "np", None)
+    return SearchIndex(library=LIBRARY)
+
+
+def positions(results):
+    return [position for position, _ in results]
+
+
+def same_results(actual, expected):
+    assert positions(actual) == positions(expected)
+    assert [score for _, score in actual] == pytest.approx([score for _, score in expected], rel=1e-5)
+
+
+def test_title_matches_rank_above_other_fields(index):
+    assert positions(index.search("dune")) == [0, 1, 3]
+    assert positions(index.search("herbert dune")) == [0, 1, 3]
+    assert positions(index.search("dune", limit=1)) == [0]
+    assert index.search("dune", limit=0) == []
+
+
+def test_prefixes_and_typos_match(index):
+    assert positions(index.search("hobb")) == [2]
+    assert positions(index.search("TOL")) == [2]
+    assert positions(index.search("tolkiem")) == [2]   # one edit
+    assert positions(index.search("sandwrom")) == [3]  # two edits for words of 8+ characters
+    assert index.search("to") == []                     # too short to be a prefix
+    assert index.search("zzzz") == []
+
+
+def test_numpy_and_plain_scores_agree(monkeypatch):
+    queries = ["dune", "frank science", "hob tolkiem", "fiction anthology press"]
+    with_numpy = [SearchIndex(library=LIBRARY).search(query) for query in queries]
+    monkeypatch.setattr(search_index, "np", None)
+    for query, expected in zip(queries, with_numpy):
+        same_results(SearchIndex(library=LIBRARY).search(query), expected)
+
+
+def append_row(csv_file, **fields):
+    with open(csv_file, newline="", encoding="utf-8") as file:
+        row = next(csv.DictReader(file))
+    row.update(fields)
+    with open(csv_file, "a", newline="", encoding="utf-8") as file:
+        csv.DictWriter(file, fieldnames=CSV_FIELDS).writerow(row)
+
+
+def test_index_is_saved_only_when_asked(books_csv):
+    os.chmod(books_csv, 0o640)
+    manager = MyLibraryManager(books_csv)
+    results = manager.search_books("crows")
+    assert results and results[0][0]['title'].startswith("Six of Crows")
+    assert not os.path.exists(manager.search_index.path)
+
+    manager.search_index.save()
+    assert os.stat(manager.search_index.path).st_mode & 0o777 == 0o640
+    assert not manager.search_index.dirty
+
+
+def titles(results):
+    return [(found['title'], pytest.approx(score, rel=1e-5)) for found, score in results]
+
+
+def test_saved_index_is_loaded_until_the_csv_changes(books_csv):
+    first = MyLibraryManager(books_csv)
+    expected = first.search_books("hunger games")
+    assert expected
+    first.search_index.save()
+
+    loaded = MyLibraryManager(books_csv)
+    assert titles(loaded.search_books("hunger games")) == titles(expected)
+    assert not loaded.search_index.dirty  # read from the saved file, not rebuilt
+
+    append_row(books_csv, title="Brand New Book")
+    changed = MyLibraryManager(books_csv)
+    assert changed.search_books("brand")[0][0]['title'] == "Brand New Book"
+    assert changed.search_index.dirty
+
+
+def test_unreadable_index_is_rebuilt(books_csv):
+    with open(books_csv + SearchIndex.SUFFIX, "wb") as file:
+        file.write(b"not a pickle")
+    manager = MyLibraryManager(books_csv)
+    assert manager.search_books("crows")
+    assert manager.search_index.dirty
+
+
+def test_edits_and_appends_update_the_index_in_place(books_csv):
+    manager = MyLibraryManager(books_csv)
+    manager.search_books("anything")  # build the index so the changes below are applied to it
+    title = manager.library[2]['title']
+    manager.edit_book_fields(title, {'title': "Quixotic Reissue"})
+    row = dict(manager.library[0], title="Zephyr Almanac", isbn="", isbn13="")
+    added, rejected = manager.add_books([row])
+    assert added and not rejected
+    assert manager.search_index.built
+
+    fresh = SearchIndex(library=manager.library)
+    for query in ["quixotic", "zephyr", "awakening", "crows", "fiction adult", title]:
+        same_results(manager.search_index.search(query), fresh.search(query))
+    assert manager.search_books("quixotic")[0][0]['title'] == "Quixotic Reissue"
+    assert manager.search_books("zephyr")[0][0]['title'] == "Zephyr Almanac"
+
+    expected = manager.search_books("zephyr quixotic")
+    manager.search_index.save()
+    reloaded = MyLibraryManager(books_csv)
+    assert titles(reloaded.search_books("zephyr quixotic")) == titles(expected)
+    assert not reloaded.search_index.dirty
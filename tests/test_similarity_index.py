@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from similarity_index import SimilarityIndex
+
+
+def make_library(rng, n, genres):
+    # Coarse ratings give many ties; a few books have no rating and are never returned
+    return [{'title': f"Book {i}", 'genre': f"Genre {rng.randrange(genres)}",
+             'avg_rating': f"{rng.randint(0, 50) / 10:.2f}" if rng.random() > 0.05 else ""}
+            for i in range(n)]
+
+
+@pytest.mark.parametrize("n, genres", [(1, 1), (5, 3), (50, 2), (300, 4)])
+def test_heap_walk_matches_brute_force(n, genres):
+    library = make_library(random.Random(n), n, genres)
+    index = SimilarityIndex(library)
+    for position, book in enumerate(library):
+        if index.rating(book) is None:
+            continue
+        for k in (1, 3, 10, n):
+            assert index.similar_to(book, k, exclude=position) == index.brute_force(book, k, exclude=position)
+
+
+def test_books_outside_the_library_and_batches():
+    library = make_library(random.Random(1), 80, 3)
+    index = SimilarityIndex(library)
+    outsider = {'title': "New", 'genre': "Genre 1", 'avg_rating': "3.70"}
+    assert index.similar_to(outsider, 7) == index.brute_force(outsider, 7)
+    unknown_genre = {'title': "Odd", 'genre': "Poetry", 'avg_rating': "2.00"}
+    assert index.similar_to(unknown_genre, 7) == index.brute_force(unknown_genre, 7)
+
+    positions = [position for position, book in enumerate(library) if index.rating(book) is not None][:10]
+    assert index.similar_to_many(positions, 4) == {
+        position: index.brute_force(library[position], 4, exclude=position) for position in positions}
@@ -0,0 +1,117 @@
+import os
+import pickle
+
+from helpers import Helpers
+from snapshot import Snapshot
+
+
+def parse_never(csv_file):
+    raise AssertionError("the CSV was parsed although the snapshot is current")
+
+
+def set_mtime(path, mtime_ns):
+    os.utime(path, ns=(mtime_ns, mtime_ns))
+
+
+def test_load_writes_a_snapshot_and_reuses_it(books_csv):
+    library = Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    assert os.path.exists(Snapshot.path_for(books_csv))
+    assert Snapshot.load(books_csv, parse_never) == library
+
+
+def test_changed_size_invalidates(books_csv):
+    Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    with open(books_csv, "a", encoding="utf-8") as file:
+        file.write("Extra Book,A B,\"B, A\",,,,4.0,,Paperback,100,2001,,Fiction,Adult,False\n")
+    assert Snapshot.read(books_csv, "rows") is None
+    library = Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    assert library[-1]['title'] == "Extra Book"
+
+
+def test_same_size_different_content_invalidates(books_csv):
+    Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    mtime_ns = os.stat(books_csv).st_mtime_ns
+    with open(books_csv, encoding="utf-8") as file:
+        text = file.read()
+    with open(books_csv, "w", encoding="utf-8", newline="") as file:
+        file.write(text.replace("Six of Crows", "Six of Crown", 1))
+    set_mtime(books_csv, mtime_ns + 1_000_000_000)
+    assert Snapshot.read(books_csv, "rows") is None
+
+
+def test_touched_but_unchanged_file_keeps_the_snapshot(books_csv):
+    library = Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    mtime_ns = os.stat(books_csv).st_mtime_ns + 1_000_000_000
+    set_mtime(books_csv, mtime_ns)
+    assert Snapshot.read(books_csv, "rows") == library
+    with open(Snapshot.path_for(books_csv), "rb") as file:
+        assert pickle.load(file)["mtime_ns"] == mtime_ns  # re-keyed, so the next load skips the hash
+
+
+def test_other_layout_or_format_is_not_used(books_csv):
+    Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    assert Snapshot.read(books_csv, "columnar") is None
+
+    path = Snapshot.path_for(books_csv)
+    with open(path, "rb") as file:
+        snapshot = pickle.load(file)
+    snapshot["format"] = Snapshot.FORMAT_VERSION - 1
+    with open(path, "wb") as file:
+        pickle.dump(snapshot, file)
+    assert Snapshot.read(books_csv, "rows") is None
+
+
+def test_corrupt_snapshot_falls_back_to_the_csv(books_csv):
+    expected = Helpers.read_csv_as_dict(books_csv)
+    Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    with open(Snapshot.path_for(books_csv), "r+b") as file:
+        file.truncate(100)
+    assert Snapshot.read(books_csv, "rows") is None
+    assert Snapshot.load(books_csv, Helpers.read_csv_as_dict) == expected
+
+
+def test_snapshot_gets_the_csv_permissions(books_csv):
+    os.chmod(books_csv, 0o644)
+    Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    assert os.stat(Snapshot.path_for(books_csv)).st_mode & 0o777 == 0o644
+
+
+def saved_snapshot(csv_file):
+    with open(Snapshot.path_for(csv_file), "rb") as file:
+        return pickle.load(file)
+
+
+def test_rows_are_saved_column_by_column(books_csv):
+    library = Helpers.read_csv_as_dict(books_csv)
+    Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    snapshot = saved_snapshot(books_csv)
+    assert snapshot["packed"]
+    columns = dict(zip(snapshot["library"]["fields"], snapshot["library"]["columns"]))
+    assert columns["age_group"][0] == ["Adult", "Children", "Young Adult"]  # few distinct values: coded
+    assert columns["title"][0] is None                                     # all different: kept as is
+
+    loaded = Snapshot.read(books_csv, "rows")
+    assert loaded == library
+    assert [list(row) for row in loaded] == [list(row) for row in library]  # same field order
+    adults = [row['age_group'] for row in loaded if row['age_group'] == "Adult"]
+    assert all(value is adults[0] for value in adults)  # one string shared by every row
+
+
+def test_pack_rows_round_trip():
+    rows = [{'title': f"Book {i}", 'genre': ["Fiction", "Fantasy"][i % 2], 'read': "True"} for i in range(9)]
+    assert Snapshot.unpack_rows(Snapshot.pack_rows(rows)) == rows
+    rows[3][None] = ["surplus", "cells"]  # csv.DictReader's restkey for a row with too many cells
+    assert Snapshot.pack_rows(rows) is None
+    for row in rows:
+        row[None] = ["surplus"]
+    assert Snapshot.unpack_rows(Snapshot.pack_rows(rows)) == rows
+    assert Snapshot.pack_rows([]) is None
+
+
+def test_rows_with_different_fields_are_saved_as_they_are(books_csv):
+    with open(books_csv, "a", encoding="utf-8") as file:
+        file.write("Long Row,A B,\"B, A\",,,,4.0,,Paperback,100,2001,,Fiction,Adult,False,extra\n")
+    library = Snapshot.load(books_csv, Helpers.read_csv_as_dict)
+    assert library[-1][None] == ["extra"]
+    assert not saved_snapshot(books_csv)["packed"]
+    assert Snapshot.load(books_csv, parse_never) == library
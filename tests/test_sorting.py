@@ -0,0 +1,89 @@
+import random
+
+import pytest
+
+from sorting import Sorting
+
+
+def reference_sort(books, sort_fields):
+    """
+    Stable sorted() passes from the least significant field up; missing values last in both directions
+    """
+    result = list(books)
+    for sort_field in reversed(sort_fields):
+        field = sort_field.lstrip('-')
+        present = [book for book in result if Sorting.typed_value(book, field) is not None]
+        missing = [book for book in result if Sorting.typed_value(book, field) is None]
+        present = sorted(present, key=lambda book: Sorting.typed_value(book, field),
+                         reverse=sort_field.startswith('-'))
+        result = present + missing
+    return result
+
+
+def titles(books):
+    return [book['title'] for book in books]
+
+
+def test_numbers_compare_as_numbers_and_missing_values_go_last():
+    books = [{'title': t, 'num_pages': p} for t, p in
+             [("a", "100"), ("b", ""), ("c", "9"), ("d", "12.0"), ("e", "abc"), ("f", "1e999"), ("g", "12")]]
+    assert titles(Sorting.typed_merge_sort(books, ['num_pages'])) == ["c", "d", "g", "a", "b", "e", "f"]
+    assert titles(Sorting.typed_merge_sort(books, ['-num_pages'])) == ["a", "d", "g", "c", "b", "e", "f"]
+
+
+def test_text_is_case_insensitive_and_trimmed():
+    books = [{'title': t} for t in ["banana", " Apple", "cherry", "apple", ""]]
+    assert titles(Sorting.typed_merge_sort(books, ['title'])) == [" Apple", "apple", "banana", "cherry", ""]
+    assert titles(Sorting.typed_merge_sort(books, ['-title'])) == ["cherry", "banana", " Apple", "apple", ""]
+
+
+def test_later_fields_break_ties():
+    books = [{'title': t, 'avg_rating': r, 'year_published': y} for t, r, y in
+             [("a", "4.0", "2001"), ("b", "4.00", "1999"), ("c", "3.5", ""), ("d", "", "2005"), ("e", "4", "2001")]]
+    assert titles(Sorting.typed_merge_sort(books, ['-avg_rating', 'year_published', 'title'])) == \
+        ["b", "a", "e", "c", "d"]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_matches_stable_sorted_on_the_same_keys(seed):
+    rng = random.Random(seed)
+    books = [{'title': rng.choice(["Dune", "dune", "Emma", "", "Ulysses"]),
+              'avg_rating': rng.choice(["", "3.5", "4", "4.0", "n/a", "5"]),
+              'num_pages': rng.choice(["", "100", "99", "100.0", "x"]),
+              'year_published': str(rng.randint(1990, 1995)),
+              'id': i} for i in range(rng.randint(0, 80))]
+    fields = rng.sample(['title', '-title', 'avg_rating', '-avg_rating', 'num_pages', '-num_pages',
+                         'year_published', '-year_published'], rng.randint(1, 3))
+    result = Sorting.typed_merge_sort(books, fields)
+    assert [book['id'] for book in result] == [book['id'] for book in reference_sort(books, fields)]
+
+
+def test_input_is_not_modified():
+    books = [{'title': t} for t in "cab"]
+    Sorting.typed_merge_sort(books, ['title'])
+    assert titles(books) == ["c", "a", "b"]
+
+
+def shelf_titles(manager):
+    buckets = manager.shelf_cache.get(manager.library, manager.library_version)
+    return {group: [book['title'] for book in books] for group, books in buckets.items()}
+
+
+def test_shelf_cache_follows_edits_and_deletes(books_csv):
+    from MyLibraryManager import MyLibraryManager
+
+    manager = MyLibraryManager(books_csv)
+    before = shelf_titles(manager)
+    buckets = manager.shelf_cache.buckets
+    assert manager.shelf_cache.get(manager.library, manager.library_version) is buckets  # not re-sorted
+
+    moved = before['Adult'][0]
+    manager.edit_book_fields(moved, {'age_group': 'Children'})
+    after_edit = shelf_titles(manager)
+    assert moved not in after_edit['Adult'] and moved in after_edit['Children']
+
+    gone = before['Young Adult'][0]
+    manager.delete_book(gone)
+    assert gone not in shelf_titles(manager)['Young Adult']
+    expected = Sorting.bucket_sort_books(manager.library)
+    assert shelf_titles(manager) == {group: [book['title'] for book in books] for group, books in expected.items()}
@@ -0,0 +1,118 @@
+import io
+
+import pytest
+from tabulate import tabulate
+
+from helpers import Helpers
+from MyLibraryManager import MyLibraryManager
+from table_renderer import BOOK_HEADERS, TableRenderer, book_rows
+
+
+def render(rows, headers=BOOK_HEADERS, **options):
+    file = io.StringIO()
+    count = TableRenderer(headers, file=file, **options).render(rows)
+    return file.getvalue(), count
+
+
+def test_output_matches_tabulate_when_every_row_is_sampled(books_csv):
+    rows = list(book_rows(Helpers.read_csv_as_dict(books_csv)))
+    output, count = render(rows)
+    assert output == tabulate(rows, headers=BOOK_HEADERS, tablefmt="pretty") + "\n"
+    assert count == len(rows)
+
+    assert render(iter(rows), sample_size=len(rows))[0] == output  # a generator works the same
+
+
+def test_missing_fields_are_shown_as_na():
+    assert list(book_rows([{'title': "Untitled"}])) == [["Untitled"] + ["N/A"] * (len(BOOK_HEADERS) - 1)]
+
+
+def test_wide_cells_are_cut_to_the_column():
+    output, _ = render([["a" * 15, "short"], ["two\nlines", None]], headers=["Name", "Note"], max_width=10)
+    lines = output.splitlines()
+    assert lines[0] == "+------------+-------+"
+    assert lines[3] == "| aaaaaaa... | short |"
+    assert lines[4] == "| two lines  |       |"
+    assert {len(line) for line in lines} == {len(lines[0])}
+
+
+def test_rows_after_the_sample_are_cut_to_the_sampled_widths():
+    rows = [["x"], ["y"], ["a much longer value"]]
+    output, count = render(rows, headers=["Col"], sample_size=2)
+    assert output.splitlines()[5] == "| ... |"
+    assert count == 3
+
+
+def test_rows_are_written_as_they_are_produced():
+    file = io.StringIO()
+    seen = []
+
+    def rows():
+        for i in range(5):
+            seen.append(file.getvalue().count("\n"))
+            yield [str(i)]
+
+    TableRenderer(["N"], sample_size=2, file=file).render(rows())
+    assert seen == [0, 0, 5, 6, 7]  # the header and the two sampled rows are out before the third row is read
+
+
+@pytest.mark.parametrize("total, page, page_size, expected", [
+    (0, None, None, (0, 0, 1)),
+    (21, None, 5, (0, 5, 5)),
+    (21, 5, 5, (20, 21, 5)),
+    (120, 3, None, (100, 120, 3)),
+    (50, 1, None, (0, 50, 1)),
+])
+def test_page_bounds(total, page, page_size, expected):
+    assert TableRenderer.page_bounds(total, page, page_size) == expected
+
+
+@pytest.mark.parametrize("page, page_size, message", [
+    (6, 5, "out of range"),
+    (-1, 5, "out of range"),
+    (1, -3, "at least 1"),
+])
+def test_page_bounds_rejects_bad_pages(page, page_size, message):
+    with pytest.raises(ValueError, match=message):
+        TableRenderer.page_bounds(21, page, page_size)
+
+
+def test_view_books_shows_one_page(books_csv, capsys):
+    manager = MyLibraryManager(books_csv)
+    titles = [book['title'] for book in manager.library]
+
+    manager.view_books(page=2, page_size=5)
+    output = capsys.readouterr().out
+    assert "Page 2 of 4 (books 6-10 of 20)" in output
+    shown = [title for title in titles if title in output]
+    assert shown == titles[5:10]
+
+    with pytest.raises(ValueError):
+        manager.view_books(page=5, page_size=5)
+
+
+def answer(monkeypatch, answers):
+    answers = iter(answers)
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+
+
+def test_page_through_follows_the_answers(books_csv, monkeypatch, capsys):
+    manager = MyLibraryManager(books_csv)
+    shown = []
+    answer(monkeypatch, ["", "7", "3", ""])
+    manager.page_through(lambda page=None, page_size=None: shown.append(page), total=120)
+    assert shown == [1, 2, 2, 3]  # Enter, a page that does not exist, a jump, Enter on the last page
+    assert "from 1 to 3" in capsys.readouterr().out
+
+    shown.clear()
+    answer(monkeypatch, ["", "q"])
+    manager.page_through(lambda page=None, page_size=None: shown.append(page), total=120)
+    assert shown == [1, 2]
+
+
+def test_page_through_shows_a_short_listing_without_prompting(books_csv, monkeypatch):
+    manager = MyLibraryManager(books_csv)
+    shown = []
+    answer(monkeypatch, [])
+    manager.page_through(lambda page=None, page_size=None: shown.append(page), total=TableRenderer.PAGE_SIZE)
+    assert shown == [None]
@@ -0,0 +1,148 @@
+from pathlib import Path
+
+import pytest
+
+import cli
+from columnar_library import ColumnarLibrary
+from helpers import Helpers
+from MyLibraryManager import MyLibraryManager
+from validation import Validation
+
+
+@pytest.mark.parametrize("isbn, valid", [
+    ("0306406152", True),
+    ("0-306-40615-2", True),
+    ("080442957X", True),
+    ("080442957x", True),
+    ("0306406153", False),   # wrong check digit
+    ("030640615", False),    # too short
+    ("03064061522", False),  # too long
+    ("X306406152", False),   # X is only allowed as the check digit
+    ("", False),
+])
+def test_isbn10_checksum(isbn, valid):
+    assert Validation.is_valid_isbn(isbn) is valid
+
+
+@pytest.mark.parametrize("isbn13, valid", [
+    ("9780306406157", True),
+    ("978-0-306-40615-7", True),
+    ("9790000000001", True),
+    ("9780306406158", False),  # wrong check digit
+    ("9770306406155", False),  # only the 978 and 979 prefixes are ISBNs
+    ("9.78031E+12", False),
+    ("", False),
+])
+def test_isbn13_checksum(isbn13, valid):
+    assert Validation.is_valid_isbn13(isbn13) is valid
+
+
+def test_isbn10_to_isbn13():
+    assert Validation.isbn10_to_isbn13("0-306-40615-2") == "9780306406157"
+    assert Validation.isbn10_to_isbn13("080442957X") == "9780804429573"
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("0-306-40615-2", "0306406152"),
+    ('="0306406152"', "0306406152"),
+    ("080442957x", "080442957X"),
+    ("978 0 306 40615 7", "9780306406157"),
+    ("not an isbn", "not an isbn"),
+    ("", ""),
+])
+def test_normalize_isbn(value, expected):
+    assert Validation.normalize_isbn(value) == expected
+
+
+def test_scientific_isbn13_is_restored_only_when_it_rounds_back():
+    assert Validation.normalize_isbn13("9.78163E+12", "1627792120") == "9781627792127"
+    assert Validation.normalize_isbn13("9.78164E+12", "1627792120") == "9.78164E+12"  # another book's ISBN-10
+    assert Validation.normalize_isbn13("9.78163E+12", "") == "9.78163E+12"
+    assert Validation.normalize_isbn13("9.78163E+12", "1627792121") == "9.78163E+12"  # invalid ISBN-10
+
+
+def test_dates_need_a_real_day_and_year():
+    assert Validation.is_valid_date("2020-02-29")
+    assert not Validation.is_valid_date("2021-02-29")
+    assert not Validation.is_valid_date("0000-01-01")
+
+
+def test_loading_leaves_isbns_as_stored(books_csv):
+    csv_before = Path(books_csv).read_text(encoding="utf-8")
+    manager = MyLibraryManager(books_csv)
+    assert manager.library[0]['isbn13'] == "9.78163E+12"
+    assert manager.validation_issues['isbn13']
+    manager.update_csv_file()
+    assert Path(books_csv).read_text(encoding="utf-8") == csv_before
+
+
+def test_normalize_isbns_reports_and_saves(books_csv):
+    manager = MyLibraryManager(books_csv)
+    changed = manager.normalize_isbns()
+    assert changed[0] == ("Six of Crows (Six of Crows, #1)", "9.78163E+12", "9781627792127")
+    assert all(Validation.is_valid_isbn13(new) for _, _, new in changed)
+    assert 'isbn13' not in manager.validation_issues
+
+    reloaded = MyLibraryManager(books_csv)
+    assert reloaded.library[0]['isbn13'] == "9781627792127"
+    assert reloaded.normalize_isbns() == []
+
+
+def test_validation_runs_on_first_use_and_after_changes(books_csv, monkeypatch):
+    calls = []
+    validate = Validation.validate_library
+    monkeypatch.setattr(Validation, "validate_library",
+                        staticmethod(lambda library: calls.append(1) or validate(library)))
+    manager = MyLibraryManager(books_csv)
+    manager.library
+    assert calls == []
+    manager.validation_issues
+    manager.validation_issues
+    assert len(calls) == 1
+    manager.edit_book_fields(manager.library[0]['title'], {'my_rating': "4"})
+    manager.validation_issues
+    assert len(calls) == 2
+
+
+def test_columnar_and_row_layouts_report_the_same_issues(books_csv):
+    rows = Helpers.read_csv_as_dict(books_csv) * 60  # past the size where ISBN columns use NumPy
+    rows[5] = dict(rows[5], isbn="0306406153", isbn13="9780306406158", num_pages="0412", year_published="n/a")
+    issues = Validation.validate_library(rows)
+    assert issues == Validation.validate_library(ColumnarLibrary.from_rows(rows))
+    assert 5 in issues['isbn'] and 5 in issues['isbn13'] and 5 in issues['year_published']
+
+
+def add_bad_row(books_csv):
+    rows = Helpers.read_csv_as_dict(books_csv)
+    Validation.normalize_library(rows)  # start from a library without issues
+    rows.append(dict(rows[0], title="Bad Book", isbn="0306406153", num_pages="many"))
+    Helpers.rewrite_csv(books_csv, rows)
+    return len(rows) - 1
+
+
+def test_bad_rows_in_the_csv_are_reported(books_csv, capsys):
+    position = add_bad_row(books_csv)
+    manager = MyLibraryManager(books_csv)
+    assert manager.validation_issues == {'isbn': [position], 'num_pages': [position]}
+    assert manager.invalid_books() == [(position, "Bad Book", 'isbn', "0306406153"),
+                                       (position, "Bad Book", 'num_pages', "many")]
+    assert "1 book(s)" in manager.validation_warning()
+
+    assert cli.main(["--csv", books_csv, "validate"]) == 1
+    out = capsys.readouterr().out
+    assert "Bad Book" in out and "invalid num_pages 'many'" in out
+
+
+def test_menu_warns_once_after_the_first_load(books_csv, monkeypatch, capsys):
+    add_bad_row(books_csv)
+    answers = iter(["1", "1", "10"])
+    monkeypatch.setattr("builtins.input", lambda prompt="": next(answers))
+    MyLibraryManager(books_csv).menu()
+    assert capsys.readouterr().out.count("Warning: 1 book(s)") == 1
+
+
+def test_valid_library_has_no_warning(books_csv):
+    manager = MyLibraryManager(books_csv)
+    manager.normalize_isbns()
+    assert manager.validation_warning() is None
+    assert cli.main(["--csv", books_csv, "validate"]) == 0
@@ -0,0 +1,70 @@
+import random
+
+import pytest
+
+import what_if
+from streaming import StreamingStats
+from what_if import WhatIfPlanner
+
+
+def make_books(rng, n):
+    return [{'title': f"Book {i}", 'num_pages': str(rng.choice([0, rng.randint(1, 600)])),
+             'avg_rating': f"{rng.randint(0, 500) / 100:.2f}", 'read': rng.choice(["True", "False", "FALSE"])}
+            for i in range(n)]
+
+
+def assert_same_plans(actual, expected):
+    assert len(actual) == len(expected)
+    for plan, reference in zip(actual, expected):
+        assert plan['books'] == reference['books'], (plan, reference)
+        for key in ('pages_per_hour', 'hours_available', 'total_hours', 'value', 'hours_used', 'upper_bound'):
+            assert plan[key] == pytest.approx(reference[key]), key
+
+
+@pytest.mark.parametrize("seed", range(25))
+def test_plan_matches_one_greedy_run_per_combination(seed):
+    rng = random.Random(seed)
+    books = make_books(rng, rng.randint(0, 60))
+    speeds = [rng.choice([10, 20, 37.5, 40, 55.5]) for _ in range(rng.randint(1, 4))]
+    budgets = [rng.choice([0, 0.3, 1, 2.5, 7, 40, 1000]) for _ in range(rng.randint(1, 4))]
+    planner = WhatIfPlanner()
+    expected = planner.plan_serial(list(StreamingStats.iter_unread(books)), speeds, budgets)
+    assert_same_plans(planner.plan(books, speeds, budgets), expected)
+
+
+@pytest.mark.parametrize("pages, speed, hours", [
+    (["1", "1", "1"], 10, 0.3),     # 0.1 + 0.1 + 0.1 > 0.3 in float hours
+    (["7"] * 5, 3, 35 / 3),
+    (["120", "30", "50"], 37.5, 200 / 37.5),
+    (["100", "101"], 10, 20.0999),  # the second book misses by a fraction of a page
+])
+def test_exact_page_fits_agree(pages, speed, hours):
+    books = [{'title': f"Book {i}", 'num_pages': p, 'avg_rating': "4.00", 'read': "False"} for i, p in enumerate(pages)]
+    planner = WhatIfPlanner()
+    expected = planner.plan_serial(books, [speed], [hours])
+    assert_same_plans(planner.plan(books, [speed], [hours]), expected)
+
+
+def test_skipping_past_books_that_do_not_fit():
+    # Ratings chosen so long and short books alternate in value-per-page order and the scan has to jump
+    pages_and_ratings = [("500", "5.00"), ("10", "0.09"), ("400", "3.00"), ("10", "0.07"),
+                         ("1000", "5.00"), ("10", "0.04"), ("300", "1.00"), ("5", "0.01")]
+    books = [{'title': f"Book {i}", 'num_pages': p, 'avg_rating': r, 'read': "False"}
+             for i, (p, r) in enumerate(pages_and_ratings)]
+    planner = WhatIfPlanner()
+    budgets = [0.5, 1, 2.5, 42, 50.5, 91, 300]
+    plans = planner.plan(books, [10], budgets)
+    assert_same_plans(plans, planner.plan_serial(books, [10], budgets))
+    assert [plan['books'] for plan in plans] == [1, 1, 3, 3, 2, 3, 8]
+
+
+def test_without_numpy_the_serial_plans_are_used(monkeypatch):
+    books = make_books(random.Random(3), 30)
+    expected = WhatIfPlanner().plan(books, [20, 40], [1, 5])
+    monkeypatch.setattr(what_if, "np", None)
+    assert_same_plans(WhatIfPlanner().plan(books, [20, 40], [1, 5]), expected)
+
+
+def test_speeds_must_be_positive():
+    with pytest.raises(ValueError):
+        WhatIfPlanner().plan(make_books(random.Random(0), 5), [0], [1])
@@ -1,21 +1,41 @@
-from datetime import datetime
+import re
+
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")  # NumPy is optional, ISBN columns are then checked one value at a time
+
+# Compiled once; the checks below run on every row of every load and import
+DATE_PATTERN = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+YEAR_PATTERN = re.compile(r"\s*(\d{4})\s*")
+RATING_PATTERN = re.compile(r"\s*(?:\d+(?:\.\d*)?|\.\d+)\s*")
+PAGES_PATTERN = re.compile(r"\s*\+?(\d+)\s*")
+ISBN10_PATTERN = re.compile(r"\d{9}[\dXx]")
+ISBN13_PATTERN = re.compile(r"97[89]\d{10}")
+# ISBN-13s that went through a spreadsheet: 9.78163E+12
+SCIENTIFIC_ISBN13_PATTERN = re.compile(r"\s*(\d)\.(\d+)[Ee]\+?12\s*")
+# Goodreads exports quote ISBNs as ="0439023483" so spreadsheets keep them as text
+ISBN_NOISE = re.compile(r"[\s\-=\"]")
+
+ISBN10_WEIGHTS = (10, 9, 8, 7, 6, 5, 4, 3, 2)
+DAYS_IN_MONTH = (31, 29, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+
 
 class Validation:
     @staticmethod
     def is_valid_date(date_str):
-        try:
-            datetime.strptime(date_str, "%Y-%m-%d")
-            return True
-        except ValueError:
+        match = DATE_PATTERN.fullmatch(date_str)
+        if match is None:
+            return False
+        year, month, day = int(match[1]), int(match[2]), int(match[3])
+        if year == 0 or not 1 <= month <= 12 or not 1 <= day <= DAYS_IN_MONTH[month - 1]:
             return False
+        return month != 2 or day < 29 or (year % 4 == 0 and (year % 100 != 0 or year % 400 == 0))
 
     @staticmethod
     def is_valid_rating(rating):
-        try:
-            rating = float(rating)
-            return 0 <= rating <= 5
-        except ValueError:
+        if RATING_PATTERN.fullmatch(str(rating)) is None:
             return False
+        return 0 <= float(rating) <= 5
 
     @staticmethod
     def is_valid_age_group(age_group):
@@ -24,29 +44,280 @@ class Validation:
 
     @staticmethod
     def is_valid_num_pages(num_pages):
-        try:
-            num_pages = int(num_pages)
-            return num_pages > 0
-        except ValueError:
-            return False
+        match = PAGES_PATTERN.fullmatch(str(num_pages))
+        return match is not None and int(match[1]) > 0
 
     @staticmethod
     def is_valid_year(year):
-        try:
-            year = int(year)
-            return 1000 <= year <= 9999
-        except ValueError:
-            return False
+        match = YEAR_PATTERN.fullmatch(str(year))
+        return match is not None and match[1][0] != "0"
 
     @staticmethod
     def is_valid_isbn(isbn):
-        return len(isbn) == 10
+        """
+        True if isbn is an ISBN-10 with a correct check digit (hyphens and spaces are ignored)
+        """
+        if ISBN10_PATTERN.fullmatch(isbn) is None:
+            isbn = ISBN_NOISE.sub("", isbn)
+            if ISBN10_PATTERN.fullmatch(isbn) is None:
+                return False
+        total = sum(weight * int(ch) for weight, ch in zip(ISBN10_WEIGHTS, isbn))
+        total += 10 if isbn[9] in "Xx" else int(isbn[9])
+        return total % 11 == 0
 
     @staticmethod
     def is_valid_isbn13(isbn13):
-        return len(isbn13) == 13
+        """
+        True if isbn13 is an ISBN-13 (978/979 prefix) with a correct check digit
+        """
+        if ISBN13_PATTERN.fullmatch(isbn13) is None:
+            isbn13 = ISBN_NOISE.sub("", isbn13)
+            if ISBN13_PATTERN.fullmatch(isbn13) is None:
+                return False
+        return Validation._isbn13_sum(isbn13) % 10 == 0
+
+    @staticmethod
+    def _isbn13_sum(digits):
+        # Weights alternate 1, 3, 1, ...
+        return sum(int(ch) * (3 if i % 2 else 1) for i, ch in enumerate(digits))
 
     @staticmethod
     def is_valid_binding(binding):
         valid_bindings = ['paperback', 'hardcover', 'ebook']
-        return binding.lower() in valid_bindings
\ No newline at end of file
+        return binding.lower() in valid_bindings
+
+    @staticmethod
+    def isbn10_to_isbn13(isbn):
+        """
+        Converts a valid ISBN-10 to its 978-prefixed ISBN-13
+        """
+        core = "978" + ISBN_NOISE.sub("", isbn)[:9]
+        check = -Validation._isbn13_sum(core) % 10
+        return core + str(check)
+
+    @staticmethod
+    def normalize_isbn(isbn):
+        """
+        Strips hyphens, spaces and spreadsheet quoting (="...") from an ISBN; other values are kept as they are
+        """
+        if not isbn:
+            return isbn
+        cleaned = ISBN_NOISE.sub("", isbn)
+        return cleaned.upper() if ISBN10_PATTERN.fullmatch(cleaned) or ISBN13_PATTERN.fullmatch(cleaned) else isbn
+
+    @staticmethod
+    def normalize_isbn13(isbn13, isbn=""):
+        """
+        Restores an ISBN-13 that a spreadsheet turned into scientific notation (9.78163E+12)
+
+        Only the leading digits survive in that form, so the full number is rebuilt from the book's
+        ISBN-10 ('978' + first 9 digits + new check digit) and accepted only if it rounds back to
+        the same scientific value. Otherwise the value is returned unchanged (and stays invalid)
+
+        Args:
+            isbn13 (str): The ISBN-13 as stored
+            isbn (str): The book's ISBN-10, if any
+
+        Returns:
+            str: The restored or cleaned ISBN-13, or isbn13 unchanged
+        """
+        if not isbn13:
+            return isbn13
+        match = SCIENTIFIC_ISBN13_PATTERN.fullmatch(isbn13)
+        if match is None:
+            return Validation.normalize_isbn(isbn13)
+        if not isbn or not Validation.is_valid_isbn(isbn):
+            return isbn13
+        candidate = Validation.isbn10_to_isbn13(isbn)
+        leading = match[1] + match[2]
+        scale = 10 ** (13 - len(leading))
+        if abs(int(candidate) - int(leading) * scale) * 2 <= scale:
+            return candidate
+        return isbn13
+
+    @staticmethod
+    def normalize_row(row):
+        """
+        Returns a copy of row with its ISBNs cleaned up and a spreadsheet-mangled ISBN-13 restored
+        """
+        row = dict(row)
+        if row.get('isbn'):
+            row['isbn'] = Validation.normalize_isbn(str(row['isbn']))
+        if row.get('isbn13'):
+            row['isbn13'] = Validation.normalize_isbn13(str(row['isbn13']), row.get('isbn') or "")
+        return row
+
+    @staticmethod
+    def normalize_library(library):
+        """
+        Restores spreadsheet-mangled ISBN-13s in place
+
+        Returns:
+            list: (position, old ISBN-13) of every row changed
+        """
+        changed = []
+        isbn13_column = Validation._column(library, 'isbn13')
+        for position, isbn13 in enumerate(isbn13_column):
+            if isbn13 and ISBN13_PATTERN.fullmatch(isbn13) is None:
+                book = library[position]
+                fixed = Validation.normalize_isbn13(isbn13, book.get('isbn') or "")
+                if fixed != isbn13:
+                    book['isbn13'] = fixed
+                    changed.append((position, isbn13))
+        return changed
+
+    # Field -> check for one non-empty value, used by validate_column
+    FIELD_CHECKS = {
+        'isbn': 'is_valid_isbn',
+        'isbn13': 'is_valid_isbn13',
+        'my_rating': 'is_valid_rating',
+        'avg_rating': 'is_valid_rating',
+        'binding': 'is_valid_binding',
+        'num_pages': 'is_valid_num_pages',
+        'year_published': 'is_valid_year',
+        'date_read': 'is_valid_date',
+        'age_group': 'is_valid_age_group',
+    }
+
+    @staticmethod
+    def _column(library, field):
+        column = getattr(library, 'column', None)  # ColumnarLibrary keeps text fields as plain lists
+        if column is not None and isinstance(column(field), list):
+            return column(field)
+        return [book.get(field) for book in library]
+
+    @staticmethod
+    def _stored_column(library, field):
+        """
+        Returns (values, decode): the column as stored and a function turning a stored value into its
+        CSV string. Typed ColumnarLibrary columns are returned raw so each distinct value is decoded once;
+        text columns (ISBNs, dates) already hold the strings and need no decode, so the ISBN columns
+        take the NumPy path in validate_column just like a list of rows
+        """
+        column = getattr(library, 'column', None)
+        if column is not None:
+            if isinstance(column(field), list):
+                return column(field), None
+            if library.has_raw(field):  # values the column cannot rebuild must be checked as written
+                return [library.get_value(position, field) for position in range(len(library))], None
+            return column(field), lambda stored: library.decode(field, stored)
+        return [book.get(field) for book in library], None
+
+    @staticmethod
+    def validate_column(field, values, decode=None):
+        """
+        Checks a whole column at once. Empty values are not checked
+
+        Args:
+            field (str): A key of FIELD_CHECKS
+            values (iterable): The column's values as strings (or as stored, with decode)
+            decode (callable): Turns a stored value into its string form, if values are not strings
+
+        Returns:
+            list: Positions of the invalid values
+        """
+        if field in ('isbn', 'isbn13') and decode is None and np is not None and len(values) >= 1000:
+            return Validation.validate_isbn_column(field, values)
+        check = getattr(Validation, Validation.FIELD_CHECKS[field])
+        # Repeated values (bindings, years, ...) are only checked once
+        verdicts = {}
+        invalid = []
+        for position, value in enumerate(values):
+            verdict = verdicts.get(value)
+            if verdict is None:
+                text = decode(value) if decode is not None else value
+                verdict = verdicts[value] = not text or check(str(text))
+            if not verdict:
+                invalid.append(position)
+        return invalid
+
+    @staticmethod
+    def validate_isbn_column(field, values):
+        """
+        Checks a whole ISBN or ISBN-13 column with NumPy: the strings become a (books, digits) array of
+        code points and the check digits of all books are verified with one matrix product. Values that
+        are not plain digits (hyphenated, quoted, ...) fall back to is_valid_isbn/is_valid_isbn13
+
+        Returns:
+            list: Positions of the invalid values (empty values are not checked)
+        """
+        width, check = (10, Validation.is_valid_isbn) if field == 'isbn' else (13, Validation.is_valid_isbn13)
+        values = ["" if value is None else value for value in values]
+        lengths = np.fromiter(map(len, values), dtype=np.int64, count=len(values))
+        digits = np.array(values, dtype=f"U{width}").view(np.uint32).reshape(len(values), width).astype(np.int64) - 48
+        if field == 'isbn':
+            last = digits[:, -1]
+            last[(last == ord('X') - 48) | (last == ord('x') - 48)] = 10
+            plain = (lengths == width) & ((digits[:, :-1] >= 0) & (digits[:, :-1] <= 9)).all(axis=1) & (last >= 0) & (last <= 10)
+            valid = plain & (digits @ np.arange(10, 0, -1) % 11 == 0)
+        else:
+            plain = (lengths == width) & ((digits >= 0) & (digits <= 9)).all(axis=1)
+            prefix = (digits[:, 0] == 9) & (digits[:, 1] == 7) & (digits[:, 2] >= 8)
+            valid = plain & prefix & (digits @ np.tile([1, 3], 7)[:width] % 10 == 0)
+        invalid = []
+        for position in np.flatnonzero(~valid & (lengths > 0)).tolist():
+            if plain[position] or not check(str(values[position])):
+                invalid.append(position)
+        return invalid
+
+    @staticmethod
+    def validate_library(library):
+        """
+        Checks every validated column of the library
+
+        Args:
+            library (list): Book rows or a ColumnarLibrary
+
+        Returns:
+            dict: field -> positions of the books with an invalid value, only fields with problems
+        """
+        issues = {}
+        for field in Validation.FIELD_CHECKS:
+            invalid = Validation.validate_column(field, *Validation._stored_column(library, field))
+            if invalid:
+                issues[field] = invalid
+        return issues
+
+    @staticmethod
+    def book_errors(row):
+        """
+        Checks every field of a book row with the same rules add_book applies to user input
+
+        Args:
+            row (dict): A row with the CSV_FIELDS keys (or author_first/author_last instead of the
+                combined author fields), values as strings. Pass it through normalize_row first to
+                accept hyphenated or spreadsheet-mangled ISBNs
+
+        Returns:
+            list: One message per invalid field, empty if the row is valid
+        """
+        def value(field):
+            return str(row.get(field) or "").strip()
+
+        errors = []
+        if not value('title'):
+            errors.append("Missing title.")
+        if value('isbn') and not Validation.is_valid_isbn(value('isbn')):
+            errors.append("Invalid ISBN. It should be 10 characters long with a correct check digit.")
+        if value('isbn13') and not Validation.is_valid_isbn13(value('isbn13')):
+            if SCIENTIFIC_ISBN13_PATTERN.fullmatch(value('isbn13')):
+                errors.append("ISBN-13 is in scientific notation and could not be restored from the ISBN.")
+            else:
+                errors.append("Invalid ISBN-13. It should be 13 digits starting with 978 or 979 with a correct check digit.")
+        if value('my_rating') and not Validation.is_valid_rating(value('my_rating')):
+            errors.append("Invalid rating. It should be between 0 and 5.")
+        if value('avg_rating') and not Validation.is_valid_rating(value('avg_rating')):
+            errors.append("Invalid average rating. It should be between 0 and 5.")
+        if not Validation.is_valid_binding(value('binding')):
+            errors.append("Invalid binding. It should be one of 'paperback', 'hardcover', or 'ebook'.")
+        if not Validation.is_valid_num_pages(value('num_pages')):
+            errors.append("Invalid number of pages. It should be a positive integer greater than 0.")
+        if not Validation.is_valid_year(value('year_published')):
+            errors.append("Invalid year. It should be a 4-digit year (YYYY format).")
+        if value('date_read') and not Validation.is_valid_date(value('date_read')):
+            errors.append("Invalid date format. Please use YYYY-MM-DD format.")
+        if value('read') and value('read').lower() not in ('true', 'false'):
+            errors.append("Invalid read status. It should be True or False.")
+        if not Validation.is_valid_age_group(value('age_group')):
+            errors.append("Invalid age group. Please enter 'Children', 'Young Adult', or 'Adult'.")
+        return errors
@@ -0,0 +1,220 @@
+import math
+
+from scheduler import ReadingScheduler
+from streaming import StreamingStats
+from lazy_imports import lazy_import
+
+np = lazy_import("numpy")  # NumPy is optional, plans fall back to one ReadingScheduler run per combination
+
+
+class WhatIfPlanner:
+    """
+    Answers "how long would it take, and what could I read, at 20, 30, ..., 100 pages/hour"
+    for many reading speeds and hour budgets at once
+
+    The unread books are reduced to a pages column and a value (avg_rating) column once. Value
+    per hour is value per page times the speed, and a book fits in the hours left exactly when
+    its pages fit in hours * speed pages. So the greedy order is the same for every speed: the
+    books are sorted once, and each (speed, budget) pair is a page capacity filled from prefix
+    sums (see greedy_pages), without looping over the books in Python. The results are those of
+    running estimate_reading_time and the greedy mode of ReadingScheduler once per combination.
+    Both count the time available in whole pages (ReadingScheduler.page_capacity).
+    """
+
+    TABLE_HEADERS = ["Pages/hour", "Hours available", "Hours for all unread",
+                     "Books", "Value", "Hours used", "Upper bound"]
+
+    def __init__(self, scheduler=None):
+        self.scheduler = scheduler or ReadingScheduler()
+
+    @staticmethod
+    def columns(books):
+        """
+        Returns the pages and value columns of the unread books
+
+        Args:
+            books (iterable): Book rows (list, ColumnarLibrary or CSV stream)
+
+        Returns:
+            tuple: (pages, values) NumPy float arrays
+        """
+        pages = []
+        values = []
+        for book in StreamingStats.iter_unread(books):
+            pages.append(int(book.get('num_pages') or 0))
+            values.append(float(book.get('avg_rating') or 0))
+        return np.asarray(pages, dtype=np.float64), np.asarray(values, dtype=np.float64)
+
+    def total_hours(self, books, speeds):
+        """
+        Hours needed to read every unread book, for each reading speed
+
+        Args:
+            books (iterable): Book rows; read books are ignored
+            speeds (sequence): Reading speeds in pages per hour
+
+        Returns:
+            list: One total per speed, in the order given
+        """
+        if np is None:
+            pages = [int(book.get('num_pages') or 0) for book in StreamingStats.iter_unread(books)]
+            return [math.fsum(page / float(speed) for page in pages) for speed in speeds]
+        pages, _ = self.columns(books)
+        speeds = np.asarray(speeds, dtype=np.float64).reshape(-1)
+        return (pages[None, :] / speeds[:, None]).sum(axis=1).tolist()
+
+    def plan(self, books, speeds, budgets):
+        """
+        PRECONDITION: every speed > 0, every budget >= 0
+        RETURNS: plans
+        POST1: plans has one row per (speed, budget) pair, speeds varying slowest
+        POST2: books and their rows are unchanged
+
+        Args:
+            books (iterable): Book rows; read books are ignored
+            speeds (sequence): Reading speeds in pages per hour
+            budgets (sequence): Hours available to read
+
+        Returns:
+            list: dicts with pages_per_hour, hours_available, total_hours (every unread book),
+            books (number scheduled), value, hours_used and upper_bound
+        """
+        if np is None:
+            return self.plan_serial(list(StreamingStats.iter_unread(books)), speeds, budgets)
+
+        pages, values = self.columns(books)
+        speeds = np.asarray(speeds, dtype=np.float64).reshape(-1)
+        budgets = np.asarray(budgets, dtype=np.float64).reshape(-1)
+        if np.any(speeds <= 0):
+            raise ValueError("Reading speeds must be positive")
+
+        # Same order as ReadingScheduler.prepare for any speed: value per page descending, stable, free books first
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(pages > 0, values / pages, np.inf)
+        order = np.argsort(-ratio, kind='stable')
+        pages_sorted = pages[order]
+        values_sorted = values[order]
+
+        capacities = (speeds[:, None] * budgets[None, :]).reshape(-1)  # pages readable, per (speed, budget)
+        # The schedule gets whole pages, rounded like ReadingScheduler.page_capacity; the bound may use fractions
+        count, used, value = self.greedy_pages(pages_sorted, values_sorted, np.floor(capacities + 1e-9))
+        upper_bound = self.fractional_bounds(pages_sorted, values_sorted, capacities)
+        total_pages = pages.sum()
+
+        plans = []
+        for s, speed in enumerate(speeds):
+            for b, budget in enumerate(budgets):
+                pair = s * len(budgets) + b
+                plans.append({
+                    'pages_per_hour': float(speed),
+                    'hours_available': float(budget),
+                    'total_hours': float(total_pages / speed),
+                    'books': int(count[pair]),
+                    'value': float(value[pair]),
+                    'hours_used': float(used[pair] / speed),
+                    'upper_bound': float(upper_bound[pair]),
+                })
+        return plans
+
+    @staticmethod
+    def greedy_pages(pages, values, capacities):
+        """
+        ReadingScheduler.greedy_pass for many page capacities at once: take every book, in order,
+        that fits in the pages left
+
+        Each round handles every capacity still scanning together. The longest run of books that
+        fits is found with a binary search in the prefix sums of the pages. Then the scan jumps
+        to the next book short enough for what is left, found with a binary descent over a sparse
+        table of range minimums. Every round takes at least one book per capacity.
+
+        Args:
+            pages (ndarray): Pages of the books, in greedy order
+            values (ndarray): Values of the books, in the same order
+            capacities (ndarray): Pages available, one per plan
+
+        Returns:
+            tuple: (books taken, pages used, value) arrays, one entry per capacity
+        """
+        n = len(pages)
+        prefix_pages = np.concatenate([[0.0], np.cumsum(pages)])
+        prefix_value = np.concatenate([[0.0], np.cumsum(values)])
+        minimums = [pages]  # minimums[l][i] = min(pages[i:i + 2**l])
+        while 2 ** len(minimums) <= n:
+            half = 2 ** (len(minimums) - 1)
+            minimums.append(np.minimum(minimums[-1][:-half], minimums[-1][half:]))
+
+        count = np.zeros(len(capacities), dtype=np.int64)
+        used = np.zeros(len(capacities))
+        value = np.zeros(len(capacities))
+        position = np.zeros(len(capacities), dtype=np.int64)
+        active = np.flatnonzero(position < n)
+        while active.size:
+            start = position[active]
+            remaining = capacities[active] - used[active]
+            end = np.searchsorted(prefix_pages, prefix_pages[start] + remaining, side='right') - 1
+            taken = prefix_pages[end] - prefix_pages[start]
+            count[active] += end - start
+            used[active] += taken
+            value[active] += prefix_value[end] - prefix_value[start]
+            remaining = remaining - taken
+
+            # pages[end] does not fit: skip to the first later book that does
+            skip = end
+            for level in range(len(minimums) - 1, -1, -1):
+                step = 2 ** level
+                table = minimums[level]
+                jump = (skip + step <= n) & (table[np.minimum(skip, len(table) - 1)] > remaining)
+                skip = np.where(jump, skip + step, skip)
+            position[active] = skip
+            active = active[skip < n]
+        return count, used, value
+
+    @staticmethod
+    def fractional_bounds(pages, values, capacities):
+        """
+        ReadingScheduler.fractional_bound for every capacity, via prefix sums and one binary search
+        """
+        n = len(pages)
+        prefix_pages = np.concatenate([[0.0], np.cumsum(pages)])
+        prefix_value = np.concatenate([[0.0], np.cumsum(values)])
+        # Number of books that fit whole, then a fraction of the next one
+        whole = np.searchsorted(prefix_pages, capacities, side='right') - 1
+        bounds = prefix_value[whole]
+        partial = whole < n
+        nxt = whole[partial]
+        bounds[partial] += values[nxt] * (capacities[partial] - prefix_pages[nxt]) / pages[nxt]
+        return bounds
+
+    def plan_serial(self, unread_books, speeds, budgets):
+        """
+        Reference implementation: one ReadingScheduler greedy run per (speed, budget) pair
+        """
+        plans = []
+        for speed in speeds:
+            speed = float(speed)
+            if speed <= 0:
+                raise ValueError("Reading speeds must be positive")
+            total_hours = math.fsum(int(book.get('num_pages') or 0) / speed for book in unread_books)
+            for budget in budgets:
+                result = self.scheduler.schedule(unread_books, speed, float(budget), "greedy")
+                plans.append({
+                    'pages_per_hour': speed,
+                    'hours_available': float(budget),
+                    'total_hours': total_hours,
+                    'books': len(result['books']),
+                    'value': result['value'],
+                    'hours_used': result['hours_used'],
+                    'upper_bound': result['upper_bound'],
+                })
+        return plans
+
+    @staticmethod
+    def table_rows(plans):
+        """
+        Formats plans for tabulate, in the order of TABLE_HEADERS
+        """
+        return [
+            [f"{plan['pages_per_hour']:g}", f"{plan['hours_available']:g}", f"{plan['total_hours']:.2f}",
+             plan['books'], f"{plan['value']:.2f}", f"{plan['hours_used']:.2f}", f"{plan['upper_bound']:.2f}"]
+            for plan in plans
+        ]